@@ -0,0 +1,126 @@
+"""Memory and throughput: one gateway process versus one process per agent.
+
+Both layouts serve the same requests through the gateway app (driven
+in-process over httpx's ASGI transport) with a stub model, so the numbers
+compare process layout only. The per-agent processes run in parallel and
+their RSS is summed.
+
+Usage (from the agents/ directory):
+    python bench_gateway.py [--requests 200] [--concurrency 50] [--model-latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import AsyncGenerator
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every request opens a new session, so the search cache is never consulted.
+os.environ.setdefault("SEARCH_CACHE_PATH", ":memory:")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _stub_factory(latency_ms: float):
+    from google.adk.models.base_llm import BaseLlm
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
+
+    class StubLlm(BaseLlm):
+        async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator:
+            await asyncio.sleep(latency_ms / 1000)
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(text="Claro, ¿me cuentas más?")])
+            )
+
+    return lambda model_name: StubLlm(model=model_name)
+
+
+async def _drive(names: list, requests: int, concurrency: int, latency_ms: float) -> dict:
+    import httpx
+
+    from gateway import Gateway, SharedModels, create_app
+
+    app = create_app(Gateway(names, models=SharedModels(_stub_factory(latency_ms))))
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(client, name: str, i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            response = await client.post(f"/agents/{name}/run", json={"message": f"Hola, solicitud {i}"})
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Load every agent before timing, as a warmed-up server would have.
+        await asyncio.gather(*(one(client, name, -1) for name in names))
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, name, i) for name in names for i in range(requests)))
+        seconds = time.perf_counter() - start
+    return {"requests": requests * len(names), "errors": errors, "seconds": seconds, "rss_mb": _rss_mb()}
+
+
+def _spawn(names: list, args: argparse.Namespace) -> subprocess.Popen:
+    command = [
+        sys.executable, __file__, "--worker", ",".join(names),
+        "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+        "--model-latency-ms", str(args.model_latency_ms),
+    ]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+
+
+def _collect(processes: list) -> list:
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise SystemExit(f"worker failed with exit code {process.returncode}")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per agent")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight per process")
+    parser.add_argument("--model-latency-ms", type=float, default=20.0)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        names = args.worker.split(",")
+        print(json.dumps(asyncio.run(_drive(names, args.requests, args.concurrency, args.model_latency_ms))))
+        return
+
+    from shared.registry import registry
+
+    names = registry.names()
+    (gateway,) = _collect([_spawn(names, args)])
+    per_agent = _collect([_spawn([name], args) for name in names])
+
+    layouts = {
+        "gateway (1 process)": gateway,
+        f"per agent ({len(names)} processes)": {
+            "requests": sum(result["requests"] for result in per_agent),
+            "errors": sum(result["errors"] for result in per_agent),
+            "seconds": max(result["seconds"] for result in per_agent),
+            "rss_mb": sum(result["rss_mb"] for result in per_agent),
+        },
+    }
+    print(f"{'layout':<26} {'requests':>9} {'errors':>7} {'req/s':>9} {'RSS MiB':>9}")
+    for layout, result in layouts.items():
+        rps = result["requests"] / result["seconds"]
+        print(f"{layout:<26} {result['requests']:>9} {result['errors']:>7} {rps:>9.1f} {result['rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,18 +14,14 @@
 # limitations under the License.
 
 from google.adk.agents import Agent
-from google.adk.tools import google_search, agent_tool
 
-MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
+from shared.device_catalog import find_efficient_device
+from shared.response_cache import response_cache
+from shared.search import search_web
+from shared.solar_sizing import calculate_solar_sizing
+from shared.tool_policy import tool_policy
 
-Agent_Search = Agent(
-    model='gemini-2.0-flash-exp',
-    name='SearchAgent',
-    instruction="""
-    You're a spealist in Google Search
-    """,
-    tools=[google_search]
-)
+MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
 
 
 offer_agent = Agent(
@@ -38,7 +34,9 @@ offer_agent = Agent(
 
         If `offer_decision` is "APPROVE", you should inform the user that they can save money by switching to a more energy-efficient device and offer them a micro-credit to buy it.
         If `offer_decision` is "REJECT", you should politely inform the user that their energy consumption is already efficient and thank them for using the service.
-    '''
+    ''',
+    before_model_callback=response_cache.before_model,
+    after_model_callback=response_cache.after_model,
 )
 
 
@@ -50,8 +48,8 @@ device_suggester_agent = Agent(
     You are an energy efficiency expert.
     You will receive the user's energy consumption data in the `consumption_data` variable.
     Your task is to:
-    1. Analyze the user's consumption.
-    2. Search for energy-efficient alternatives for the device type specified.
+    1. Analyze the user's consumption. For electricity bills, call the `calculate_solar_sizing` tool with the monthly kWh to get exact solar panel, savings and CO2 figures; never compute them yourself.
+    2. Find an energy-efficient alternative for the device type specified with the `find_efficient_device` tool. Only if it returns "not_found", search for one with the `search_web` tool.
     3. If a more efficient device exists and the potential savings are significant, output "APPROVE" and tell the user which device (exact model) should be buying.
     4. Otherwise, output "REJECT".
 
@@ -59,7 +57,8 @@ device_suggester_agent = Agent(
     ''',
     output_key="offer_decision",
     sub_agents=[offer_agent],
-    tools=[agent_tool.AgentTool(agent=Agent_Search)],
+    tools=[find_efficient_device, calculate_solar_sizing, search_web],
+    before_tool_callback=tool_policy.before_tool,
 )
 
 
@@ -81,6 +80,8 @@ Here is your process:
 After having all the required information, delegate to: 'device_suggester_agent'
 ''',
     sub_agents=[device_suggester_agent],
-    output_key="consumption_data"
+    output_key="consumption_data",
+    before_model_callback=response_cache.before_model,
+    after_model_callback=response_cache.after_model,
 )
 
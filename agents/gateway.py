@@ -0,0 +1,244 @@
+"""One FastAPI process serving every agent package in this project.
+
+Each registered root agent is mounted under /agents/{name}. Its runner is
+created on the first request for it, so an idle agent costs a registry
+entry and nothing else. All runners share:
+
+- one session service: in memory, or a database when GATEWAY_SESSION_DB_URL
+  is set (e.g. "sqlite:///gateway_sessions.db");
+- one model instance per model name, so every agent reuses a single genai
+  client and its HTTP connection pool. ADK otherwise creates a new client
+  for each model call when an agent's model is given as a string;
+- the server's event loop.
+
+Sessions are issued by the server: a run without a session_id opens one, and
+an unknown session_id is rejected with 404. Turns on the same session run one
+at a time, in arrival order.
+
+Usage (from the agents/ directory):
+    python gateway.py            # or: uvicorn gateway:app
+"""
+
+import json
+import os
+import sys
+import threading
+from typing import Any, AsyncGenerator, Callable, Dict, Iterable, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from shared.registry import registry
+from shared.session_locks import SessionLocks
+from shared.structured_logging import configure_logging
+
+USER_ID = "gateway_user"
+
+
+class SharedModels:
+    """One model instance per model name, assigned to every agent in a tree."""
+
+    def __init__(self, factory: Optional[Callable[[str], Any]] = None):
+        self._factory = factory
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str):
+        with self._lock:
+            if model_name not in self._models:
+                if self._factory is not None:
+                    self._models[model_name] = self._factory(model_name)
+                else:
+                    from google.adk.models.registry import LLMRegistry
+
+                    self._models[model_name] = LLMRegistry.new_llm(model_name)
+            return self._models[model_name]
+
+    def share(self, agent) -> None:
+        """Replace model names with shared instances across the agent tree."""
+        from google.adk.agents import LlmAgent
+        from google.adk.tools.agent_tool import AgentTool
+
+        if isinstance(agent, LlmAgent):
+            if isinstance(agent.model, str) and agent.model:
+                agent.model = self.get(agent.model)
+            for tool in agent.tools:
+                if isinstance(tool, AgentTool):
+                    self.share(tool.agent)
+        for sub_agent in agent.sub_agents:
+            self.share(sub_agent)
+
+
+class Gateway:
+    def __init__(
+        self,
+        agent_names: Optional[Iterable[str]] = None,
+        session_service=None,
+        models: Optional[SharedModels] = None,
+    ):
+        self.agent_names = sorted(agent_names) if agent_names is not None else registry.names()
+        self.session_service = session_service or _default_session_service()
+        self.models = models or SharedModels()
+        self.locks = SessionLocks()
+        self._runners: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def runner(self, name: str):
+        if name not in self.agent_names:
+            raise KeyError(name)
+        runner = self._runners.get(name)
+        if runner is None:
+            with self._lock:
+                if name not in self._runners:
+                    from google.adk.runners import Runner
+
+                    root_agent = registry.get(name)
+                    self.models.share(root_agent)
+                    search = sys.modules.get("shared.search")
+                    if search is not None:
+                        # search_web runs its own agent outside the tree.
+                        self.models.share(search.Agent_Search)
+                    self._runners[name] = Runner(
+                        app_name=name, agent=root_agent, session_service=self.session_service
+                    )
+                runner = self._runners[name]
+        return runner
+
+    def loaded(self) -> Dict[str, bool]:
+        return {name: name in self._runners for name in self.agent_names}
+
+    async def new_session(self, name: str) -> str:
+        session = await self.session_service.create_session(app_name=name, user_id=USER_ID)
+        return session.id
+
+    async def has_session(self, name: str, session_id: str) -> bool:
+        session = await self.session_service.get_session(
+            app_name=name, user_id=USER_ID, session_id=session_id
+        )
+        return session is not None
+
+    async def run(self, name: str, session_id: str, message: str, streaming: bool = False):
+        """The turn's events; turns on the same session wait for each other."""
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+        from google.genai import types
+
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
+        async with self.locks.hold(f"{name}/{session_id}"):
+            async for event in self.runner(name).run_async(
+                user_id=USER_ID,
+                session_id=session_id,
+                new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+                run_config=run_config,
+            ):
+                yield event
+
+
+def _default_session_service():
+    db_url = os.getenv("GATEWAY_SESSION_DB_URL")
+    if db_url:
+        from google.adk.sessions import DatabaseSessionService
+
+        return DatabaseSessionService(db_url=db_url)
+    from google.adk.sessions import InMemorySessionService
+
+    return InMemorySessionService()
+
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text or "" for part in event.content.parts)
+
+
+class RunRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+    stream: bool = False
+
+
+class RunResponse(BaseModel):
+    session_id: str
+    author: Optional[str] = None
+    response: str
+
+
+def create_app(gateway: Optional[Gateway] = None) -> FastAPI:
+    gateway = gateway or Gateway()
+    app = FastAPI(title="Agents gateway")
+    app.state.gateway = gateway
+
+    def _check(name: str) -> None:
+        if name not in gateway.agent_names:
+            raise HTTPException(status_code=404, detail=f"Unknown agent '{name}'.")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/agents")
+    async def agents():
+        return {"agents": gateway.loaded()}
+
+    @app.post("/agents/{name}/sessions")
+    async def create_session(name: str):
+        _check(name)
+        return {"session_id": await gateway.new_session(name)}
+
+    @app.post("/agents/{name}/run")
+    async def run(name: str, request: RunRequest):
+        _check(name)
+        if request.session_id:
+            if not await gateway.has_session(name, request.session_id):
+                raise HTTPException(status_code=404, detail=f"Unknown session '{request.session_id}'.")
+            session_id = request.session_id
+        else:
+            session_id = await gateway.new_session(name)
+        if request.stream:
+            return StreamingResponse(
+                _stream(gateway, name, session_id, request.message),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        # A pipeline answers with one final response per step that speaks.
+        texts, author = [], None
+        async for event in gateway.run(name, session_id, request.message):
+            if event.author != "user" and event.is_final_response() and _event_text(event):
+                texts.append(_event_text(event))
+                author = event.author
+        return RunResponse(session_id=session_id, author=author, response="\n\n".join(texts))
+
+    return app
+
+
+async def _stream(gateway: Gateway, name: str, session_id: str, message: str) -> AsyncGenerator[str, None]:
+    yield f"data: {json.dumps({'type': 'RUN_STARTED', 'sessionId': session_id})}\n\n"
+    # Partial chunks carry the text and the closing aggregate repeats it; the
+    # aggregate is only forwarded when the model did not stream.
+    streamed_partial = False
+    try:
+        async for event in gateway.run(name, session_id, message, streaming=True):
+            if event.author == "user":
+                continue
+            text = _event_text(event)
+            if event.partial:
+                streamed_partial = True
+            elif streamed_partial:
+                streamed_partial, text = False, ""
+            if text:
+                payload = {"type": "TEXT_MESSAGE_CONTENT", "author": event.author, "delta": text}
+                yield f"data: {json.dumps(payload)}\n\n"
+    except Exception as e:
+        yield f"data: {json.dumps({'type': 'RUN_ERROR', 'message': str(e)})}\n\n"
+        return
+    yield f"data: {json.dumps({'type': 'RUN_FINISHED', 'sessionId': session_id})}\n\n"
+
+
+configure_logging("shared", "gateway")
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8080")))
@@ -16,6 +16,10 @@
 from google.adk.agents import Agent, LlmAgent
 from google.adk.agents import SequentialAgent
 
+from shared.loan_scoring import make_prescore_callback
+from shared.response_cache import response_cache
+from shared.slot_filling import make_slot_filling_callback
+
 MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
 
 
@@ -29,7 +33,9 @@ verdict_agent = Agent(
 
         If `valid_loan` is "APPROVE", you should inform the user that their loan has been approved.
         If `valid_loan` is "REJECT", you should politely inform the user that their application was not approved at this time and say goodbye.
-    """
+    """,
+    before_model_callback=response_cache.before_model,
+    after_model_callback=response_cache.after_model,
 )
 
 
@@ -48,7 +54,13 @@ evaluation_agent = Agent(
     After having all the required delegate to: 'verdict_agent'
     """,
     output_key="valid_loan",
-    sub_agents=[verdict_agent]
+    sub_agents=[verdict_agent],
+    # Clear-cut applications are decided locally; only borderline ones reach the model.
+    before_model_callback=[
+        make_prescore_callback(transfer_to="verdict_agent"),
+        response_cache.before_model,
+    ],
+    after_model_callback=response_cache.after_model,
 )
 
 #root_agent = SequentialAgent(
@@ -69,11 +81,16 @@ You are a loan officer. Your task is to collect the following information from t
 
 Here is your process:
 1. Review the conversation history to see what information you have already collected.
-2. If you have collected all three pieces of information, your task is complete. You MUST output a JSON object with the collected data. The keys must be "earnings", "loan_amount", and "business_description". Output *only* this JSON object.
+2. If you have collected all three pieces of information, read them back to the user and ask them to confirm. Once the user confirms, your task is complete. You MUST output a JSON object with the collected data. The keys must be "earnings", "loan_amount", and "business_description". Output *only* this JSON object.
 3. If you are missing one or more pieces of information, ask ONE clear question to collect ONE piece of missing information. Do not ask for more than one thing at a time. Then wait for the user's answer.
 
 After having all the required delegate to: 'evaluation_agent'
 """,
     sub_agents=[evaluation_agent],
-    output_key="business_info"
+    output_key="business_info",
+    before_model_callback=[
+        make_slot_filling_callback(transfer_to="evaluation_agent"),
+        response_cache.before_model,
+    ],
+    after_model_callback=response_cache.after_model,
 )
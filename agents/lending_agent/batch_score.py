@@ -0,0 +1,130 @@
+"""Rescore stored loan applications in bulk with the pre-scoring rules.
+
+Reads a CSV (or a NumPy .npz with one array per column) holding `earnings`,
+`loan_amount` and an optional `business_category` column, scores it in
+chunks with shared.loan_scoring.score_arrays and streams the scored rows
+back as CSV, so results start flowing before the whole file is read.
+
+Usage (from the agents/ directory):
+    python -m lending_agent.batch_score applications.csv > scored.csv
+"""
+
+import argparse
+import csv
+import sys
+from itertools import islice
+from typing import Iterator, Optional, TextIO
+
+import numpy as np
+
+from shared.loan_scoring import DECISIONS, DEFAULT_POLICY, ScoringPolicy, category_risk, score_arrays
+
+OUTPUT_COLUMNS = [
+    "earnings",
+    "loan_amount",
+    "business_category",
+    "decision",
+    "monthly_payment",
+    "payment_to_income",
+    "loan_to_earnings",
+]
+
+
+def _to_float(values: list) -> np.ndarray:
+    column = np.empty(len(values), dtype=np.float64)
+    for index, value in enumerate(values):
+        try:
+            column[index] = float(value)
+        except (TypeError, ValueError):
+            column[index] = np.nan
+    return column
+
+
+def read_csv_chunks(stream: TextIO, chunk_size: int) -> Iterator[dict]:
+    reader = csv.DictReader(stream)
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        yield {
+            "earnings": _to_float([row.get("earnings") for row in rows]),
+            "loan_amount": _to_float([row.get("loan_amount") for row in rows]),
+            "business_category": np.array(
+                [row.get("business_category") or "" for row in rows], dtype=object
+            ),
+        }
+
+
+def read_npz_chunks(path: str, chunk_size: int) -> Iterator[dict]:
+    with np.load(path, allow_pickle=True) as data:
+        earnings = data["earnings"].astype(np.float64)
+        loan_amount = data["loan_amount"].astype(np.float64)
+        if "business_category" in data:
+            categories = data["business_category"].astype(object)
+        else:
+            categories = np.full(len(earnings), "", dtype=object)
+    for start in range(0, len(earnings), chunk_size):
+        stop = start + chunk_size
+        yield {
+            "earnings": earnings[start:stop],
+            "loan_amount": loan_amount[start:stop],
+            "business_category": categories[start:stop],
+        }
+
+
+def score_chunks(chunks: Iterator[dict], policy: ScoringPolicy = DEFAULT_POLICY) -> Iterator[dict]:
+    for chunk in chunks:
+        batch = score_arrays(
+            chunk["earnings"],
+            chunk["loan_amount"],
+            category_risk(chunk["business_category"], policy),
+            policy,
+        )
+        yield {
+            **chunk,
+            "decision": DECISIONS[batch.decision],
+            "monthly_payment": np.round(batch.monthly_payment, 2),
+            "payment_to_income": np.round(batch.payment_to_income, 4),
+            "loan_to_earnings": np.round(batch.loan_to_earnings, 4),
+        }
+
+
+def write_csv(scored: Iterator[dict], stream: TextIO) -> int:
+    writer = csv.writer(stream)
+    writer.writerow(OUTPUT_COLUMNS)
+    total = 0
+    for chunk in scored:
+        columns = [chunk[name].tolist() for name in OUTPUT_COLUMNS]
+        writer.writerows(zip(*columns))
+        stream.flush()
+        total += len(columns[0])
+    return total
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or .npz file, '-' reads CSV from stdin")
+    parser.add_argument("--output", help="write CSV here instead of stdout")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    if args.input.endswith(".npz"):
+        chunks = read_npz_chunks(args.input, args.chunk_size)
+        source = None
+    else:
+        source = sys.stdin if args.input == "-" else open(args.input, newline="")
+        chunks = read_csv_chunks(source, args.chunk_size)
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        total = write_csv(score_chunks(chunks), output)
+    finally:
+        if source not in (None, sys.stdin):
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"scored {total} applications", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
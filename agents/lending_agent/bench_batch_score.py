@@ -0,0 +1,58 @@
+"""Throughput of the vectorized loan scorer at 10k and 1M applications.
+
+Usage (from the agents/ directory):
+    python -m lending_agent.bench_batch_score
+"""
+
+import io
+import time
+
+import numpy as np
+
+from lending_agent.batch_score import read_csv_chunks, score_chunks, write_csv
+from shared.loan_scoring import category_risk, score_application, score_arrays
+
+SIZES = (10_000, 1_000_000)
+CATEGORIES = np.array(["solar", "restaurant", "retail", "agriculture", "other"], dtype=object)
+
+
+def _applications(size: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "earnings": rng.lognormal(mean=10.5, sigma=0.8, size=size).round(2),
+        "loan_amount": rng.lognormal(mean=12.0, sigma=1.0, size=size).round(2),
+        "business_category": CATEGORIES[rng.integers(0, len(CATEGORIES), size=size)],
+    }
+
+
+def _rate(label: str, rows: int, seconds: float) -> None:
+    print(f"{label:<34} {rows:>9} rows  {seconds * 1000:9.1f} ms  {rows / seconds:14,.0f} rows/s")
+
+
+def main() -> None:
+    for size in SIZES:
+        data = _applications(size)
+
+        start = time.perf_counter()
+        risk = category_risk(data["business_category"])
+        score_arrays(data["earnings"], data["loan_amount"], risk)
+        _rate("category_risk + score_arrays", size, time.perf_counter() - start)
+
+        buffer = io.StringIO()
+        write_csv(score_chunks(iter([data])), buffer)
+        csv_text = buffer.getvalue()
+        start = time.perf_counter()
+        write_csv(score_chunks(read_csv_chunks(io.StringIO(csv_text), 100_000)), io.StringIO())
+        _rate("CSV in -> score -> CSV out", size, time.perf_counter() - start)
+
+        sample = min(size, 10_000)
+        start = time.perf_counter()
+        for earnings, loan_amount, category in zip(
+            data["earnings"][:sample], data["loan_amount"][:sample], data["business_category"][:sample]
+        ):
+            score_application(float(earnings), float(loan_amount), category)
+        _rate("score_application (per row)", sample, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-message cost of the compiled guardrail as the rule list grows.
+
+Compares GuardrailEngine.scan with checking each term in a Python loop, for
+rule lists from ten to ten thousand terms.
+
+Usage (from the agents/ directory):
+    python -m shared.bench_guardrails
+"""
+
+import random
+import string
+import time
+
+from shared.guardrails import GuardrailEngine, fold
+
+RULE_COUNTS = (10, 100, 1_000, 10_000)
+CALLS = 2_000
+MESSAGE = (
+    "Hola, tengo una taquería en Monterrey y ganamos unos 80 mil pesos al mes. "
+    "Quiero un préstamo de 200 mil para comprar paneles solares y un refrigerador "
+    "más eficiente, ¿qué opciones tengo y cuánto pagaría al mes?"
+)
+
+
+def _terms(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+            for _ in range(rng.randint(1, 3))
+        )
+        for _ in range(count)
+    ]
+
+
+def _per_call_us(function, calls: int = CALLS) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    print(f"{'rules':>7} {'compile ms':>11} {'scan us':>9} {'loop us':>9}")
+    for count in RULE_COUNTS:
+        terms = _terms(count)
+        start = time.perf_counter()
+        engine = GuardrailEngine(terms)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        scan_us = _per_call_us(lambda: engine.scan(MESSAGE))
+        assert engine.scan(MESSAGE) is None
+        folded = [fold(term) for term in terms]
+
+        def loop():
+            text = fold(MESSAGE)
+            return any(term in text for term in folded)
+
+        loop_us = _per_call_us(loop, CALLS // 10)
+        print(f"{count:>7} {compile_ms:>11.1f} {scan_us:>9.1f} {loop_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Prompt prefix reuse per agent on the susana agents.
+
+Runs the SUSANA pipeline and Alexis with a stub model and the local cache
+backend, then prints per agent how many calls hit an explicit cache, how many
+created it, and the share of prompt tokens that the shared prefix makes up.
+
+Usage (from the agents/ directory):
+    python -m shared.bench_prompt_cache [--sessions 20] [--min-tokens 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+os.environ["PROMPT_CACHE"] = "local"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from shared.prompt_registry import _estimate_tokens, prompt_registry as registry
+from susana import agent as susana, test_agent as alexis
+
+MESSAGES = (
+    "Hola, tengo una panadería",
+    "Vendemos unos 90 mil al mes",
+    "Necesito 150 mil pesos",
+    "Sí, acepto las condiciones",
+)
+
+
+class StubLlm(BaseLlm):
+    """Answers at once and reports prompt and cached token estimates."""
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False):
+        cached_text = registry.cache.lookup(llm_request.config.cached_content or "") or ""
+        prompt_text = cached_text + (llm_request.config.system_instruction or "") + json.dumps(
+            [content.model_dump(exclude_none=True, mode="json") for content in llm_request.contents]
+        )
+        text = "APPROVE" if "APPROVE" in prompt_text and "REJECT" in prompt_text else "Claro, ¿me cuentas más?"
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=_estimate_tokens(prompt_text),
+                cached_content_token_count=_estimate_tokens(cached_text),
+            ),
+        )
+
+
+async def _drive(root_agent, sessions: int) -> None:
+    runner = InMemoryRunner(agent=root_agent, app_name="prompt_cache")
+    for index in range(sessions):
+        session = await runner.session_service.create_session(app_name="prompt_cache", user_id=f"user-{index}")
+        for message in MESSAGES:
+            async for _ in runner.run_async(
+                user_id=session.user_id,
+                session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+            ):
+                pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prompt prefix cache hit rates per agent.")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--min-tokens", type=int, default=0, help="Smallest prefix to cache, in estimated tokens.")
+    args = parser.parse_args()
+
+    registry.min_tokens = args.min_tokens
+    stub = StubLlm(model="gemini-2.0-flash")
+    for sub_agent in susana.root_agent.sub_agents:
+        sub_agent.model = stub
+    alexis.root_agent.model = stub
+    asyncio.run(_drive(susana.root_agent, args.sessions))
+    asyncio.run(_drive(alexis.root_agent, args.sessions))
+
+    print(
+        f"{'agent':<20} {'calls':>6} {'hits':>6} {'created':>8} {'hit rate':>9}"
+        f" {'prompt tok':>11} {'prefix tok':>11} {'prefix':>7}"
+    )
+    for agent_name, stats in registry.stats().items():
+        prompt_tokens = stats.get("prompt_tokens", 0)
+        prefix_tokens = stats.get("prefix_tokens_estimate", 0)
+        print(
+            f"{agent_name:<20} {stats['calls']:>6} {stats.get('hits', 0):>6} {stats.get('created', 0):>8}"
+            f" {stats['hit_rate']:>9.0%} {prompt_tokens:>11} {prefix_tokens:>11}"
+            f" {prefix_tokens / prompt_tokens if prompt_tokens else 0:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
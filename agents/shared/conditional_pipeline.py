@@ -0,0 +1,121 @@
+"""A SequentialAgent whose steps are guarded by conditions on session state.
+
+A plain SequentialAgent runs every sub-agent on every turn, even when a
+step's outcome is already known. ConditionalSequentialAgent checks each
+step's StepGuard first. When the guard fails, the step is skipped, or its
+fixed reply is emitted as the step's own event without a model call:
+
+    ConditionalSequentialAgent(
+        name="BankAgentPipeline",
+        sub_agents=[introduction_agent, evaluation_agent, agreement_agent],
+        guards={
+            "evaluation_agent": StepGuard(run_if=lambda state: "valid_loan" not in state),
+            "agreement_agent": StepGuard(
+                run_if=lambda state: state.get("valid_loan") == "APPROVE",
+                template=lambda state: "..." if state.get("valid_loan") == "REJECT" else None,
+            ),
+        },
+    )
+
+Steps without a guard always run. What happened to each step on the last
+turn ("ran", "templated" or "skipped") is written to the `pipeline_steps`
+state key and logged.
+
+Guards that wait for a decision would otherwise keep their outcome forever.
+With `reset_if`, a turn whose user message asks to start again clears the
+`reset_keys` before any guard is checked, so the earlier steps run again:
+
+    reset_if=lambda state, message: is_restart(message),
+    reset_keys=("business_info", "valid_loan"),
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import AsyncGenerator, Callable, Dict, Mapping, Optional, Tuple, Union
+
+from google.adk.agents import SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import Field
+
+STATE_KEY = "pipeline_steps"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StepGuard:
+    """When a pipeline step runs, and what it says instead when it does not.
+
+    Args:
+        run_if: Called with the session state; the step's agent runs when it
+            returns True.
+        template: The reply used instead of running the agent: a fixed
+            string, or a function of the state returning one, or None to
+            skip the step silently. It is also written to the agent's
+            output_key, as the agent would have done.
+    """
+
+    run_if: Callable[[Mapping], bool]
+    template: Union[str, Callable[[Mapping], Optional[str]], None] = None
+
+
+class ConditionalSequentialAgent(SequentialAgent):
+    """Runs its sub-agents in order, skipping or templating guarded steps."""
+
+    guards: Dict[str, StepGuard] = Field(default_factory=dict)
+    # Called with the state and the user's message at the start of a turn.
+    reset_if: Optional[Callable[[Mapping, str], bool]] = None
+    reset_keys: Tuple[str, ...] = ()
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        steps: Dict[str, str] = {}
+        message = " ".join(
+            part.text or "" for part in (ctx.user_content.parts if ctx.user_content else None) or []
+        )
+        if self.reset_if is not None and self.reset_if(ctx.session.state, message):
+            cleared = {key: None for key in self.reset_keys if ctx.session.state.get(key) is not None}
+            if cleared:
+                logger.info("pipeline reset", extra={"agent_name": self.name, "keys": sorted(cleared)})
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    actions=EventActions(state_delta=cleared),
+                )
+        for sub_agent in self.sub_agents:
+            # State reflects the events of the earlier steps of this turn.
+            state = ctx.session.state
+            guard = self.guards.get(sub_agent.name)
+            if guard is None or guard.run_if(state):
+                steps[sub_agent.name] = "ran"
+                pause = False
+                async for event in sub_agent.run_async(ctx):
+                    yield event
+                    pause = pause or ctx.should_pause_invocation(event)
+                if pause:
+                    break
+                continue
+
+            text = guard.template(state) if callable(guard.template) else guard.template
+            if not text:
+                steps[sub_agent.name] = "skipped"
+                continue
+            steps[sub_agent.name] = "templated"
+            output_key = getattr(sub_agent, "output_key", None)
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=sub_agent.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=text)]),
+                actions=EventActions(state_delta={output_key: text} if output_key else {}),
+            )
+
+        logger.info("pipeline steps", extra={"agent_name": self.name, "steps": steps})
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={STATE_KEY: steps}),
+        )
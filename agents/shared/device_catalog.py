@@ -0,0 +1,201 @@
+"""Local appliance efficiency catalog with an in-memory index.
+
+The catalog is loaded once from device_catalog.json and indexed by device
+type and efficiency class. For every device type only the models no other
+model beats on both price and consumption are kept as replacement
+candidates; the best replacement is always one of them, so a lookup ranks a
+handful of models at the user's actual consumption. Agents only fall back to
+live search when a device type is missing from the catalog.
+"""
+
+import json
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+CATALOG_PATH = Path(__file__).with_name("device_catalog.json")
+
+# Default tariff used to value savings: CFE intermediate tier, MXN per kWh.
+DEFAULT_RATE_MXN_PER_KWH = 1.093
+EFFICIENCY_CLASSES = ("A+++", "A++", "A+", "A", "B", "C", "D")
+
+DEVICE_ALIASES = {
+    "refrigerator": "refrigerator",
+    "fridge": "refrigerator",
+    "refrigerador": "refrigerator",
+    "refri": "refrigerator",
+    "nevera": "refrigerator",
+    "air conditioner": "air_conditioner_1ton",
+    "ac": "air_conditioner_1ton",
+    "aire acondicionado": "air_conditioner_1ton",
+    "minisplit": "air_conditioner_1ton",
+    "air conditioner 1 ton": "air_conditioner_1ton",
+    "air conditioner 1.5 ton": "air_conditioner_1_5ton",
+    "air conditioner 2 ton": "air_conditioner_2ton",
+    "washing machine": "washing_machine",
+    "washer": "washing_machine",
+    "lavadora": "washing_machine",
+    "lighting": "lighting",
+    "light bulb": "lighting",
+    "bulb": "lighting",
+    "focos": "lighting",
+    "foco": "lighting",
+    "television": "television",
+    "tv": "television",
+    "pantalla": "television",
+    "television set": "television",
+    "water heater": "water_heater",
+    "boiler": "water_heater",
+    "calentador": "water_heater",
+    "fan": "fan",
+    "ventilador": "fan",
+}
+# Whole words that mark a "<n> ton" device as an air conditioner.
+_AIR_CONDITIONER_WORDS = {"air", "aire", "split", "minisplit", "ac", "clima"}
+
+
+@dataclass(frozen=True)
+class Device:
+    model: str
+    device_type: str
+    efficiency_class: str
+    monthly_kwh: float
+    price_mxn: float
+
+
+def normalize_device_type(device_type: str) -> str:
+    """Map free-form English or Spanish names onto catalog device types."""
+    text = unicodedata.normalize("NFKD", device_type.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = " ".join(text.replace("_", " ").replace("-", " ").split())
+    if _AIR_CONDITIONER_WORDS & set(text.split()):
+        for tons, suffix in (("1.5", "1_5ton"), ("2", "2ton"), ("1", "1ton")):
+            if re.search(rf"(?<![\d.]){re.escape(tons)} ?ton(?:s|eladas?)?\b", text):
+                return f"air_conditioner_{suffix}"
+    if text in DEVICE_ALIASES:
+        return DEVICE_ALIASES[text]
+    return text.replace(" ", "_")
+
+
+class DeviceCatalog:
+    """Catalog indexed by device type and efficiency class."""
+
+    def __init__(self, devices: List[Device], rate_mxn_per_kwh: float = DEFAULT_RATE_MXN_PER_KWH):
+        self.rate_mxn_per_kwh = rate_mxn_per_kwh
+        self._by_type: Dict[str, List[Device]] = {}
+        self._by_class: Dict[Tuple[str, str], List[Device]] = {}
+        for device in sorted(devices, key=lambda d: d.monthly_kwh):
+            self._by_type.setdefault(device.device_type, []).append(device)
+            self._by_class.setdefault((device.device_type, device.efficiency_class), []).append(device)
+        self._frontier = {
+            device_type: self._non_dominated(candidates) for device_type, candidates in self._by_type.items()
+        }
+
+    @classmethod
+    def from_json(cls, path: Path = CATALOG_PATH) -> "DeviceCatalog":
+        with open(path, encoding="utf-8") as handle:
+            return cls([Device(**entry) for entry in json.load(handle)])
+
+    def _rank(self, candidates: List[Device], current_kwh: float) -> List[Device]:
+        """Shortest payback first for a device that uses `current_kwh`."""
+
+        def payback_months(device: Device) -> float:
+            saved = (current_kwh - device.monthly_kwh) * self.rate_mxn_per_kwh
+            return device.price_mxn / saved if saved > 0 else float("inf")
+
+        return sorted(candidates, key=lambda device: (payback_months(device), device.monthly_kwh))
+
+    @staticmethod
+    def _non_dominated(candidates: List[Device]) -> List[Device]:
+        """Devices no other one beats on both price and consumption.
+
+        A device that costs more and uses more than another never has the
+        shorter payback, whatever the current consumption.
+        """
+        frontier: List[Device] = []
+        for device in sorted(candidates, key=lambda d: (d.monthly_kwh, d.price_mxn)):
+            if not frontier or device.price_mxn < frontier[-1].price_mxn:
+                frontier.append(device)
+        return frontier
+
+    def device_types(self) -> List[str]:
+        return sorted(self._by_type)
+
+    def best_replacement(
+        self,
+        device_type: str,
+        current_monthly_kwh: float,
+        min_efficiency_class: Optional[str] = None,
+    ) -> Optional[Device]:
+        device_type = normalize_device_type(device_type)
+        if device_type not in self._by_type:
+            return None
+        if min_efficiency_class:
+            allowed = EFFICIENCY_CLASSES[: EFFICIENCY_CLASSES.index(min_efficiency_class) + 1]
+            candidates = [
+                device
+                for efficiency_class in allowed
+                for device in self._by_class.get((device_type, efficiency_class), [])
+            ]
+            ranked = self._rank(candidates, current_monthly_kwh)
+            return ranked[0] if ranked else None
+        return self._rank(self._frontier[device_type], current_monthly_kwh)[0]
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> DeviceCatalog:
+    return DeviceCatalog.from_json()
+
+
+def find_efficient_device(
+    device_type: str,
+    current_monthly_kwh: float,
+    min_efficiency_class: Optional[str] = None,
+) -> dict:
+    """Finds the most cost-effective energy-efficient replacement for a device.
+
+    Use this tool before searching the web. Only search when it returns
+    status "not_found".
+
+    Args:
+        device_type: The kind of device, e.g. "refrigerator", "minisplit 1.5 ton", "lavadora".
+        current_monthly_kwh: What the user's current device consumes per month in kWh.
+        min_efficiency_class: Optional lowest acceptable efficiency class, e.g. "A++".
+
+    Returns:
+        dict: status, the recommended model with its consumption, price, monthly
+        savings in kWh and MXN, and the payback period in months.
+    """
+    catalog = get_catalog()
+    if min_efficiency_class and min_efficiency_class not in EFFICIENCY_CLASSES:
+        return {
+            "status": "error",
+            "error_message": f"Unknown efficiency class '{min_efficiency_class}'; use one of {list(EFFICIENCY_CLASSES)}.",
+        }
+    device = catalog.best_replacement(device_type, current_monthly_kwh, min_efficiency_class)
+    if device is None:
+        return {
+            "status": "not_found",
+            "message": f"No catalog entry for '{device_type}'. Known types: {catalog.device_types()}.",
+        }
+
+    saved_kwh = current_monthly_kwh - device.monthly_kwh
+    if saved_kwh <= 0:
+        return {
+            "status": "already_efficient",
+            "message": f"The current device already uses less than the best catalog option ({device.model}, {device.monthly_kwh} kWh/month).",
+        }
+    saved_mxn = saved_kwh * catalog.rate_mxn_per_kwh
+    return {
+        "status": "success",
+        "model": device.model,
+        "efficiency_class": device.efficiency_class,
+        "monthly_kwh": device.monthly_kwh,
+        "price_mxn": device.price_mxn,
+        "monthly_savings_kwh": round(saved_kwh, 1),
+        "monthly_savings_mxn": round(saved_mxn, 2),
+        "payback_months": round(device.price_mxn / saved_mxn, 1),
+    }
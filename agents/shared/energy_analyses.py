@@ -0,0 +1,125 @@
+"""Local answers for the solar analyses that need no model.
+
+Once the bill analyzer has collected the household's data, solar sizing and
+the loan pre-check are plain arithmetic on it. These callbacks compute them
+and answer for the model, the same way the loan pre-scoring does; when the
+collected data cannot be parsed they return None and the model handles it.
+
+    before_model_callback=make_solar_sizing_callback()
+"""
+
+import json
+import re
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from shared.loan_scoring import APPROVE, REJECT, ScoringPolicy, parse_amount, parse_business_info
+from shared.solar_sizing import PANEL_AREA_M2, calculate_solar_sizing, required_panels
+
+STATE_KEY = "consumption_data"
+# Green financing for the panels: longer and cheaper than a business loan,
+# since the installation is repaid out of the bill it removes.
+SOLAR_POLICY = ScoringPolicy(annual_rate=0.10, term_months=120)
+# Keys the collector may use for each field; the first one present wins.
+_FIELDS = {
+    "people": ("people", "number_of_people", "personas"),
+    "monthly_kwh": ("monthly_kwh", "consumption", "kwh", "monthly_consumption_kwh", "consumo"),
+    "location": ("location", "ubicacion", "city"),
+    "available_m2": ("available_m2", "available_space", "space_m2", "m2", "espacio"),
+}
+# A consumption or a space figure in a user message.
+_CONSUMPTION_FIGURE = re.compile(
+    r"\d[\d.,]*\s*(?:kwh|kw/h|kw h|kilowatt|m2|m²|mts|metros)", re.IGNORECASE
+)
+
+
+def parse_consumption(raw: Any) -> Dict[str, Any]:
+    """The collected data with canonical keys; amounts are parsed to numbers."""
+    data = parse_business_info(raw)
+    parsed: Dict[str, Any] = {}
+    for name, aliases in _FIELDS.items():
+        value = next((data[key] for key in aliases if data.get(key) not in (None, "")), None)
+        if value is None:
+            continue
+        parsed[name] = value if name == "location" else parse_amount(value)
+    return {name: value for name, value in parsed.items() if value is not None}
+
+
+def consumption_complete(state) -> bool:
+    return all(name in parse_consumption(state.get(STATE_KEY)) for name in _FIELDS)
+
+
+def mentions_consumption(text: str) -> bool:
+    """Whether a message gives a kWh consumption or an available space."""
+    return bool(_CONSUMPTION_FIGURE.search(text))
+
+
+def _reply(payload: Dict[str, Any]) -> LlmResponse:
+    text = json.dumps(payload, ensure_ascii=False)
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def solar_loan_precheck(
+    monthly_kwh: float,
+    available_m2: Optional[float] = None,
+    policy: ScoringPolicy = SOLAR_POLICY,
+) -> Dict[str, Any]:
+    """Whether the panels that fit pay for their own financing.
+
+    The installation (recommended panels, capped by the space) is financed
+    over the policy's term at its rate; the credit is pre-approved when the
+    monthly payment is no larger than the monthly savings
+    calculate_solar_sizing gives for that installation.
+    """
+    panels = int(required_panels(monthly_kwh))
+    if available_m2 is not None:
+        panels = min(panels, int(available_m2 // PANEL_AREA_M2))
+    if panels <= 0:
+        return {"decision": REJECT, "reason": "no panel fits the available space", "panels": 0}
+    sizing = calculate_solar_sizing(monthly_kwh, available_m2, panel_counts=[panels])["scenarios"][0]
+    loan_amount = sizing["investment_mxn"]
+    payment = loan_amount * policy.payment_factor()
+    savings = sizing["monthly_savings_mxn"]
+    decision = APPROVE if payment <= savings else REJECT
+    return {
+        "decision": decision,
+        "reason": "payment covered by the savings" if decision == APPROVE else "payment above the savings",
+        "panels": panels,
+        "loan_amount": loan_amount,
+        "monthly_payment": round(payment, 2),
+        "monthly_savings": savings,
+        "monthly_bill": sizing["monthly_cost_mxn"],
+        "term_months": policy.term_months,
+    }
+
+
+def make_solar_sizing_callback():
+    """Build a before_model_callback that answers with calculate_solar_sizing."""
+
+    def size_installation(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        data = parse_consumption(callback_context.state.get(STATE_KEY))
+        if not data.get("monthly_kwh"):
+            return None
+        return _reply(calculate_solar_sizing(data["monthly_kwh"], data.get("available_m2")))
+
+    return size_installation
+
+
+def make_loan_precheck_callback(policy: ScoringPolicy = SOLAR_POLICY):
+    """Build a before_model_callback that answers with solar_loan_precheck."""
+
+    def precheck_loan(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        data = parse_consumption(callback_context.state.get(STATE_KEY))
+        if not data.get("monthly_kwh"):
+            return None
+        return _reply(solar_loan_precheck(data["monthly_kwh"], data.get("available_m2"), policy))
+
+    return precheck_loan
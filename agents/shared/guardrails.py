@@ -0,0 +1,179 @@
+"""Compiled keyword and pattern guardrail for before_model callbacks.
+
+Blocked terms and regexes are loaded from guardrail_rules.json (or
+GUARDRAIL_RULES_PATH) and compiled once into a single regex. Terms are
+merged into a prefix trie first, so the regex branches on one character at a
+time and scanning costs about the same for ten terms or ten thousand. Matching
+is case- and accent-insensitive. "terms" only match whole words, so
+"prestanombres" does not block "prestanombresito"; "substrings" match
+anywhere in the message, which is how the original "BLOCK" keyword check
+behaved ("unblock" and "blockchain" are blocked too) and is kept for it.
+
+The new user message is scanned once per turn: the verdict is kept per
+invocation, so every further model call of the turn, in this agent or a
+sub-agent, reuses it instead of walking `llm_request.contents` again.
+
+    before_model_callback=[guardrail.before_model, ...]
+"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from shared.structured_logging import log_context
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = Path(__file__).with_name("guardrail_rules.json")
+DEFAULT_MESSAGE = "I cannot process this request because it contains the blocked term '{match}'."
+
+
+@dataclass(frozen=True)
+class GuardrailMatch:
+    rule: str
+    text: str
+    message: str
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip accents, the form rules are matched against."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """One regex for all terms, factored by common prefix."""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class GuardrailEngine:
+    """Blocks model calls whose triggering user message matches a rule."""
+
+    def __init__(
+        self,
+        terms: Iterable[str] = (),
+        patterns: Iterable[dict] = (),
+        substrings: Iterable[str] = (),
+        message: str = DEFAULT_MESSAGE,
+        max_invocations: int = 1024,
+    ):
+        """
+        Args:
+            terms: Words or phrases to block, matched as whole words.
+            substrings: Text to block wherever it appears, even inside a word.
+            patterns: Dicts with "name", "pattern" (matched against folded
+                text) and optionally "message".
+            message: Reply for a blocked term; "{match}" is replaced by it.
+            max_invocations: How many per-turn verdicts to remember.
+        """
+        self.message = message
+        self.max_invocations = max_invocations
+        self.stats = {"scans": 0, "reused": 0, "blocked": 0}
+        folded_terms = sorted({" ".join(fold(term).split()) for term in terms} - {""})
+        folded_substrings = sorted({" ".join(fold(text).split()) for text in substrings} - {""})
+        self._patterns: List[dict] = list(patterns)
+        alternatives = []
+        if folded_terms:
+            alternatives.append(rf"(?P<term>(?<!\w){trie_pattern(folded_terms)}(?!\w))")
+        if folded_substrings:
+            alternatives.append(f"(?P<substring>{trie_pattern(folded_substrings)})")
+        for i, rule in enumerate(self._patterns):
+            alternatives.append(f"(?P<p{i}>{rule['pattern']})")
+        self._regex = re.compile("|".join(alternatives)) if alternatives else None
+        self.rule_count = len(folded_terms) + len(folded_substrings) + len(self._patterns)
+        self._verdicts: "OrderedDict[str, Optional[GuardrailMatch]]" = OrderedDict()
+
+    @classmethod
+    def from_file(cls, path: Path = RULES_PATH) -> "GuardrailEngine":
+        with open(path, encoding="utf-8") as handle:
+            config = json.load(handle)
+        return cls(
+            terms=config.get("terms", []),
+            patterns=config.get("patterns", []),
+            substrings=config.get("substrings", []),
+            message=config.get("message", DEFAULT_MESSAGE),
+        )
+
+    def scan(self, text: str) -> Optional[GuardrailMatch]:
+        """First rule `text` matches, if any."""
+        self.stats["scans"] += 1
+        if self._regex is None or not text:
+            return None
+        # Collapse whitespace so multi-word terms match across line breaks.
+        match = self._regex.search(" ".join(fold(text).split()))
+        if match is None:
+            return None
+        for rule in ("term", "substring"):
+            found = match.group(rule) if rule in self._regex.groupindex else None
+            if found is not None:
+                return GuardrailMatch(rule, found, self.message.format(match=found))
+        for i, rule in enumerate(self._patterns):
+            found = match.group(f"p{i}")
+            if found is not None:
+                message = rule.get("message", self.message).format(match=found)
+                return GuardrailMatch(rule["name"], found, message)
+        return None
+
+    def check_turn(self, callback_context: CallbackContext) -> Optional[GuardrailMatch]:
+        """Verdict for the current turn's user message, scanned only once."""
+        invocation_id = callback_context.invocation_id
+        if invocation_id in self._verdicts:
+            self.stats["reused"] += 1
+            self._verdicts.move_to_end(invocation_id)
+            return self._verdicts[invocation_id]
+        user_content = callback_context.user_content
+        text = " ".join(
+            part.text or "" for part in (user_content.parts if user_content else None) or []
+        )
+        verdict = self.scan(text)
+        self._verdicts[invocation_id] = verdict
+        if len(self._verdicts) > self.max_invocations:
+            self._verdicts.popitem(last=False)
+        return verdict
+
+    def before_model(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        verdict = self.check_turn(callback_context)
+        if verdict is None:
+            return None
+        self.stats["blocked"] += 1
+        logger.info(
+            "guardrail blocked model call",
+            extra={**log_context(callback_context), "rule": verdict.rule},
+        )
+        callback_context.state["guardrail_block_keyword_triggered"] = True
+        callback_context.state["guardrail_rule"] = verdict.rule
+        return LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=verdict.message)])
+        )
+
+
+guardrail = GuardrailEngine.from_file(Path(os.getenv("GUARDRAIL_RULES_PATH", RULES_PATH)))
@@ -0,0 +1,343 @@
+"""Rule- and ratio-based loan pre-scoring for the evaluation agents.
+
+Clear-cut applications are decided locally from the `business_info` the
+introduction agent collected; only borderline ones are forwarded to the
+model. The same rules are vectorized in score_arrays for portfolio-scale
+rescoring (see lending_agent/batch_score.py). Register the callback first
+in the evaluation agent's model callbacks:
+
+    before_model_callback=[make_prescore_callback(), ...]
+"""
+
+import json
+import re
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+APPROVE = "APPROVE"
+REJECT = "REJECT"
+BORDERLINE = "BORDERLINE"
+
+
+# Multiplier applied to both ratios per business category; greener
+# categories carry less risk for Banorte Verde.
+DEFAULT_CATEGORY_RISK = {
+    "solar": 0.85,
+    "renewable energy": 0.85,
+    "recycling": 0.9,
+    "agriculture": 1.1,
+    "restaurant": 1.1,
+    "retail": 1.0,
+    "services": 1.0,
+}
+
+# Whole words in a business description that place it in a category. The
+# categories are checked in order: the greener ones first, then the more
+# specific kinds of business before the broad ones, agriculture last.
+CATEGORY_KEYWORDS = {
+    "solar": ("solar", "solares", "panel", "paneles", "panels", "fotovoltaico", "fotovoltaica",
+              "fotovoltaicos", "fotovoltaicas", "photovoltaic"),
+    "renewable energy": ("renovable", "renovables", "renewable", "renewables", "eolica", "eolico",
+                         "eolicas", "eolicos", "wind", "biogas", "biomasa", "biomass"),
+    "recycling": ("reciclaje", "reciclar", "reciclamos", "recicladora", "reciclado", "reciclados",
+                  "recycling", "recycle", "recycled", "chatarra", "chatarreria", "scrap",
+                  "composta", "compost", "composting"),
+    "restaurant": (
+        "restaurant", "restaurante", "restaurantes", "fonda", "cocina", "comida", "comidas", "food",
+        "taqueria", "tacos", "cafe", "cafeteria", "panaderia", "bakery", "pasteleria",
+    ),
+    "retail": ("tienda", "tiendas", "abarrotes", "minisuper", "store", "shop", "boutique", "papeleria",
+               "farmacia", "farmacias", "pharmacy", "venta de", "retail"),
+    "services": (
+        "servicio", "servicios", "service", "services", "taller", "consultoria", "consultor",
+        "consultora", "estetica", "salon", "lavanderia", "laundry", "limpieza", "cleaning",
+        "reparacion", "reparaciones", "repair", "repairs", "clinica", "escuela",
+    ),
+    "agriculture": ("agricola", "agricolas", "agricultura", "agriculture", "agricultural", "granja",
+                    "granjas", "farm", "farms", "farming", "cultivo", "cultivos", "cosecha", "cosechas",
+                    "ganaderia", "ganado", "ganadero", "huerto", "huertos", "rancho", "ranchos"),
+}
+
+
+@dataclass(frozen=True)
+class ScoringPolicy:
+    """Thresholds of the pre-scoring rules.
+
+    The monthly payment is the annuity payment of the loan over `term_months`
+    at `annual_rate`; `payment_to_income` compares it with monthly earnings
+    and `loan_to_earnings` compares the loan with a year of earnings. Both
+    ratios are multiplied by the category's entry in `category_risk`.
+    """
+
+    annual_rate: float = 0.18
+    term_months: int = 36
+    approve_payment_to_income: float = 0.20
+    reject_payment_to_income: float = 0.50
+    approve_loan_to_earnings: float = 1.0
+    reject_loan_to_earnings: float = 3.0
+    category_risk: Dict[str, float] = field(
+        default_factory=lambda: dict(DEFAULT_CATEGORY_RISK), hash=False
+    )
+
+    def payment_factor(self) -> float:
+        """Monthly payment per unit of loan."""
+        rate = self.annual_rate / 12
+        if rate == 0:
+            return 1 / self.term_months
+        return rate / (1 - (1 + rate) ** -self.term_months)
+
+
+DEFAULT_POLICY = ScoringPolicy()
+
+# Decision codes used by the vectorized scorer, indexes into DECISIONS.
+REJECT_CODE, APPROVE_CODE, BORDERLINE_CODE = 0, 1, 2
+DECISIONS = np.array([REJECT, APPROVE, BORDERLINE])
+
+
+@dataclass(frozen=True)
+class LoanScore:
+    decision: str
+    reason: str
+    monthly_payment: Optional[float] = None
+    payment_to_income: Optional[float] = None
+    loan_to_earnings: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class ScoredBatch:
+    """Column-wise result of score_arrays; ratios are NaN where undefined."""
+
+    decision: np.ndarray
+    monthly_payment: np.ndarray
+    payment_to_income: np.ndarray
+    loan_to_earnings: np.ndarray
+
+
+def category_risk(categories: Any, policy: ScoringPolicy = DEFAULT_POLICY) -> np.ndarray:
+    """Risk multiplier per row; unknown or missing categories count as 1."""
+    categories = np.asarray(categories, dtype=object)
+    unique, inverse = np.unique(categories.astype(str), return_inverse=True)
+    lookup = np.array(
+        [policy.category_risk.get(name.strip().lower(), 1.0) for name in unique],
+        dtype=np.float64,
+    )
+    return lookup[inverse].reshape(categories.shape)
+
+
+def score_arrays(
+    earnings: Any,
+    loan_amount: Any,
+    risk: Any = 1.0,
+    policy: ScoringPolicy = DEFAULT_POLICY,
+) -> ScoredBatch:
+    """Score many applications at once; NaN marks a missing value."""
+    earnings = np.asarray(earnings, dtype=np.float64)
+    loan_amount = np.asarray(loan_amount, dtype=np.float64)
+    risk = np.asarray(risk, dtype=np.float64)
+
+    missing = np.isnan(earnings) | np.isnan(loan_amount)
+    invalid = missing | (earnings <= 0) | (loan_amount <= 0)
+    payment = loan_amount * policy.payment_factor()
+    safe_earnings = np.where(invalid, np.nan, earnings)
+    payment_to_income = payment / safe_earnings * risk
+    loan_to_earnings = loan_amount / (12 * safe_earnings) * risk
+
+    decision = np.full(earnings.shape, BORDERLINE_CODE, dtype=np.int8)
+    decision[
+        (payment_to_income <= policy.approve_payment_to_income)
+        & (loan_to_earnings <= policy.approve_loan_to_earnings)
+    ] = APPROVE_CODE
+    decision[
+        (payment_to_income >= policy.reject_payment_to_income)
+        | (loan_to_earnings >= policy.reject_loan_to_earnings)
+        | (invalid & ~missing)
+    ] = REJECT_CODE
+    return ScoredBatch(
+        decision=decision,
+        monthly_payment=np.where(invalid, np.nan, payment),
+        payment_to_income=payment_to_income,
+        loan_to_earnings=loan_to_earnings,
+    )
+
+
+_AMOUNT = re.compile(
+    r"(?P<number>\d+(?:[.,]\d+)*)\s*(?P<suffix>k\b|mil\b|m\b|mm\b|millones\b|millón\b|millon\b|million\b)?",
+    re.IGNORECASE,
+)
+_MULTIPLIERS = {
+    "k": 1_000,
+    "mil": 1_000,
+    "m": 1_000_000,
+    "mm": 1_000_000,
+    "millon": 1_000_000,
+    "millón": 1_000_000,
+    "millones": 1_000_000,
+    "million": 1_000_000,
+}
+
+
+def _parse_number(number: str) -> Optional[float]:
+    separators = [char for char in number if char in ".,"]
+    if not separators:
+        return float(number)
+    if len(set(separators)) == 2:
+        # "1,200.50" and "1.200,50": the rightmost separator is the decimal
+        # one and the other groups thousands.
+        decimal = separators[-1]
+        whole, _, fraction = number.rpartition(decimal)
+        groups = re.split(r"[.,]", whole)
+        if whole.count(decimal) or not all(len(group) == 3 for group in groups[1:]):
+            return None
+        return float("".join(groups) + "." + fraction)
+    # "1,200,000" and "1.200.000" are thousands separators; "1.5" and "1,5"
+    # with one group of one or two digits are decimals.
+    groups = re.split(r"[.,]", number)
+    if all(len(group) == 3 for group in groups[1:]):
+        return float("".join(groups))
+    if len(groups) == 2:
+        return float(".".join(groups))
+    return None
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse amounts such as 50000, "$50,000.00", "80k" or "1.2 millones".
+
+    Returns None when no amount can be read from `value`.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = _AMOUNT.search(value)
+    if not match:
+        return None
+    amount = _parse_number(match.group("number"))
+    if amount is None:
+        return None
+    suffix = (match.group("suffix") or "").lower()
+    return amount * _MULTIPLIERS.get(suffix, 1)
+
+
+def parse_business_info(raw: Any) -> Dict[str, Any]:
+    """Decode the introduction agent's output, with or without code fences."""
+    if isinstance(raw, dict):
+        return raw
+    if not isinstance(raw, str):
+        return {}
+    text = raw.strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+_CATEGORY_PATTERNS = {
+    category: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b")
+    for category, words in CATEGORY_KEYWORDS.items()
+}
+
+
+def infer_category(description: Any) -> Optional[str]:
+    """The risk category a free-text business description belongs to, if any."""
+    if not isinstance(description, str):
+        return None
+    folded = _fold(description)
+    return next((category for category, pattern in _CATEGORY_PATTERNS.items() if pattern.search(folded)), None)
+
+
+def score_application(
+    earnings: Optional[float],
+    loan_amount: Optional[float],
+    category: Optional[str] = None,
+    policy: ScoringPolicy = DEFAULT_POLICY,
+) -> LoanScore:
+    """Score one application with the same rules as score_arrays."""
+    if earnings is None or loan_amount is None:
+        return LoanScore(BORDERLINE, "missing earnings or loan amount")
+    if loan_amount <= 0:
+        return LoanScore(REJECT, "no loan amount requested")
+    if earnings <= 0:
+        return LoanScore(REJECT, "no reported earnings")
+
+    risk = policy.category_risk.get(category.strip().lower(), 1.0) if category else 1.0
+    batch = score_arrays([earnings], [loan_amount], risk, policy)
+    decision = str(DECISIONS[batch.decision[0]])
+    reason = {
+        APPROVE: "payment and loan well within the earnings",
+        REJECT: "payment or loan too large for the earnings",
+        BORDERLINE: "ratios between the approve and reject thresholds",
+    }[decision]
+    return LoanScore(
+        decision,
+        reason,
+        monthly_payment=round(float(batch.monthly_payment[0]), 2),
+        payment_to_income=round(float(batch.payment_to_income[0]), 4),
+        loan_to_earnings=round(float(batch.loan_to_earnings[0]), 4),
+    )
+
+
+def score_business_info(raw: Any, policy: ScoringPolicy = DEFAULT_POLICY) -> LoanScore:
+    """Score the introduction agent's output; the category is taken from
+    `business_category` when given, else inferred from the description."""
+    info = parse_business_info(raw)
+    category = info.get("business_category") or infer_category(info.get("business_description"))
+    return score_application(
+        parse_amount(info.get("earnings")),
+        parse_amount(info.get("loan_amount")),
+        category,
+        policy,
+    )
+
+
+def make_prescore_callback(
+    output_key: str = "valid_loan",
+    transfer_to: Optional[str] = None,
+    policy: ScoringPolicy = DEFAULT_POLICY,
+):
+    """Build a before_model_callback that answers clear-cut applications.
+
+    Args:
+        output_key: State key the decision is written to, as the agent's
+            output_key would.
+        transfer_to: Sub-agent to hand over to after deciding, for agents
+            that delegate instead of running inside a SequentialAgent.
+        policy: Scoring thresholds.
+    """
+
+    def prescore_loan(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        score = score_business_info(callback_context.state.get("business_info"), policy)
+        callback_context.state["loan_score"] = asdict(score)
+        if score.decision == BORDERLINE:
+            return None
+
+        callback_context.state[output_key] = score.decision
+        parts = [types.Part(text=score.decision)]
+        if transfer_to:
+            parts.append(
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name="transfer_to_agent", args={"agent_name": transfer_to}
+                    )
+                )
+            )
+        return LlmResponse(content=types.Content(role="model", parts=parts))
+
+    return prescore_loan
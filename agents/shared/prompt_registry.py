@@ -0,0 +1,254 @@
+"""Static prompt prefixes shared across agents, sent through context caching.
+
+Agents that share a persona register it once and build their instruction
+from it plus an agent-specific suffix:
+
+    persona = prompt_registry.register("susana_persona", SUSANA_PERSONA)
+    Agent(
+        ...,
+        instruction=prompt_registry.compose("susana_persona", "Evaluate {business_info} ..."),
+        before_model_callback=[..., prompt_registry.before_model],
+        after_model_callback=prompt_registry.after_model,
+    )
+
+The composed instruction is the full text, so an agent works unchanged when
+caching is off, and the shared prefix always comes first, where the
+provider's implicit prefix caching can reuse it across agents.
+
+On each model call `before_model` finds the registered prefix at the start
+of the system instruction and replaces it with a reference to an explicit
+context cache holding the prefix as its system instruction, keyed by model
+and prefix so every agent with that persona shares it. The provider does not
+accept a system instruction next to cached content, so the rest of the
+instruction (the agent's suffix, state values and the identity lines ADK
+appends) is sent as its own leading user turn, marked as a continuation of
+the system instructions; the user's messages are left untouched.
+
+Requests that carry tools are sent uncached, since tools would have to be
+part of the cache, and so are prefixes below `min_tokens` (default 1024, the
+provider's minimum cache size) or ones the provider refused to cache. Those
+keep their whole instruction as the system instruction, with the prefix
+first, where the provider's implicit prefix caching can still reuse it.
+
+PROMPT_CACHE selects the backend: "gemini" (default), "local" (in-process
+stand-in for tests and benchmarks) or "off". `stats()` reports the hit rate
+and the prompt tokens served from the cache per agent; `python -m
+shared.bench_prompt_cache` measures them on the susana agents with a stub
+model.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# Rough Gemini ratio for mixed Spanish/English text; only used for estimates.
+CHARS_PER_TOKEN = 4
+# Heads the rest of the instruction when the prefix comes from the cache.
+REST_HEADER = "Further system instructions for this conversation:"
+
+logger = logging.getLogger(__name__)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+class LocalContextCache:
+    """In-process stand-in for the provider's context cache."""
+
+    def __init__(self):
+        self.entries: Dict[str, str] = {}
+
+    async def create(self, model: str, key: str, text: str, ttl_seconds: int) -> str:
+        name = f"cachedContents/local-{key}"
+        self.entries[name] = text
+        return name
+
+    def lookup(self, name: str) -> Optional[str]:
+        return self.entries.get(name)
+
+
+class GeminiContextCache:
+    """Explicit context caches created through the google-genai client."""
+
+    def __init__(self, client=None):
+        self._client = client
+
+    async def create(self, model: str, key: str, text: str, ttl_seconds: int) -> str:
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client()
+        cached = await self._client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=f"prompt-prefix-{key}",
+                system_instruction=text,
+                ttl=f"{ttl_seconds}s",
+            ),
+        )
+        return cached.name
+
+
+class PromptRegistry:
+    """Named static prefixes, deduplicated by content, and their caches.
+
+    Args:
+        cache: LocalContextCache, GeminiContextCache or None to disable.
+        ttl_seconds: Lifetime of each provider cache; it is recreated after.
+        min_tokens: Prefixes estimated below this are never cached.
+        retry_seconds: How long a prefix the provider refused stays uncached.
+    """
+
+    def __init__(
+        self,
+        cache=None,
+        ttl_seconds: int = 3600,
+        min_tokens: int = 1024,
+        retry_seconds: float = 600.0,
+    ):
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.retry_seconds = retry_seconds
+        self._prefixes: Dict[str, str] = {}
+        # prefix text -> content key, so equal prefixes share one cache
+        self._keys: Dict[str, str] = {}
+        # (model, key) -> (cache name or None when refused, expires at)
+        self._caches: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def register(self, name: str, text: str) -> str:
+        """Register `text` as the prefix called `name`; returns the normalized text."""
+        text = text.strip()
+        if name in self._prefixes and self._prefixes[name] != text:
+            raise ValueError(f"Prompt prefix '{name}' is already registered with different text.")
+        self._prefixes[name] = text
+        self._keys.setdefault(text, hashlib.sha256(text.encode()).hexdigest()[:16])
+        return text
+
+    def prefix(self, name: str) -> str:
+        return self._prefixes[name]
+
+    def compose(self, name: str, suffix: str = "") -> str:
+        """The full instruction: the registered prefix, then `suffix`."""
+        suffix = suffix.strip()
+        return self._prefixes[name] + ("\n\n" + suffix if suffix else "")
+
+    def _match(self, instruction: str) -> Optional[str]:
+        # The longest registered prefix wins when one extends another.
+        matches = [text for text in self._keys if instruction.startswith(text)]
+        return max(matches, key=len) if matches else None
+
+    async def _cache_name(self, model: str, text: str) -> Tuple[Optional[str], bool]:
+        """The cache holding `text` for `model`, and whether it already existed."""
+        cache_key = (model, self._keys[text])
+        name, expires_at = self._caches.get(cache_key, (None, 0.0))
+        if time.monotonic() < expires_at:
+            return name, True
+        task = self._pending.get(cache_key)
+        if task is None:
+            task = self._pending[cache_key] = asyncio.ensure_future(self._create(cache_key, model, text))
+        try:
+            return await task, False
+        finally:
+            self._pending.pop(cache_key, None)
+
+    async def _create(self, cache_key: Tuple[str, str], model: str, text: str) -> Optional[str]:
+        try:
+            name = await self.cache.create(model, cache_key[1], text, self.ttl_seconds)
+            # Stop using a cache shortly before the provider drops it.
+            self._caches[cache_key] = (name, time.monotonic() + self.ttl_seconds * 0.9)
+            logger.info("prompt prefix cached", extra={"model": model, "cache_name": name})
+        except Exception as e:
+            name = None
+            self._caches[cache_key] = (None, time.monotonic() + self.retry_seconds)
+            logger.warning("prompt prefix not cached: %s", e, extra={"model": model})
+        return name
+
+    async def before_model(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        stats = self._stats[callback_context.agent_name]
+        stats["calls"] += 1
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        text = self._match(instruction) if isinstance(instruction, str) else None
+        if text is None:
+            stats["no_prefix"] += 1
+            return None
+        if self.cache is None or not llm_request.model:
+            stats["disabled"] += 1
+            return None
+        if llm_request.config.tools or _estimate_tokens(text) < self.min_tokens:
+            stats["skipped"] += 1
+            return None
+        stats["prefix_tokens_estimate"] += _estimate_tokens(text)
+
+        name, existed = await self._cache_name(llm_request.model, text)
+        if name is None:
+            stats["refused"] += 1
+            return None
+        stats["hits" if existed else "created"] += 1
+        stats["cached_tokens_estimate"] += _estimate_tokens(text)
+
+        rest = instruction[len(text):].strip()
+        llm_request.config.system_instruction = None
+        llm_request.config.cached_content = name
+        if rest:
+            llm_request.contents = [
+                types.Content(role="user", parts=[types.Part(text=f"{REST_HEADER}\n{rest}")]),
+                *(llm_request.contents or []),
+            ]
+        return None
+
+    def after_model(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        usage = llm_response.usage_metadata
+        if usage is not None and not llm_response.partial:
+            stats = self._stats[callback_context.agent_name]
+            stats["prompt_tokens"] += usage.prompt_token_count or 0
+            stats["cached_tokens"] += usage.cached_content_token_count or 0
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per agent call counts, hit rate over calls with a registered prefix,
+        and the share of prompt tokens the provider served from cache."""
+        report = {}
+        for agent_name, stats in sorted(self._stats.items()):
+            prefixed = stats["calls"] - stats["no_prefix"]
+            report[agent_name] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / prefixed, 3) if prefixed else 0.0,
+                "cached_share": round(stats["cached_tokens"] / stats["prompt_tokens"], 3)
+                if stats["prompt_tokens"]
+                else 0.0,
+            }
+        return report
+
+
+def _default_cache():
+    backend = os.getenv("PROMPT_CACHE", "gemini").lower()
+    if backend == "local":
+        return LocalContextCache()
+    if backend == "off":
+        return None
+    return GeminiContextCache()
+
+
+prompt_registry = PromptRegistry(
+    cache=_default_cache(),
+    ttl_seconds=int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600")),
+    min_tokens=int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024")),
+)
+
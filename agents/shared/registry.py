@@ -0,0 +1,93 @@
+"""Lazy registry of the root agents in this project.
+
+Agents are registered as "module:attribute" paths, so importing the registry
+imports neither google.adk nor any agent package. An agent tree, with its
+heavy dependencies (NumPy, SQLite caches, ADK models and tools), is imported
+and built the first time `get` is called for it, and how long that took is
+kept in `load_seconds`.
+
+    from shared.registry import registry
+    root_agent = registry.get("lending_agent")
+
+`python -m shared.registry` measures the cold import cost of each agent in a
+fresh interpreter.
+"""
+
+import importlib
+import logging
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    def __init__(self):
+        self._targets: Dict[str, str] = {}
+        self._agents: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.load_seconds: Dict[str, float] = {}
+
+    def register(self, name: str, target: str) -> None:
+        """Register `target`, a "package.module:attribute" path, as `name`."""
+        if ":" not in target:
+            raise ValueError(f"Expected 'module:attribute', got '{target}'.")
+        self._targets[name] = target
+
+    def names(self) -> List[str]:
+        return sorted(self._targets)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._agents
+
+    def get(self, name: str) -> Any:
+        """The agent registered as `name`, imported and built on first use."""
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        if name not in self._targets:
+            raise KeyError(f"Unknown agent '{name}'. Registered: {self.names()}.")
+        with self._lock:
+            if name not in self._agents:
+                module_name, _, attribute = self._targets[name].partition(":")
+                start = time.perf_counter()
+                self._agents[name] = getattr(importlib.import_module(module_name), attribute)
+                self.load_seconds[name] = time.perf_counter() - start
+                logger.info(
+                    "agent loaded",
+                    extra={"agent": name, "seconds": round(self.load_seconds[name], 4)},
+                )
+        return self._agents[name]
+
+
+registry = AgentRegistry()
+registry.register("susana", "susana.agent:root_agent")
+registry.register("lending_agent", "lending_agent.agent:root_agent")
+registry.register("solar_panel_agent", "solar_panel_agent.agent:root_agent")
+registry.register("bill_analyzer_agent", "bill_analyzer_agent.agent:root_agent")
+
+
+def _cold_import_seconds(code: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", f"import time; t = time.perf_counter(); {code}; print(time.perf_counter() - t)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """Print the cold-start cost of the registry and of each agent."""
+    print(f"{'target':<22} {'cold import s':>14}")
+    print(f"{'shared.registry':<22} {_cold_import_seconds('import shared.registry'):>14.3f}")
+    for name in registry.names():
+        code = f"from shared.registry import registry; registry.get({name!r})"
+        print(f"{name:<22} {_cold_import_seconds(code):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
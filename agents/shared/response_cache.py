@@ -0,0 +1,232 @@
+"""Exact-match LLM response cache for ADK agents.
+
+Agents opt in by adding the cache's callbacks to their model callbacks:
+
+    Agent(
+        ...,
+        before_model_callback=response_cache.before_model,
+        after_model_callback=response_cache.after_model,
+    )
+
+Agents whose tools have side effects should simply not opt in, or be listed
+in `excluded_agents`. Responses that contain function calls are never cached,
+so a cache hit can never replay a tool call.
+
+Entries are scoped to the user by default (RESPONSE_CACHE_SCOPE: "user",
+"session" or "global"), so one user's answer, which may depend on state the
+key does not cover, is never served to another. The counters from `stats()`
+are logged as "response cache stats" every `log_every` lookups.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?¡¿,;:]+$")
+_LEADING_PUNCTUATION = re.compile(r"^[\s¡¿]+")
+SCOPES = ("user", "session", "global")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, collapse whitespace and drop punctuation at the edges."""
+    text = _WHITESPACE.sub(" ", text.lower()).strip()
+    text = _LEADING_PUNCTUATION.sub("", text)
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def _instruction_text(instruction: Any) -> str:
+    if instruction is None:
+        return ""
+    if isinstance(instruction, types.Content):
+        return " ".join(part.text or "" for part in instruction.parts or [])
+    return str(instruction)
+
+
+def _content_key(content: types.Content) -> list:
+    parts = []
+    for part in content.parts or []:
+        if part.text:
+            parts.append(normalize_text(part.text))
+        elif part.function_call:
+            parts.append(["call", part.function_call.name, part.function_call.args])
+        elif part.function_response:
+            parts.append(["response", part.function_response.name, part.function_response.response])
+    return [content.role, parts]
+
+
+def _has_function_call(llm_response: LlmResponse) -> bool:
+    if not llm_response.content or not llm_response.content.parts:
+        return False
+    return any(part.function_call for part in llm_response.content.parts)
+
+
+class ResponseCache:
+    """TTL + LRU cache of final model responses.
+
+    The key is built from the agent name, the normalized system instruction
+    (ADK has already substituted state placeholders such as
+    `{business_info}` into it), the last `history_contents` request contents,
+    the values of `state_keys` and the user or session id per `scope`.
+
+    Args:
+        ttl_seconds: How long a response stays valid.
+        max_entries: Least recently used entries are evicted past this size.
+        history_contents: How many trailing request contents go into the key.
+        state_keys: Session state keys whose values are part of the key.
+        excluded_agents: Agents that never read from or write to the cache.
+        scope: "user" or "session" to share entries only within one user or
+            session, "global" to share them across all users.
+        log_every: Log the counters every this many lookups; 0 disables it.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 1024,
+        history_contents: int = 4,
+        state_keys: Iterable[str] = (),
+        excluded_agents: Iterable[str] = (),
+        scope: str = "user",
+        log_every: int = 500,
+    ):
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown response cache scope '{scope}'. Expected one of {SCOPES}.")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.history_contents = history_contents
+        self.state_keys = tuple(state_keys)
+        self.excluded_agents = set(excluded_agents)
+        self.scope = scope
+        self.log_every = log_every
+        self._lookups = 0
+        self._entries: "OrderedDict[str, tuple[float, LlmResponse]]" = OrderedDict()
+        # Keys of the requests that missed, waiting for their response.
+        self._pending: "OrderedDict[tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        )
+
+    def _scope_id(self, callback_context: CallbackContext) -> Optional[str]:
+        if self.scope == "global":
+            return None
+        session = getattr(getattr(callback_context, "_invocation_context", None), "session", None)
+        return getattr(session, "user_id" if self.scope == "user" else "id", None)
+
+    def make_key(
+        self, agent_name: str, llm_request: LlmRequest, state: Any, scope_id: Optional[str] = None
+    ) -> str:
+        contents = llm_request.contents[-self.history_contents:] if self.history_contents else []
+        payload = {
+            "agent": agent_name,
+            "scope": scope_id,
+            "instruction": normalize_text(_instruction_text(llm_request.config.system_instruction)),
+            "contents": [_content_key(content) for content in contents],
+            "state": {key: state.get(key) for key in self.state_keys},
+        }
+        raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def before_model(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        """Return a cached response, or remember the key of this miss."""
+        agent_name = callback_context.agent_name
+        if agent_name in self.excluded_agents:
+            return None
+        key = self.make_key(agent_name, llm_request, callback_context.state, self._scope_id(callback_context))
+        now = time.monotonic()
+        response = None
+        with self._lock:
+            self._lookups += 1
+            report = self.log_every and self._lookups % self.log_every == 0
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats[agent_name]["hits"] += 1
+                response = entry[1].model_copy(deep=True)
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                    self._stats[agent_name]["expired"] += 1
+                self._stats[agent_name]["misses"] += 1
+                self._pending[(callback_context.invocation_id, agent_name)] = key
+                # Requests that failed never reach after_model; keep this bounded.
+                while len(self._pending) > self.max_entries:
+                    self._pending.popitem(last=False)
+        if report:
+            self.log_stats()
+        return response
+
+    def after_model(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        """Store the final response of a request that missed."""
+        if llm_response.partial:
+            return None
+        agent_name = callback_context.agent_name
+        with self._lock:
+            key = self._pending.pop((callback_context.invocation_id, agent_name), None)
+            if (
+                key is None
+                or llm_response.error_code
+                or not llm_response.content
+                or _has_function_call(llm_response)
+            ):
+                return None
+            self._entries[key] = (
+                time.monotonic() + self.ttl_seconds,
+                llm_response.model_copy(deep=True),
+            )
+            self._entries.move_to_end(key)
+            self._stats[agent_name]["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats[agent_name]["evictions"] += 1
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters and hit rate per agent."""
+        with self._lock:
+            report = {}
+            for agent_name, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                report[agent_name] = {
+                    **counters,
+                    "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+                }
+            return report
+
+    def log_stats(self) -> None:
+        for agent_name, counters in self.stats().items():
+            logger.info(
+                "response cache stats",
+                extra={"agent_name": agent_name, **counters, "hit_rate": round(counters["hit_rate"], 3)},
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+
+response_cache = ResponseCache(
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+    scope=os.getenv("RESPONSE_CACHE_SCOPE", "user"),
+    log_every=int(os.getenv("RESPONSE_CACHE_LOG_EVERY", "500")),
+)
@@ -0,0 +1,252 @@
+"""Web search shared by the agent packages, behind a persistent TTL cache.
+
+`search_web` replaces the per-package `AgentTool(Agent_Search)`: it runs the
+single SearchAgent defined here only when the normalized query is not in the
+cache. Entries are stored in SQLite so they survive restarts and are shared
+by every process on the machine. The database is opened on the first search,
+at SEARCH_CACHE_PATH (default: search_cache.db under $XDG_CACHE_HOME/agents,
+i.e. ~/.cache/agents), never in the working directory at import time.
+
+Freshness: an entry younger than `ttl_seconds` is served directly. Up to
+`stale_seconds` after that it is still served, while a background task
+refreshes it (stale-while-revalidate). Older entries are fetched again.
+Empty results are returned but never stored.
+
+Set SEARCH_BACKEND=stub to answer from SEARCH_STUB_PATH (a JSON object
+mapping queries to results) instead of Gemini, e.g. for offline tests.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from google.adk.agents import Agent
+from google.adk.runners import InMemoryRunner
+from google.adk.tools import google_search
+from google.genai import types
+
+Agent_Search = Agent(
+    model='gemini-2.0-flash-exp',
+    name='SearchAgent',
+    instruction="""
+    You're a specialist in Google Search
+    """,
+    tools=[google_search]
+)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive cache key."""
+    text = unicodedata.normalize("NFKD", query.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+class AgentSearchBackend:
+    """Answers queries by running SearchAgent in its own throwaway session."""
+
+    def __init__(self, agent: Agent = Agent_Search):
+        self._runner = InMemoryRunner(agent=agent, app_name="search_cache")
+
+    async def search(self, query: str) -> str:
+        session = await self._runner.session_service.create_session(
+            app_name="search_cache", user_id="search_cache"
+        )
+        text = ""
+        async for event in self._runner.run_async(
+            user_id="search_cache",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text=query)]),
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                text += "".join(part.text or "" for part in event.content.parts)
+        await self._runner.session_service.delete_session(
+            app_name="search_cache", user_id="search_cache", session_id=session.id
+        )
+        return text
+
+
+class StubSearchBackend:
+    """Offline backend with canned results, keyed by normalized query."""
+
+    def __init__(self, results: Optional[Dict[str, str]] = None):
+        self.results = {normalize_query(query): text for query, text in (results or {}).items()}
+        self.calls = 0
+
+    @classmethod
+    def from_json(cls, path: str) -> "StubSearchBackend":
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle))
+
+    async def search(self, query: str) -> str:
+        self.calls += 1
+        return self.results.get(normalize_query(query), f"No stub result for: {query}")
+
+
+class SearchCache:
+    """SQLite-backed search result cache with TTL, LRU bound and SWR."""
+
+    def __init__(
+        self,
+        backend,
+        path: str = ":memory:",
+        ttl_seconds: float = 6 * 60 * 60,
+        stale_seconds: float = 24 * 60 * 60,
+        max_entries: int = 5000,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS search_results ("
+            " query TEXT PRIMARY KEY, result TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS search_results_last_access"
+            " ON search_results (last_access)"
+        )
+        self._lock = threading.Lock()
+        # One fetch per key at a time, shared by concurrent callers.
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background: set = set()
+
+    def _read(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, fetched_at FROM search_results WHERE query = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                with self._db:
+                    self._db.execute(
+                        "UPDATE search_results SET last_access = ? WHERE query = ?",
+                        (time.time(), key),
+                    )
+            return row
+
+    def _write(self, key: str, result: str) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?)",
+                (key, result, now, now),
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM search_results").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM search_results WHERE query IN ("
+                    " SELECT query FROM search_results ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats["evictions"] += overflow
+
+    async def _fetch(self, key: str, query: str) -> str:
+        task = self._inflight.get(key)
+        if task is None:
+            # The fetch runs in its own task, so a caller that is cancelled
+            # does not cancel it for the others waiting on the same key.
+            task = asyncio.get_running_loop().create_task(self._search(key, query))
+            self._inflight[key] = task
+            # Mark the exception as retrieved when nobody else awaited it.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(task)
+
+    async def _search(self, key: str, query: str) -> str:
+        try:
+            result = await self.backend.search(query)
+            if result and result.strip():
+                self._write(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _refresh(self, key: str, query: str) -> None:
+        self.stats["refreshes"] += 1
+        try:
+            await self._fetch(key, query)
+        except Exception:
+            # The stale entry keeps being served until a refresh succeeds.
+            pass
+
+    async def get(self, query: str) -> str:
+        key = normalize_query(query)
+        row = self._read(key)
+        if row is not None:
+            result, fetched_at = row
+            age = time.time() - fetched_at
+            if age < self.ttl_seconds:
+                self.stats["hits"] += 1
+                return result
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    task = asyncio.get_running_loop().create_task(self._refresh(key, query))
+                    self._background.add(task)
+                    task.add_done_callback(self._background.discard)
+                return result
+        self.stats["misses"] += 1
+        return await self._fetch(key, query)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _default_backend():
+    if os.getenv("SEARCH_BACKEND") == "stub":
+        stub_path = os.getenv("SEARCH_STUB_PATH")
+        return StubSearchBackend.from_json(stub_path) if stub_path else StubSearchBackend()
+    return AgentSearchBackend()
+
+
+def default_cache_path() -> str:
+    path = os.getenv("SEARCH_CACHE_PATH")
+    if path:
+        return path
+    cache_home = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return str(cache_home / "agents" / "search_cache.db")
+
+
+@lru_cache(maxsize=1)
+def get_search_cache() -> SearchCache:
+    """The process-wide cache, opened on first use."""
+    path = default_cache_path()
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return SearchCache(
+        _default_backend(),
+        path=path,
+        ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(6 * 60 * 60))),
+        stale_seconds=float(os.getenv("SEARCH_CACHE_STALE_SECONDS", str(24 * 60 * 60))),
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+    )
+
+
+async def search_web(query: str) -> dict:
+    """Searches Google for up-to-date information, e.g. efficient appliance models.
+
+    Args:
+        query: What to search for.
+
+    Returns:
+        dict: status and the search result text.
+    """
+    try:
+        return {"status": "success", "result": await get_search_cache().get(query)}
+    except Exception as e:
+        return {"status": "error", "error_message": f"Search failed: {str(e)}"}
@@ -0,0 +1,265 @@
+"""Deterministic slot filling for the loan introduction agents.
+
+Pulls earnings, loan_amount and business_description out of Spanish or
+English user messages ("ganamos 80k al mes", "necesito 50 mil pesos",
+"we run a bakery", "$1.2M") and keeps them in session state. Earnings are
+stored per month: an amount stated per year, week or day is converted, and
+one with no period is left for the model to ask about unless the model had
+just asked for earnings (per month). Until every
+slot is filled the model is told which slots are already known so it only
+asks for the rest. Once they are, the model reads the values back to the
+user; the `business_info` JSON is produced locally when the user confirms,
+and values given while confirming replace the collected ones.
+
+    before_model_callback=[make_slot_filling_callback(), ...]
+"""
+
+import json
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from shared.loan_scoring import parse_amount
+
+SLOTS = ("earnings", "loan_amount", "business_description")
+STATE_KEY = "business_slots"
+# Set while the model is asking the user to confirm the collected slots.
+CONFIRM_KEY = "business_slots_confirming"
+
+_AMOUNT = re.compile(
+    r"(?:\$\s*)?\d+(?:[.,]\d+)*\s*(?:k\b|mil\b|mm\b|m\b|millones\b|millon\b|million\b)?"
+    r"(?:\s*(?:pesos|mxn|dolares|usd|dollars)\b)?",
+    re.IGNORECASE,
+)
+# Where a clause ends; an amount is classified by the words of its own clause.
+_CLAUSE_BREAK = re.compile(r"[,.;:!?\n]|\b(?:y|e|pero|and|but)\b")
+# Stems are matched against accent-free, lower-case text.
+_EARNINGS_WORDS = (
+    "gan", "ingres", "vend", "factur", "utilidad", "al mes", "mensual", "por mes", "al ano", "anual",
+    "earn", "revenue", "income", "make", "sales", "per month", "a month", "monthly", "per year", "a year",
+)
+# Period words in an earnings clause and the factor that makes the amount monthly.
+_PERIODS = (
+    (re.compile(r"\b(?:(?:al|por|cada) mes|mensual(?:es|mente)?|(?:a|per|every) month|monthly)\b"), 1.0),
+    (re.compile(r"\b(?:(?:al|por|cada) ano|anual(?:es|mente)?|(?:a|per|every) year|yearly|annual(?:ly)?)\b"), 1 / 12),
+    (re.compile(r"\b(?:(?:a la|por|cada) semana|semanal(?:es|mente)?|(?:a|per|every) week|weekly)\b"), 52 / 12),
+    (re.compile(r"\b(?:(?:al|por|cada) dia|diari[oa]s?|diariamente|(?:a|per|every) day|daily)\b"), 30.0),
+)
+_LOAN_WORDS = (
+    "necesit", "prest", "credit", "financ", "solicit", "pedir", "requier",
+    "loan", "borrow", "need", "request",
+)
+# A bare 19xx/20xx next to one of these words is a year, not an amount.
+_YEAR = re.compile(r"(?:19|20)\d\d")
+_YEAR_WORDS = re.compile(r"\b(?:desde|en|del|de|ano|anos|hace|since|in|from|year|until|hasta)\s*$")
+# Things that are counted rather than paid: "3 sucursales", "12 employees".
+_COUNT_NOUN = re.compile(
+    r"\s*(?:sucursal|tienda|local|empleado|trabajador|persona|cliente|socio|ano|mes|semana|dia|"
+    r"hijo|camion|unidad|maquina|mesa|branch|store|location|employee|worker|people|person|"
+    r"customer|partner|year|month|week|day|truck|unit|machine|table)(?:s|es)?\b"
+)
+_BUSINESS_NOUNS = (
+    "negocio", "empresa", "compania", "tienda", "abarrote", "panaderia", "pasteleria", "tortilleria",
+    "taqueria", "restaurante", "fonda", "cocina", "cafeteria", "cafe", "taller", "farmacia",
+    "papeleria", "ferreteria", "carniceria", "estetica", "salon", "lavanderia", "consultorio",
+    "clinica", "despacho", "consultoria", "agencia", "fabrica", "granja", "rancho", "huerto",
+    "local", "puesto", "escuela", "hotel", "boutique", "constructora", "distribuidora",
+    "business", "company", "shop", "store", "bakery", "restaurant", "diner", "workshop",
+    "pharmacy", "laundry", "clinic", "agency", "factory", "farm", "firm", "studio",
+    "startup", "school", "practice",
+)
+_BUSINESS_NOUN = re.compile(r"\b(?:" + "|".join(_BUSINESS_NOUNS) + r")")
+# The generic "tengo una ..." forms only count when a business noun follows
+# within a few words; the others name the business by construction.
+_DESCRIPTION_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), needs_noun)
+    for pattern, needs_noun in (
+        (r"(?:mi|nuestro|el)\s+negocio\s+(?:es|se dedica a)\s+(?P<text>[^.;!?\n]+)", False),
+        (r"nos dedicamos a\s+(?P<text>[^.;!?\n]+)", False),
+        (r"me dedico a\s+(?P<text>[^.;!?\n]+)", False),
+        (r"(?:tengo|tenemos|somos|manejo|administro|operamos)\s+(?P<text>(?:un|una)\s+[^.;!?\n]+)", True),
+        (r"(?:my|our)\s+business\s+is\s+(?P<text>[^.;!?\n]+)", False),
+        (r"(?:i|we)\s+(?:run|own|have|operate|manage)\s+(?P<text>(?:a|an)\s+[^.;!?\n]+)", True),
+        (r"(?:we|i)\s+(?:are|am)\s+(?P<text>(?:a|an)\s+[^.;!?\n]+)", True),
+    )
+]
+# A description ends where the message moves on to talk about money, or to
+# when or how the business runs.
+_DESCRIPTION_END = re.compile(
+    r"\s*(?:,|\by\b|\band\b|\bque\b|\bthat\b)?\s*"
+    r"(?:\b(?:gan|ingres|vend|factur|necesit|earn|make|need|borrow)\w*|\b(?:desde|hace|since|for|con|with)\b|\$|\d).*$",
+    re.IGNORECASE,
+)
+_AFFIRMATIVE = re.compile(
+    r"\b(?:si|correcto|exacto|asi es|confirmo|claro|de acuerdo|perfecto|esta bien|ok|okay|"
+    r"yes|yep|correct|right|confirmed|that's right)\b"
+)
+_NEGATIVE = re.compile(r"\b(?:no|incorrecto|wrong|nope)\b")
+_RESTART = re.compile(
+    r"\b(?:empezar de nuevo|empecemos de nuevo|volver a empezar|comenzar de nuevo|reiniciar|"
+    r"nueva solicitud|otra solicitud|start over|restart|new application)\b"
+)
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def _classify(context: str) -> Optional[str]:
+    """Which amount slot the words around an amount point to, if any."""
+    earnings = max((context.rfind(word) for word in _EARNINGS_WORDS), default=-1)
+    loan = max((context.rfind(word) for word in _LOAN_WORDS), default=-1)
+    if earnings == loan == -1:
+        return None
+    return "earnings" if earnings > loan else "loan_amount"
+
+
+def _monthly_factor(clause: str) -> Optional[float]:
+    """What turns an amount stated in `clause` into a monthly one, if a period is given."""
+    return next((factor for pattern, factor in _PERIODS if pattern.search(clause)), None)
+
+
+def _is_year(amount_text: str, before: str) -> bool:
+    return bool(_YEAR.fullmatch(amount_text.strip())) and bool(_YEAR_WORDS.search(before))
+
+
+def extract_business_info(
+    text: str, pending_slot: Optional[str] = None
+) -> Dict[str, Any]:
+    """Extract whatever slots `text` resolves.
+
+    Args:
+        text: One user message.
+        pending_slot: The amount slot the previous question asked for; a bare
+            amount with no keywords in its clause is assigned to it.
+    """
+    found: Dict[str, Any] = {}
+    folded = _fold(text)
+    for match in _AMOUNT.finditer(folded):
+        # The clause holding the amount decides its slot: the words leading
+        # up to it first, then the ones right after it ("al mes").
+        before = _CLAUSE_BREAK.split(folded[: match.start()])[-1]
+        rest = folded[match.end():]
+        after = _CLAUSE_BREAK.split(rest, maxsplit=1)[0]
+        if _is_year(match.group(0), before) or _COUNT_NOUN.match(rest):
+            continue
+        amount = parse_amount(match.group(0).replace("$", ""))
+        if amount is None:
+            continue
+        slot = _classify(before) or _classify(after) or pending_slot
+        if slot == "earnings":
+            factor = _monthly_factor(f"{before} {after}")
+            if factor is None and pending_slot != "earnings":
+                # "ganamos 1.5 millones" could be per month or per year.
+                continue
+            amount = round(amount * (factor or 1.0), 2)
+        if slot and slot not in found:
+            found[slot] = amount
+
+    for pattern, needs_noun in _DESCRIPTION_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        description = _DESCRIPTION_END.sub("", match.group("text")).strip(" ,")
+        if needs_noun and not _BUSINESS_NOUN.search(" ".join(_fold(description).split()[:4])):
+            continue
+        if len(description) >= 3:
+            found["business_description"] = description[:160]
+            break
+    return found
+
+
+def is_confirmation(text: str) -> bool:
+    """Whether a reply accepts what was read back to the user."""
+    folded = _fold(text)
+    return bool(_AFFIRMATIVE.search(folded)) and not _NEGATIVE.search(folded)
+
+
+def is_restart(text: str) -> bool:
+    """Whether the user asks to start a new application."""
+    return bool(_RESTART.search(_fold(text)))
+
+
+def _last_model_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents or []):
+        if content.role == "model" and content.parts:
+            return " ".join(part.text or "" for part in content.parts)
+    return ""
+
+
+def make_slot_filling_callback(
+    output_key: str = "business_info",
+    transfer_to: Optional[str] = None,
+):
+    """Build a before_model_callback that fills the business_info slots.
+
+    Args:
+        output_key: State key the completed JSON is written to, as the
+            agent's output_key would.
+        transfer_to: Sub-agent to hand over to once the user confirmed the
+            slots, for agents that delegate instead of running in a
+            SequentialAgent.
+    """
+
+    def fill_business_slots(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        slots = dict(callback_context.state.get(STATE_KEY) or {})
+        confirming = bool(callback_context.state.get(CONFIRM_KEY))
+        user_content = callback_context.user_content
+        message = " ".join(
+            part.text or "" for part in (user_content.parts if user_content else None) or []
+        )
+        extracted: Dict[str, Any] = {}
+        if message:
+            missing_amounts = [slot for slot in ("earnings", "loan_amount") if slot not in slots]
+            pending = _classify(_fold(_last_model_text(llm_request)))
+            if pending not in missing_amounts:
+                pending = missing_amounts[0] if len(missing_amounts) == 1 else None
+            extracted = extract_business_info(message, pending)
+            if confirming:
+                # Values given while confirming are corrections.
+                slots.update(extracted)
+            else:
+                for slot, value in extracted.items():
+                    slots.setdefault(slot, value)
+            callback_context.state[STATE_KEY] = slots
+
+        if confirming and not extracted and is_confirmation(message):
+            callback_context.state[CONFIRM_KEY] = False
+            business_info = json.dumps({slot: slots[slot] for slot in SLOTS}, ensure_ascii=False)
+            callback_context.state[output_key] = business_info
+            parts = [types.Part(text=business_info)]
+            if transfer_to:
+                parts.append(
+                    types.Part(
+                        function_call=types.FunctionCall(
+                            name="transfer_to_agent", args={"agent_name": transfer_to}
+                        )
+                    )
+                )
+            return LlmResponse(content=types.Content(role="model", parts=parts))
+
+        known = ", ".join(f"{slot}={slots[slot]}" for slot in SLOTS if slot in slots)
+        if all(slot in slots for slot in SLOTS):
+            callback_context.state[CONFIRM_KEY] = True
+            llm_request.append_instructions(
+                [
+                    f"Collected from the user: {known}. Do not output the JSON yet: read these "
+                    "values back to the user in one short message and ask them to confirm or correct them."
+                ]
+            )
+        elif slots:
+            missing = ", ".join(slot for slot in SLOTS if slot not in slots)
+            llm_request.append_instructions(
+                [f"Already collected from the user: {known}. Only ask for: {missing}."]
+            )
+        return None
+
+    return fill_business_slots
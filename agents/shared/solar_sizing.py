@@ -0,0 +1,174 @@
+"""Solar panel sizing, the same math as frontend/src/utils/energyAnalysis.ts.
+
+`size_arrays` broadcasts over consumptions, panel counts and tariffs so many
+scenarios are evaluated in one NumPy pass; `calculate_solar_sizing` wraps it
+as a tool so agents get exact numbers instead of doing the arithmetic
+themselves.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# CFE average tariffs in MXN per kWh.
+CFE_RATES = {
+    "basic": 0.801,
+    "intermediate": 1.093,
+    "high": 3.043,  # DAC, high consumption
+}
+BASIC_LIMIT_KWH = 300
+INTERMEDIATE_LIMIT_KWH = 600
+
+PANEL_WATTAGE = 450
+PANEL_EFFICIENCY = 0.85
+SUN_HOURS_PER_DAY = 5.5
+DAYS_PER_MONTH = 30
+COST_PER_PANEL = 4500  # MXN, installed
+PANEL_AREA_M2 = 2.2  # footprint of a standard 450 W panel
+SURPLUS_SELL_RATIO = 0.5  # surplus is sold back to CFE at half the tariff
+CO2_KG_PER_KWH = 0.5
+
+PANEL_MONTHLY_KWH = (
+    PANEL_WATTAGE * SUN_HOURS_PER_DAY * DAYS_PER_MONTH * PANEL_EFFICIENCY / 1000
+)
+MAX_SCENARIOS = 200
+
+
+def cfe_rate(monthly_kwh: Any) -> np.ndarray:
+    """Applicable CFE tariff for each monthly consumption."""
+    monthly_kwh = np.asarray(monthly_kwh, dtype=np.float64)
+    return np.select(
+        [monthly_kwh <= BASIC_LIMIT_KWH, monthly_kwh <= INTERMEDIATE_LIMIT_KWH],
+        [CFE_RATES["basic"], CFE_RATES["intermediate"]],
+        CFE_RATES["high"],
+    )
+
+
+def required_panels(monthly_kwh: Any) -> np.ndarray:
+    """Panels needed to cover each monthly consumption."""
+    return np.ceil(np.asarray(monthly_kwh, dtype=np.float64) / PANEL_MONTHLY_KWH).astype(np.int64)
+
+
+def size_arrays(
+    monthly_kwh: Any,
+    panels: Any = None,
+    rate: Any = None,
+) -> Dict[str, np.ndarray]:
+    """Sizing figures for every broadcast combination of the inputs.
+
+    Args:
+        monthly_kwh: Monthly consumption in kWh.
+        panels: Installed panel count, positive; defaults to required_panels.
+        rate: Tariff in MXN/kWh; defaults to the CFE tier of the consumption.
+
+    Savings count the consumption covered by the panels at the full tariff
+    plus any surplus sold at SURPLUS_SELL_RATIO of it, which matches the
+    frontend whenever the panels cover the whole consumption.
+    """
+    monthly_kwh = np.asarray(monthly_kwh, dtype=np.float64)
+    if panels is None:
+        panels = required_panels(monthly_kwh)
+    else:
+        panels = np.asarray(panels, dtype=np.int64)
+        if np.any(panels <= 0):
+            raise ValueError("Panel counts must be positive.")
+    rate = cfe_rate(monthly_kwh) if rate is None else np.asarray(rate, dtype=np.float64)
+
+    production = panels * PANEL_MONTHLY_KWH
+    surplus = production - monthly_kwh
+    covered = np.minimum(production, monthly_kwh)
+    monthly_cost = monthly_kwh * rate
+    monthly_savings = covered * rate + np.maximum(surplus, 0) * rate * SURPLUS_SELL_RATIO
+    yearly_savings = monthly_savings * 12
+    investment = panels * COST_PER_PANEL
+    with np.errstate(divide="ignore", invalid="ignore"):
+        break_even_years = np.where(yearly_savings > 0, investment / yearly_savings, np.inf)
+
+    figures = {
+        "monthly_consumption_kwh": monthly_kwh,
+        "panels": panels,
+        "rate_mxn_per_kwh": rate,
+        "monthly_cost_mxn": monthly_cost,
+        "panel_production_kwh": production,
+        "surplus_kwh": surplus,
+        "monthly_savings_mxn": monthly_savings,
+        "yearly_savings_mxn": yearly_savings,
+        "investment_mxn": investment,
+        "break_even_years": break_even_years,
+        "carbon_offset_kg_per_year": production * 12 * CO2_KG_PER_KWH,
+        "area_m2": panels * PANEL_AREA_M2,
+    }
+    shape = np.broadcast_shapes(*(values.shape for values in figures.values()))
+    return {name: np.broadcast_to(values, shape) for name, values in figures.items()}
+
+
+def _rounded(value: float, digits: int = 1) -> Any:
+    if not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def calculate_solar_sizing(
+    monthly_kwh: float,
+    available_m2: Optional[float] = None,
+    panel_counts: Optional[List[int]] = None,
+    tariffs: Optional[List[str]] = None,
+) -> dict:
+    """Calculates solar panel sizing, savings, break-even and CO2 offset.
+
+    Use this tool instead of doing any panel or savings arithmetic yourself.
+
+    Args:
+        monthly_kwh: The user's average monthly electricity consumption in kWh.
+        available_m2: The space available for panels in m2, if known.
+        panel_counts: Optional panel counts to compare. Defaults to the count
+            that covers the whole consumption.
+        tariffs: Optional CFE tariffs to compare: "basic", "intermediate" or
+            "high". Defaults to the tier that matches the consumption.
+
+    Returns:
+        dict: status, the recommended installation and one entry per
+        panel-count and tariff scenario.
+    """
+    if monthly_kwh is None or monthly_kwh <= 0:
+        return {"status": "error", "error_message": "monthly_kwh must be a positive number."}
+
+    recommended = int(required_panels(monthly_kwh))
+    max_panels = int(available_m2 // PANEL_AREA_M2) if available_m2 is not None else None
+    counts = np.array(panel_counts or [recommended], dtype=np.int64)
+    tariff_names = tariffs or ["auto"]
+    unknown = [name for name in tariff_names if name != "auto" and name not in CFE_RATES]
+    if unknown:
+        return {
+            "status": "error",
+            "error_message": f"Unknown tariffs {unknown}; use one of {sorted(CFE_RATES)}.",
+        }
+    if np.any(counts <= 0):
+        return {"status": "error", "error_message": "panel_counts must be positive numbers."}
+    if len(counts) * len(tariff_names) > MAX_SCENARIOS:
+        return {
+            "status": "error",
+            "error_message": f"Too many scenarios; at most {MAX_SCENARIOS} per call.",
+        }
+
+    auto_rate = float(cfe_rate(monthly_kwh))
+    rates = np.array([auto_rate if name == "auto" else CFE_RATES[name] for name in tariff_names])
+    # Panels along the first axis, tariffs along the second.
+    figures = size_arrays(monthly_kwh, counts[:, None], rates[None, :])
+
+    scenarios = []
+    for i, count in enumerate(counts):
+        for j, tariff in enumerate(tariff_names):
+            scenario = {"tariff": tariff, "panels": int(count)}
+            for name, values in figures.items():
+                if name != "panels":
+                    scenario[name] = _rounded(values[i, j], 3 if name == "rate_mxn_per_kwh" else 1)
+            scenario["fits_available_space"] = max_panels is None or int(count) <= max_panels
+            scenarios.append(scenario)
+
+    return {
+        "status": "success",
+        "recommended_panels": recommended,
+        "max_panels_for_space": max_panels,
+        "scenarios": scenarios,
+    }
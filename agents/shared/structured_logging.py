@@ -0,0 +1,148 @@
+"""JSON logging through a background queue, with per-module levels and sampling.
+
+Records are put on an in-memory queue by the calling thread and formatted and
+written to stderr by a QueueListener thread, so request handlers never block on
+stdout. Every record is one JSON object; `log_context` adds session_id,
+agent_name and invocation_id from an ADK callback or tool context:
+
+    logger.debug("tool called", extra={**log_context(tool_context), "city": city})
+
+Levels: LOG_LEVEL sets the default and LOG_LEVELS overrides it per logger,
+e.g. "agent=DEBUG,shared.search=WARNING". Records below WARNING are sampled
+per call site: each (logger, message) pair may emit LOG_SAMPLE_BURST records
+and then LOG_SAMPLE_RATE per second; the next emitted record carries the
+number suppressed in between.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+_RECORD_FIELDS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+_configured: set = set()
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Token bucket per call site for records below WARNING."""
+
+    def __init__(self, rate_per_second: float = 10.0, burst: int = 20):
+        super().__init__()
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        # (logger, msg) -> [tokens, last refill, suppressed since last emit]
+        self._buckets: Dict[Tuple[str, Any], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.setdefault((record.name, record.msg), [float(self.burst), now, 0])
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class _BackgroundQueueHandler(QueueHandler):
+    """Keeps message and traceback apart so the listener can emit them as JSON."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(*namespaces: str, stream=None) -> None:
+    """Route the given logger namespaces through the background JSON handler.
+
+    Safe to call from several modules; each namespace is set up once and
+    stops propagating, so host frameworks that log to the root logger do not
+    print the same record twice.
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is None:
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            output = logging.StreamHandler(stream or sys.stderr)
+            output.setFormatter(JsonFormatter())
+            _listener = QueueListener(records, output, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+            _handler = _BackgroundQueueHandler(records)
+            _handler.addFilter(
+                SamplingFilter(
+                    rate_per_second=float(os.getenv("LOG_SAMPLE_RATE", "10")),
+                    burst=int(os.getenv("LOG_SAMPLE_BURST", "20")),
+                )
+            )
+        default_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        for namespace in namespaces:
+            if namespace in _configured:
+                continue
+            logger = logging.getLogger(namespace)
+            logger.addHandler(_handler)
+            logger.setLevel(default_level)
+            logger.propagate = False
+            _configured.add(namespace)
+        for name, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(level)
+
+
+def log_context(context: Any) -> Dict[str, Any]:
+    """session_id, agent_name and invocation_id of a callback or tool context."""
+    invocation = getattr(context, "_invocation_context", None)
+    session = getattr(invocation, "session", None)
+    return {
+        "session_id": getattr(session, "id", None),
+        "agent_name": getattr(context, "agent_name", None),
+        "invocation_id": getattr(context, "invocation_id", None),
+    }
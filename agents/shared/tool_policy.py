@@ -0,0 +1,184 @@
+"""Table-driven allow/deny policy for tool arguments (before_tool_callback).
+
+Rules come from tool_policies.json (or TOOL_POLICY_PATH):
+
+    {"tools": {"get_weather_stateful": {
+        "deny": {"city": ["paris"]},
+        "message": "Weather checks for '{value}' are currently disabled."}}}
+
+Per tool, "deny" lists blocked values of an argument, "allow" lists the only
+values accepted, and "enabled": false blocks the tool outright. Values are
+compared case- and accent-insensitively. Rules are compiled into a dict keyed
+by tool name holding frozensets, so a call to an unconstrained tool costs one
+dict lookup and a constrained argument one set membership test.
+
+The file is re-read when its mtime changes, checked at most every
+`reload_interval` seconds, so policies change without a restart. A broken
+file is reported in `stats` and the previous tables stay active. The
+decision counts and `hit_rates()` are logged as "tool policy stats" every
+`log_every` evaluations (TOOL_POLICY_LOG_EVERY).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Optional
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from shared.structured_logging import log_context
+
+logger = logging.getLogger(__name__)
+
+POLICY_PATH = Path(__file__).with_name("tool_policies.json")
+DEFAULT_MESSAGE = "Policy restriction: '{tool}' is not allowed with {arg}='{value}'."
+
+
+def normalize_value(value: Any) -> str:
+    text = unicodedata.normalize("NFKD", str(value).lower())
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).split())
+
+
+@dataclass(frozen=True)
+class ToolRule:
+    enabled: bool
+    deny: Dict[str, FrozenSet[str]]
+    allow: Dict[str, FrozenSet[str]]
+    message: str
+
+
+def compile_policies(config: dict) -> Dict[str, ToolRule]:
+    tables = {}
+    for tool_name, rule in config.get("tools", {}).items():
+        tables[tool_name] = ToolRule(
+            enabled=rule.get("enabled", True),
+            deny={arg: frozenset(map(normalize_value, values)) for arg, values in rule.get("deny", {}).items()},
+            allow={arg: frozenset(map(normalize_value, values)) for arg, values in rule.get("allow", {}).items()},
+            message=rule.get("message", DEFAULT_MESSAGE),
+        )
+    return tables
+
+
+class ToolPolicy:
+    """Evaluates tool calls against the compiled tables and counts decisions."""
+
+    def __init__(self, path: Path = POLICY_PATH, reload_interval: float = 2.0, log_every: int = 500):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self.log_every = log_every
+        self.evaluations = 0
+        # (tool, decision) -> count, decision being "allow" or "deny:<arg>".
+        self.decisions: Counter = Counter()
+        self.stats = {"reloads": 0, "reload_errors": 0}
+        self._tables: Dict[str, ToolRule] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the policy file; keeps the current tables if it is invalid."""
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime
+                with open(self.path, encoding="utf-8") as handle:
+                    tables = compile_policies(json.load(handle))
+            except (OSError, ValueError, AttributeError, TypeError):
+                self.stats["reload_errors"] += 1
+                logger.warning("tool policy reload failed", exc_info=True, extra={"path": str(self.path)})
+                return False
+            # Swapping the reference keeps concurrent evaluations consistent.
+            self._tables = tables
+            self._mtime = mtime
+            self.stats["reloads"] += 1
+            return True
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def evaluate(self, tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+        """The refusal message for a call, or None when it is allowed."""
+        self._maybe_reload()
+        message = self._evaluate(tool_name, args)
+        self.evaluations += 1
+        if self.log_every and self.evaluations % self.log_every == 0:
+            self.log_stats()
+        return message
+
+    def _evaluate(self, tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+        rule = self._tables.get(tool_name)
+        if rule is None:
+            self.decisions[(tool_name, "allow")] += 1
+            return None
+        if not rule.enabled:
+            self.decisions[(tool_name, "deny:disabled")] += 1
+            return rule.message.format(tool=tool_name, arg="", value="")
+        for arg, value in args.items():
+            denied, allowed = rule.deny.get(arg), rule.allow.get(arg)
+            if denied is None and allowed is None:
+                continue
+            for item in value if isinstance(value, (list, tuple)) else (value,):
+                if item is None:
+                    continue
+                key = normalize_value(item)
+                if (denied is not None and key in denied) or (allowed is not None and key not in allowed):
+                    self.decisions[(tool_name, f"deny:{arg}")] += 1
+                    return rule.message.format(tool=tool_name, arg=arg, value=item)
+        self.decisions[(tool_name, "allow")] += 1
+        return None
+
+    def hit_rates(self) -> Dict[str, Dict[str, float]]:
+        """Share of each decision per tool."""
+        totals: Counter = Counter()
+        for (tool_name, _), count in self.decisions.items():
+            totals[tool_name] += count
+        rates: Dict[str, Dict[str, float]] = {}
+        for (tool_name, decision), count in self.decisions.items():
+            rates.setdefault(tool_name, {})[decision] = count / totals[tool_name]
+        return rates
+
+    def log_stats(self) -> None:
+        rates = self.hit_rates()
+        for tool_name in sorted(rates):
+            logger.info(
+                "tool policy stats",
+                extra={
+                    "tool": tool_name,
+                    "decisions": {decision: count for (name, decision), count in self.decisions.items() if name == tool_name},
+                    "hit_rates": {decision: round(rate, 3) for decision, rate in rates[tool_name].items()},
+                    **self.stats,
+                },
+            )
+
+    def before_tool(
+        self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[Dict]:
+        message = self.evaluate(tool.name, args)
+        if message is None:
+            return None
+        tool_context.state["guardrail_tool_block_triggered"] = True
+        logger.info("tool call denied", extra={**log_context(tool_context), "tool": tool.name})
+        # Returned in place of the tool's result, in the tools' error format.
+        return {"status": "error", "error_message": message}
+
+
+tool_policy = ToolPolicy(
+    Path(os.getenv("TOOL_POLICY_PATH", POLICY_PATH)),
+    log_every=int(os.getenv("TOOL_POLICY_LOG_EVERY", "500")),
+)
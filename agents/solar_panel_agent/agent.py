@@ -12,60 +12,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from google.adk.agents import Agent
-from google.adk.tools import google_search, agent_tool
-
-MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
-
-Agent_Search = Agent(
-    model='gemini-2.0-flash-exp',
-    name='SearchAgent',
-    instruction="""
-    You're a specialist in Google Search
-    """,
-    tools=[google_search]
-)
-
-offer_agent = Agent(
-    name="offer_agent",
-    model=MODEL_GEMINI_2_0_FLASH,
-    description="Agent to make a micro-credit offer or thank the user.",
-    instruction='''
-        You are a financial assistant.
-        You will be given the result of an energy consumption analysis in the `offer_decision` variable.
-
-        If `offer_decision` is "APPROVE", you should inform the user that they can save money by switching to a more energy-efficient device and offer them a micro-credit to buy it.
-        If `offer_decision` is "REJECT", you should politely inform the user that their energy consumption is already efficient and thank them for using the service.
-    '''
-)
+import os
 
+from google.adk.agents import Agent, ParallelAgent
 
-suggestion_agent = Agent(
-    name="suggestion_agent",
-    model=MODEL_GEMINI_2_0_FLASH,
-    description="Agent to suggest measurement of solar pannels.",
-    instruction='''
-    You are an energy efficiency expert.
-    You will receive the user's energy consumption data in the `consumption_data` variable.
-    Your task is to:
-    1. Analyze the user's consumption.
-    2. Search for energy-efficient alternatives for the device type specified.
-    3. If a more efficient device exists and the potential savings are significant, output "APPROVE" and tell the user which device (exact model) should be buying.
-    4. Otherwise, output "REJECT".
-
-    Delegate the result to: 'offer_agent'
-    ''',
-    output_key="offer_decision",
-    sub_agents=[offer_agent],
-    tools=[agent_tool.AgentTool(agent=Agent_Search)],
+from shared.conditional_pipeline import ConditionalSequentialAgent, StepGuard
+from shared.device_catalog import find_efficient_device
+from shared.energy_analyses import (
+    STATE_KEY as CONSUMPTION_KEY,
+    consumption_complete,
+    make_loan_precheck_callback,
+    make_solar_sizing_callback,
+    mentions_consumption,
 )
+from shared.response_cache import response_cache
+from shared.search import search_web
+from shared.slot_filling import is_restart
+from shared.solar_sizing import calculate_solar_sizing
+from shared.tool_policy import tool_policy
 
+MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
+# "parallel" runs the analyses concurrently once the data is collected;
+# "chained" keeps the original delegation chain.
+ORCHESTRATION = os.getenv("SOLAR_ORCHESTRATION", "parallel")
 
-root_agent = Agent(
-    name="bill_analyzer_agent",
-    model=MODEL_GEMINI_2_0_FLASH,
-    description="An agent that analyzes utility bills and suggests energy-efficient devices.",
-    instruction='''
+COLLECTOR_INSTRUCTION = '''
 You are a bill analyzer assistant. Your task is to collect the following information from the user:
 - The number of people in the house.
 - Their average monthly consumption in KWH.
@@ -76,9 +47,159 @@ Here is your process:
 1. Greet the user and explain your purpose.
 2. Ask for the each of the variable that you need.
 3. Once you have all the information, output a JSON object with the collected data.
+'''
+
+
+def _build_chained_agent() -> Agent:
+    offer_agent = Agent(
+        name="offer_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="Agent to make a micro-credit offer or thank the user.",
+        instruction='''
+            You are a financial assistant.
+            You will be given the result of an energy consumption analysis in the `offer_decision` variable.
+
+            If `offer_decision` is "APPROVE", you should inform the user that they can save money by switching to a more energy-efficient device and offer them a micro-credit to buy it.
+            If `offer_decision` is "REJECT", you should politely inform the user that their energy consumption is already efficient and thank them for using the service.
+        ''',
+        before_model_callback=response_cache.before_model,
+        after_model_callback=response_cache.after_model,
+    )
+
+    suggestion_agent = Agent(
+        name="suggestion_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="Agent to suggest measurement of solar pannels.",
+        instruction='''
+        You are an energy efficiency expert.
+        You will receive the user's energy consumption data in the `consumption_data` variable.
+        Your task is to:
+        1. Analyze the user's consumption. Call the `calculate_solar_sizing` tool with the monthly kWh and the available m2 to get the panel count, savings, break-even and CO2 figures; never compute them yourself. Pass several panel_counts or tariffs in one call to compare options.
+        2. Find an energy-efficient alternative for the device type specified with the `find_efficient_device` tool. Only if it returns "not_found", search for one with the `search_web` tool.
+        3. If a more efficient device exists and the potential savings are significant, output "APPROVE" and tell the user which device (exact model) should be buying.
+        4. Otherwise, output "REJECT".
+
+        Delegate the result to: 'offer_agent'
+        ''',
+        output_key="offer_decision",
+        sub_agents=[offer_agent],
+        tools=[find_efficient_device, calculate_solar_sizing, search_web],
+        before_tool_callback=tool_policy.before_tool,
+    )
+
+    return Agent(
+        name="bill_analyzer_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="An agent that analyzes utility bills and suggests energy-efficient devices.",
+        instruction=COLLECTOR_INSTRUCTION + "\nAfter having all the required information, delegate to: 'suggestion_agent'\n",
+        sub_agents=[suggestion_agent],
+        output_key="consumption_data",
+        before_model_callback=response_cache.before_model,
+        after_model_callback=response_cache.after_model,
+    )
+
 
-After having all the required information, delegate to: 'suggestion_agent'
+def _build_parallel_agent() -> ConditionalSequentialAgent:
+    """Collect the data, run the three analyses concurrently, then make the offer.
+
+    Each analysis writes its own state key, so the branches never touch the
+    same state; solar sizing and the loan pre-check are computed locally.
+    Asking to start over, or giving a new consumption or space once the data
+    is complete, clears the data and the analyses so they are collected and
+    run again.
+    """
+    collector = Agent(
+        name="bill_analyzer_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="An agent that collects the household's energy data.",
+        instruction=COLLECTOR_INSTRUCTION + '''
+The keys must be "people", "monthly_kwh", "location" and "available_m2".
+Output *only* this JSON object.
 ''',
-    sub_agents=[suggestion_agent],
-    output_key="consumption_data"
-)
+        output_key="consumption_data",
+        before_model_callback=response_cache.before_model,
+        after_model_callback=response_cache.after_model,
+    )
+
+    device_suggestion_agent = Agent(
+        name="device_suggestion_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="Suggests an energy-efficient replacement for the household's largest load.",
+        instruction='''
+    You are an energy efficiency expert. The household's data is: {consumption_data}.
+    Pick the device most likely to dominate this consumption and find an energy-efficient alternative
+    with the `find_efficient_device` tool. Only if it returns "not_found", search for one with the `search_web` tool.
+    Reply with the exact model, its price and the monthly savings, or "none" when no better device exists.
+    ''',
+        output_key="device_suggestion",
+        tools=[find_efficient_device, search_web],
+        before_tool_callback=tool_policy.before_tool,
+    )
+
+    solar_sizing_agent = Agent(
+        name="solar_sizing_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="Sizes the solar installation for the household.",
+        instruction='''
+    The household's data is: {consumption_data}.
+    Call the `calculate_solar_sizing` tool with the monthly kWh and the available m2 and reply with its result.
+    ''',
+        output_key="solar_sizing",
+        tools=[calculate_solar_sizing],
+        before_model_callback=make_solar_sizing_callback(),
+    )
+
+    loan_precheck_agent = Agent(
+        name="loan_precheck_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="Pre-checks a solar micro-credit against the savings of the panels.",
+        instruction='''
+    The household's data is: {consumption_data}.
+    Output "APPROVE" if financing solar panels for this household looks affordable, otherwise "REJECT".
+    ''',
+        output_key="loan_precheck",
+        before_model_callback=make_loan_precheck_callback(),
+    )
+
+    offer_agent = Agent(
+        name="offer_agent",
+        model=MODEL_GEMINI_2_0_FLASH,
+        description="Agent to make a micro-credit offer or thank the user.",
+        instruction='''
+        You are a financial assistant. Present the results of the energy analysis to the user:
+        - Device suggestion: {device_suggestion}
+        - Solar installation: {solar_sizing}
+        - Micro-credit pre-check: {loan_precheck}
+
+        If the pre-check decision is "APPROVE", explain the savings and offer them a micro-credit for the panels and the suggested device.
+        If it is "REJECT", share the device suggestion and savings tips, and politely thank them for using the service.
+    ''',
+        before_model_callback=response_cache.before_model,
+        after_model_callback=response_cache.after_model,
+    )
+
+    analyses = ParallelAgent(
+        name="energy_analyses",
+        description="Runs the independent analyses of the collected data concurrently.",
+        sub_agents=[device_suggestion_agent, solar_sizing_agent, loan_precheck_agent],
+    )
+    analysis_keys = ("device_suggestion", "solar_sizing", "loan_precheck")
+    return ConditionalSequentialAgent(
+        name="solar_offer_pipeline",
+        description="Collects the household's data, analyzes it in parallel and makes an offer.",
+        sub_agents=[collector, analyses, offer_agent],
+        reset_if=lambda state, message: is_restart(message)
+        or (consumption_complete(state) and mentions_consumption(message)),
+        reset_keys=(CONSUMPTION_KEY, *analysis_keys),
+        guards={
+            "bill_analyzer_agent": StepGuard(run_if=lambda state: not consumption_complete(state)),
+            "energy_analyses": StepGuard(
+                run_if=lambda state: consumption_complete(state)
+                and any(state.get(key) is None for key in analysis_keys)
+            ),
+            "offer_agent": StepGuard(run_if=consumption_complete),
+        },
+    )
+
+
+root_agent = _build_chained_agent() if ORCHESTRATION == "chained" else _build_parallel_agent()
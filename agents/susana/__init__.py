@@ -1 +1,11 @@
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # The agent tree is built on first access (e.g. by `adk web` or the
+    # shared registry) rather than when the package is imported.
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    if name == "root_agent":
+        return importlib.import_module(f"{__name__}.agent").root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
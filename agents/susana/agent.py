@@ -13,8 +13,11 @@
 # limitations under the License.
 
 # @title Import necessary libraries
+import functools
+import json
+import logging
+
 from google.adk.agents import Agent
-from google.adk.agents import SequentialAgent
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from google.genai import types # For creating message Content/Parts
@@ -27,16 +30,38 @@ from google.adk.tools.base_tool import BaseTool
 from google.adk.tools.tool_context import ToolContext
 from typing import Optional, Dict, Any # For type hints
 
+from shared.conditional_pipeline import ConditionalSequentialAgent, StepGuard
+from shared.guardrails import guardrail
+from shared.history_compaction import make_compaction_callback
+from shared.loan_scoring import APPROVE, REJECT, make_prescore_callback, parse_business_info
+from shared.prompt_registry import prompt_registry
+from shared.response_cache import response_cache
+from shared.slot_filling import (
+    CONFIRM_KEY,
+    SLOTS,
+    STATE_KEY as SLOTS_KEY,
+    extract_business_info,
+    is_confirmation,
+    is_restart,
+    make_slot_filling_callback,
+)
+from shared.structured_logging import configure_logging, log_context
+from shared.tool_policy import tool_policy
+
+configure_logging("susana", "shared")
+logger = logging.getLogger(__name__)
+
 # Use one of the model constants defined earlier
 MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
 
 def get_weather_stateful(city: str, tool_context: ToolContext) -> dict:
     """Retrieves weather, converts temp unit based on session state."""
-    print(f"--- Tool: get_weather_stateful called for {city} ---")
-
     # --- Read preference from state ---
     preferred_unit = tool_context.state.get("user_preference_temperature_unit", "Celsius") # Default to Celsius
-    print(f"--- Tool: Reading state 'user_preference_temperature_unit': {preferred_unit} ---")
+    logger.debug(
+        "get_weather_stateful called",
+        extra={**log_context(tool_context), "city": city, "unit": preferred_unit},
+    )
 
     city_normalized = city.lower().replace(" ", "")
 
@@ -62,17 +87,15 @@ def get_weather_stateful(city: str, tool_context: ToolContext) -> dict:
 
         report = f"The weather in {city.capitalize()} is {condition} with a temperature of {temp_value:.0f}{temp_unit}."
         result = {"status": "success", "report": report}
-        print(f"--- Tool: Generated report in {preferred_unit}. Result: {result} ---")
 
         # Example of writing back to state (optional for this tool)
         tool_context.state["last_city_checked_stateful"] = city
-        print(f"--- Tool: Updated state 'last_city_checked_stateful': {city} ---")
 
         return result
     else:
         # Handle city not found
         error_msg = f"Sorry, I don't have weather information for '{city}'."
-        print(f"--- Tool: City '{city}' not found. ---")
+        logger.debug("get_weather_stateful city not found", extra={**log_context(tool_context), "city": city})
         return {"status": "error", "error_message": error_msg}
 
 
@@ -87,143 +110,71 @@ def say_hello(name: Optional[str] = None) -> str:
     """
     if name:
         greeting = f"Hello, {name}!"
-        print(f"--- Tool: say_hello called with name: {name} ---")
     else:
         greeting = "Hello there!" # Default greeting if name is None or not explicitly passed
-        print(f"--- Tool: say_hello called without a specific name (name_arg_value: {name}) ---")
+    logger.debug("say_hello called", extra={"name": name})
     return greeting
 
 def say_goodbye() -> str:
     """Provides a simple farewell message to conclude the conversation."""
-    print(f"--- Tool: say_goodbye called ---")
+    logger.debug("say_goodbye called")
     return "Goodbye! Have a great day."
 
 
-def block_keyword_guardrail(
-    callback_context: CallbackContext, llm_request: LlmRequest
-) -> Optional[LlmResponse]:
-    """
-    Inspects the latest user message for 'BLOCK'. If found, blocks the LLM call
-    and returns a predefined LlmResponse. Otherwise, returns None to proceed.
-    """
-    agent_name = callback_context.agent_name # Get the name of the agent whose model call is being intercepted
-    print(f"--- Callback: block_keyword_guardrail running for agent: {agent_name} ---")
-
-    # Extract the text from the latest user message in the request history
-    last_user_message_text = ""
-    if llm_request.contents:
-        # Find the most recent message with role 'user'
-        for content in reversed(llm_request.contents):
-            if content.role == 'user' and content.parts:
-                # Assuming text is in the first part for simplicity
-                if content.parts[0].text:
-                    last_user_message_text = content.parts[0].text
-                    break # Found the last user message text
-
-    print(f"--- Callback: Inspecting last user message: '{last_user_message_text[:100]}...' ---") # Log first 100 chars
-
-    # --- Guardrail Logic ---
-    keyword_to_block = "BLOCK"
-    if keyword_to_block in last_user_message_text.upper(): # Case-insensitive check
-        print(f"--- Callback: Found '{keyword_to_block}'. Blocking LLM call! ---")
-        # Optionally, set a flag in state to record the block event
-        callback_context.state["guardrail_block_keyword_triggered"] = True
-        print(f"--- Callback: Set state 'guardrail_block_keyword_triggered': True ---")
-
-        # Construct and return an LlmResponse to stop the flow and send this back instead
-        return LlmResponse(
-            content=types.Content(
-                role="model", # Mimic a response from the agent's perspective
-                parts=[types.Part(text=f"I cannot process this request because it contains the blocked keyword '{keyword_to_block}'.")],
-            )
-            # Note: You could also set an error_message field here if needed
-        )
-    else:
-        # Keyword not found, allow the request to proceed to the LLM
-        print(f"--- Callback: Keyword not found. Allowing LLM call for {agent_name}. ---")
-        return None # Returning None signals ADK to continue normally
-
-def block_paris_tool_guardrail(
-    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
-) -> Optional[Dict]:
-    """
-    Checks if 'get_weather_stateful' is called for 'Paris'.
-    If so, blocks the tool execution and returns a specific error dictionary.
-    Otherwise, allows the tool call to proceed by returning None.
-    """
-    tool_name = tool.name
-    agent_name = tool_context.agent_name # Agent attempting the tool call
-    print(f"--- Callback: block_paris_tool_guardrail running for tool '{tool_name}' in agent '{agent_name}' ---")
-    print(f"--- Callback: Inspecting args: {args} ---")
-
-    # --- Guardrail Logic ---
-    target_tool_name = "get_weather_stateful" # Match the function name used by FunctionTool
-    blocked_city = "paris"
-
-    # Check if it's the correct tool and the city argument matches the blocked city
-    if tool_name == target_tool_name:
-        city_argument = args.get("city", "") # Safely get the 'city' argument
-        if city_argument and city_argument.lower() == blocked_city:
-            print(f"--- Callback: Detected blocked city '{city_argument}'. Blocking tool execution! ---")
-            # Optionally update state
-            tool_context.state["guardrail_tool_block_triggered"] = True
-            print(f"--- Callback: Set state 'guardrail_tool_block_triggered': True ---")
-
-            # Return a dictionary matching the tool's expected output format for errors
-            # This dictionary becomes the tool's result, skipping the actual tool run.
-            return {
-                "status": "error",
-                "error_message": f"Policy restriction: Weather checks for '{city_argument.capitalize()}' are currently disabled by a tool guardrail."
-            }
-        else:
-             print(f"--- Callback: City '{city_argument}' is allowed for tool '{tool_name}'. ---")
-    else:
-        print(f"--- Callback: Tool '{tool_name}' is not the target tool. Allowing. ---")
+# Blocked terms and patterns live in shared/guardrail_rules.json; the engine
+# compiles them once and scans each user message once per turn, so every
+# pipeline agent runs it first at the cost of a dict lookup after the first.
+block_keyword_guardrail = guardrail.before_model
 
+# Per-tool allow/deny rules live in shared/tool_policies.json and are
+# reloaded when the file changes.
+block_paris_tool_guardrail = tool_policy.before_tool
 
-    # If the checks above didn't return a dictionary, allow the tool to execute
-    print(f"--- Callback: Allowing tool '{tool_name}' to proceed. ---")
-    return None # Returning None allows the actual tool function to run
-
-# --- Redefine Sub-Agents (Ensures they exist in this context) ---
-greeting_agent = None
-try:
-    # Use a defined model constant
-    greeting_agent = Agent(
+# --- Sub-Agents ---
+# The pipeline below does not use these, so they are only built when first
+# accessed as module attributes (`susana.agent.greeting_agent`).
+@functools.lru_cache(maxsize=None)
+def _build_greeting_agent() -> Agent:
+    return Agent(
         model=MODEL_GEMINI_2_0_FLASH,
         name="greeting_agent", # Keep original name for consistency
         instruction="You are the Greeting Agent. Your ONLY task is to provide a friendly greeting using the 'say_hello' tool. Do nothing else.",
         description="Handles simple greetings and hellos using the 'say_hello' tool.",
         tools=[say_hello],
     )
-    print(f"✅ Sub-Agent '{greeting_agent.name}' redefined.")
-except Exception as e:
-    print(f"❌ Could not redefine Greeting agent. Check Model/API Key ({greeting_agent.model}). Error: {e}")
-
-farewell_agent = None
-try:
-    # Use a defined model constant
-    farewell_agent = Agent(
+
+
+@functools.lru_cache(maxsize=None)
+def _build_farewell_agent() -> Agent:
+    return Agent(
         model=MODEL_GEMINI_2_0_FLASH,
         name="farewell_agent", # Keep original name
         instruction="You are the Farewell Agent. Your ONLY task is to provide a polite goodbye message using the 'say_goodbye' tool. Do not perform any other actions.",
         description="Handles simple farewells and goodbyes using the 'say_goodbye' tool.",
         tools=[say_goodbye],
     )
-    print(f"✅ Sub-Agent '{farewell_agent.name}' redefined.")
-except Exception as e:
-    print(f"❌ Could not redefine Farewell agent. Check Model/API Key ({farewell_agent.model}). Error: {e}")
 
 
-PROMPT = """
-## Personality
+def __getattr__(name):
+    if name == "greeting_agent":
+        return _build_greeting_agent()
+    if name == "farewell_agent":
+        return _build_farewell_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# The persona is the static prefix of every SUSANA agent instruction, so the
+# provider can reuse it across agents. Only the agents that talk about the
+# platform also carry the Environment section after it.
+SUSANA_PERSONA = prompt_registry.register("susana_persona", """
 You are **SUSANA** the MAIN AGENT, a friendly, proactive, andhighly intelligent **financial sustainability advisor** for **Banorte Verde**, Banorte’s green innovation platform.  
 
 You communicate with a **warm, confident, and natural tone** — approachable yet professional.  
 Your Spanish sounds **neutral (Latin American)**, empathetic, and clear, with natural pauses and conversational rhythm.  
-You can add light, human touches like “uhm”, “a ver...”, or “mira...” to keep the flow authentic.  
-
+You can add light, human touches like “uhm”, “a ver...”, or “mira...” to keep the flow authentic.
+""")
 
+SUSANA_ENVIRONMENT = prompt_registry.register("susana_environment", prompt_registry.compose("susana_persona", """
 ## Environment
 You operate inside the **Banorte Verde ecosystem**, a comprehensive digital platform that accelerates the sustainable transition of Mexican PYMEs (small and medium enterprises).  
 
@@ -232,8 +183,10 @@ You help users explore and understand the **four strategic pillars** of Banorte
 1. **Sustainable Loans (Sustainability-Linked Loans)** – Loans with preferential rates tied to measurable sustainability KPIs (like energy efficiency, inclusion, or renewable adoption).  
 2. **AI Financial Advisor** – An intelligent assistant (you) that guides each business step by step to select KPIs, estimate rates, and suggest sustainability improvements.  
 3. **Banorte Sustainable Certification** – Recognition for companies meeting ESG standards, with benefits like reduced interest rates, reputation boosts, and access to Banorte’s green network.  
-4. **Green Financing Programs** – Access to solar panel funding and environmental investment projects (carbon credits, reforestation, renewable energy).  
+4. **Green Financing Programs** – Access to solar panel funding and environmental investment projects (carbon credits, reforestation, renewable energy).
+"""))
 
+PROMPT = prompt_registry.compose("susana_environment", """
 ## Goal
 
 Handle questions: Avg. Earnings each month. How much money you need. And any other related DATA question could be helpful to obtain a lending.
@@ -241,26 +194,9 @@ Handle: Ask to the user if agrees to follow the conditions attached to the possi
 Be concise and do not ask open ended questions.
 Handle veridict:
     - If thejbusiness looks great then offer a lending otherwise reject.
-"""
-
-PROMPT2 = """
-You are **SUSANA** the MAIN AGENT, a friendly, proactive, andhighly intelligent **financial sustainability advisor** for **Banorte Verde**, Banorte’s green innovation platform.  
-
-You communicate with a **warm, confident, and natural tone** — approachable yet professional.  
-Your Spanish sounds **neutral (Latin American)**, empathetic, and clear, with natural pauses and conversational rhythm.  
-You can add light, human touches like “uhm”, “a ver...”, or “mira...” to keep the flow authentic.  
-
-
-## Environment
-You operate inside the **Banorte Verde ecosystem**, a comprehensive digital platform that accelerates the sustainable transition of Mexican PYMEs (small and medium enterprises).  
-
-You help users explore and understand the **four strategic pillars** of Banorte Verde:
-
-1. **Sustainable Loans (Sustainability-Linked Loans)** – Loans with preferential rates tied to measurable sustainability KPIs (like energy efficiency, inclusion, or renewable adoption).  
-2. **AI Financial Advisor** – An intelligent assistant (you) that guides each business step by step to select KPIs, estimate rates, and suggest sustainability improvements.  
-3. **Banorte Sustainable Certification** – Recognition for companies meeting ESG standards, with benefits like reduced interest rates, reputation boosts, and access to Banorte’s green network.  
-4. **Green Financing Programs** – Access to solar panel funding and environmental investment projects (carbon credits, reforestation, renewable energy).  
+""")
 
+PROMPT2 = prompt_registry.compose("susana_environment", """
 Your task is to collect the following information from the user:
  - Earnings per month.
  - How much lending they need.
@@ -268,9 +204,9 @@ Your task is to collect the following information from the user:
 
 Here is your process:
 1.  Review the conversation history to see what information you have already collected.
-2.  If you have collected all three pieces of information, your task is complete. You MUST output a JSON object with the collected data. The keys must be "earnings", "loan_amount", and "business_description". Output *only* this JSON object.
+2.  If you have collected all three pieces of information, read them back to the user and ask them to confirm. Once the user confirms, your task is complete. You MUST output a JSON object with the collected data. The keys must be "earnings", "loan_amount", and "business_description". Output *only* this JSON object.
 3.  If you are missing one or more pieces of information, ask ONE clear question to collect ONE piece of missing information. Do not ask for more than one thing at a time. Then wait for the user's answer.
-"""
+""")
 
 introduction_agent = Agent(
     name="introduction_agent",
@@ -278,7 +214,17 @@ introduction_agent = Agent(
 
     description="An agent which conducts the introduction with the user. Will present and ask questions.",
     instruction=PROMPT2,
-    output_key="business_info"
+    output_key="business_info",
+    # Amounts and the business description are parsed locally; the model
+    # only asks for the slots that are still missing.
+    before_model_callback=[
+        block_keyword_guardrail,
+        make_slot_filling_callback(),
+        make_compaction_callback(token_budget=2000),
+        response_cache.before_model,
+        prompt_registry.before_model,
+    ],
+    after_model_callback=[response_cache.after_model, prompt_registry.after_model],
 )
 
 evaluation_agent = Agent(
@@ -286,56 +232,112 @@ evaluation_agent = Agent(
     model=MODEL_GEMINI_2_0_FLASH,
 
     description="Agent to conduct if a business is feasible to give a loan.",
-    instruction="""
-
-You are **SUSANA** the MAIN AGENT, a friendly, proactive, andhighly intelligent **financial sustainability advisor** for **Banorte Verde**, Banorte’s green innovation platform.  
-
-You communicate with a **warm, confident, and natural tone** — approachable yet professional.  
-Your Spanish sounds **neutral (Latin American)**, empathetic, and clear, with natural pauses and conversational rhythm.  
-You can add light, human touches like “uhm”, “a ver...”, or “mira...” to keep the flow authentic.  
-    Evaluate if the following data matches to a possible loan: {business_info}.
-    Based on the evaluation, you must output a single word: "APPROVE" if the loan should be granted, or "REJECT" if it should not.
-    Output *only* the word "APPROVE" or "REJECT".""",
-    output_key="valid_loan"
+    instruction=prompt_registry.compose("susana_persona", """
+Evaluate if the following data matches to a possible loan: {business_info}.
+Based on the evaluation, you must output a single word: "APPROVE" if the loan should be granted, or "REJECT" if it should not.
+Output *only* the word "APPROVE" or "REJECT".
+"""),
+    output_key="valid_loan",
+    # Clear-cut applications are decided locally; only borderline ones reach the model.
+    before_model_callback=[
+        block_keyword_guardrail,
+        make_prescore_callback(),
+        # Only business_info matters here, and it is restated when compacting.
+        make_compaction_callback(token_budget=1000, keep_turns=2),
+        response_cache.before_model,
+        prompt_registry.before_model,
+    ],
+    after_model_callback=[response_cache.after_model, prompt_registry.after_model],
 )
 
-agreement_agent = Agent(
-
-    name="agreement_agent",
-
-    model=MODEL_GEMINI_2_0_FLASH,
-
-    description="Agent to review if a user agrees with a loan conditions",
-
-    instruction="""
-
-    You are **SUSANA** the MAIN AGENT, a friendly, proactive, andhighly intelligent **financial sustainability advisor** for **Banorte Verde**, Banorte’s green innovation platform.  
-
+# New business data given after a decision, held until the user confirms it.
+REVISION_KEY = "business_revision"
 
 
-    You communicate with a **warm, confident, and natural tone** — approachable yet professional.  
+def _review_new_business_data(callback_context: CallbackContext) -> None:
+    """After a decision, re-evaluate only on new business data the user confirmed.
 
-    Your Spanish sounds **neutral (Latin American)**, empathetic, and clear, with natural pauses and conversational rhythm.  
-
-    You can add light, human touches like “uhm”, “a ver...”, or “mira...” to keep the flow authentic.  
+    Amounts asked about ("¿cuánto sería el pago de 50 mil?") are not new
+    data. A confirmed revision replaces business_info and clears the
+    decision, so the evaluation runs again on the same turn; any other reply
+    drops it.
+    """
+    state = callback_context.state
+    if _loan_decision(state) not in (APPROVE, REJECT):
+        return None
+    user_content = callback_context.user_content
+    message = " ".join(part.text or "" for part in (user_content.parts if user_content else None) or [])
+    revision = state.get(REVISION_KEY)
+    if revision and is_confirmation(message):
+        logger.info("business data revised", extra={"slots": sorted(revision)})
+        state.update({
+            SLOTS_KEY: revision,
+            "business_info": json.dumps(revision, ensure_ascii=False),
+            REVISION_KEY: None,
+            "valid_loan": None,
+            "loan_score": None,
+        })
+        return None
+
+    current = parse_business_info(state.get("business_info"))
+    extracted = {} if "?" in message else extract_business_info(message)
+    changed = {slot: value for slot, value in extracted.items() if current.get(slot) != value}
+    new_revision = {**{slot: current.get(slot) for slot in SLOTS}, **changed} if changed else None
+    if new_revision != revision:
+        state[REVISION_KEY] = new_revision
+    return None
+
+
+def _revision_question(state) -> Optional[str]:
+    revision = state.get(REVISION_KEY)
+    if not revision:
+        return None
+    known = ", ".join(f"{slot}={revision[slot]}" for slot in SLOTS)
+    return (
+        f"Tengo estos datos nuevos de tu negocio: {known}. "
+        "¿Quieres que volvamos a evaluar tu solicitud con ellos?"
+    )
 
 
+def ask_to_confirm_revision(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """Have the agreement agent ask before new business data is re-evaluated."""
+    revision = callback_context.state.get(REVISION_KEY)
+    if revision:
+        known = ", ".join(f"{slot}={revision[slot]}" for slot in SLOTS)
+        llm_request.append_instructions([
+            f"The user gave new business data: {known}. Do not present the KPIs this turn: "
+            "ask them whether their application should be evaluated again with it."
+        ])
+    return None
 
-        You will be given the result of a loan evaluation in the `{valid_loan}` variable.
 
+agreement_agent = Agent(
 
+    name="agreement_agent",
 
-        If `{valid_loan}` is "APPROVE", you must present the following KPIs to the user and ask them to agree:
+    model=MODEL_GEMINI_2_0_FLASH,
 
-        - Get Banorte Sustainable Certification. You should always have this in order.
+    description="Agent to review if a user agrees with a loan conditions",
 
-        - Do efforts to do savings. We'll conduct checks on your monthly bills.
+    instruction=prompt_registry.compose("susana_persona", """
+You will be given the result of a loan evaluation in the `{valid_loan}` variable.
 
-        
+If `{valid_loan}` is "APPROVE", you must present the following KPIs to the user and ask them to agree:
+- Get Banorte Sustainable Certification. You should always have this in order.
+- Do efforts to do savings. We'll conduct checks on your monthly bills.
 
-        If `{valid_loan}` is "REJECT", you should politely inform the user that their application was not approved at this time and say goodbye.
+If `{valid_loan}` is "REJECT", you should politely inform the user that their application was not approved at this time and say goodbye.
+"""),
 
-    """
+    before_model_callback=[
+        block_keyword_guardrail,
+        make_compaction_callback(token_budget=2000),
+        ask_to_confirm_revision,
+        prompt_registry.before_model,
+    ],
+    after_model_callback=prompt_registry.after_model,
 
 )
 
@@ -351,8 +353,43 @@ agreement_agent = Agent(
 #)
 
 
-root_agent = SequentialAgent(
+def _business_info_complete(state) -> bool:
+    info = parse_business_info(state.get("business_info"))
+    return all(info.get(slot) not in (None, "") for slot in SLOTS)
+
+
+def _loan_decision(state) -> str:
+    return str(state.get("valid_loan") or "").strip().upper()
+
+
+REJECTION_REPLY = (
+    "Lo siento mucho... por ahora tu solicitud no fue aprobada. "
+    "Gracias por confiar en Banorte Verde, ¡hasta pronto!"
+)
+
+# Steps whose outcome is already known do not call the model: evaluation and
+# agreement wait until business_info is complete, a decision is only made
+# once, and a rejection gets a fixed goodbye. Asking to start over clears it
+# and reruns the introduction; new business data after a decision is
+# evaluated again only once the user confirms it.
+root_agent = ConditionalSequentialAgent(
     name="BankAgentPipeline",
     sub_agents=[introduction_agent, evaluation_agent, agreement_agent],
-    description="Executes a sequence of doing a loan evaluation."
+    description="Executes a sequence of doing a loan evaluation.",
+    before_agent_callback=_review_new_business_data,
+    reset_if=lambda state, message: is_restart(message),
+    reset_keys=("business_info", SLOTS_KEY, CONFIRM_KEY, REVISION_KEY, "valid_loan", "loan_score"),
+    guards={
+        "introduction_agent": StepGuard(run_if=lambda state: not _business_info_complete(state)),
+        "evaluation_agent": StepGuard(
+            run_if=lambda state: _business_info_complete(state)
+            and _loan_decision(state) not in (APPROVE, REJECT)
+        ),
+        "agreement_agent": StepGuard(
+            run_if=lambda state: _loan_decision(state) == APPROVE,
+            template=lambda state: (_revision_question(state) or REJECTION_REPLY)
+            if _loan_decision(state) == REJECT
+            else None,
+        ),
+    },
 )
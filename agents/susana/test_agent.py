@@ -1,5 +1,8 @@
 from google.adk.agents.llm_agent import Agent
 
+from shared.history_compaction import make_compaction_callback
+from shared.prompt_registry import prompt_registry
+
 PROMPT = """
 ### 🧠 SYSTEM PROMPT — Banorte Verde Agent (Alexis)
 
@@ -64,9 +67,17 @@ You act as a **trusted advisor**, combining environmental awareness with financi
 - Never disclose internal or confidential Banorte data.
 """;
 
+prompt_registry.register("alexis_persona", PROMPT)
+
 root_agent = Agent(
     model='gemini-2.5-flash',
     name='root_agent',
     description='The Root Agent is the primary, user-facing Alexis persona, acting as the intelligent orchestrator and communication hub that routes user requests to specialized child agents and synthesizes their technical output into her defined, empathetic, and professional financial sustainability advice.',
-    instruction=PROMPT
+    # The whole persona prompt is static, so it is cached as one prefix.
+    instruction=prompt_registry.compose("alexis_persona"),
+    before_model_callback=[
+        make_compaction_callback(token_budget=6000, keep_turns=8),
+        prompt_registry.before_model,
+    ],
+    after_model_callback=prompt_registry.after_model,
 )
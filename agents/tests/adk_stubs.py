@@ -0,0 +1,28 @@
+"""Minimal stand-ins for the contexts ADK passes to callbacks and tools."""
+
+from types import SimpleNamespace
+
+from google.genai import types
+
+
+def user_content(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def make_context(
+    agent_name="agent",
+    state=None,
+    user_id="user-1",
+    session_id="session-1",
+    invocation_id="inv-1",
+    message=None,
+):
+    """Quacks like a CallbackContext or ToolContext for the shared callbacks."""
+    session = SimpleNamespace(id=session_id, user_id=user_id, state=state if state is not None else {})
+    return SimpleNamespace(
+        agent_name=agent_name,
+        invocation_id=invocation_id,
+        state=session.state,
+        user_content=user_content(message) if message is not None else None,
+        _invocation_context=SimpleNamespace(session=session),
+    )
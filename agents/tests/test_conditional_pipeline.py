@@ -0,0 +1,108 @@
+import asyncio
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from adk_stubs import user_content
+from shared.conditional_pipeline import STATE_KEY, ConditionalSequentialAgent, StepGuard
+
+
+class CountingLlm(BaseLlm):
+    """Replies "ok" and records which agent called it."""
+
+    calls: list = []
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False):
+        self.calls.append(llm_request.config.labels.get("agent") if llm_request.config.labels else None)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+def _agent(name: str, model: BaseLlm, output_key=None) -> LlmAgent:
+    def label(callback_context, llm_request):
+        llm_request.config.labels = {"agent": name}
+
+    return LlmAgent(name=name, model=model, output_key=output_key, before_model_callback=label)
+
+
+def _pipeline(model: BaseLlm, **kwargs) -> ConditionalSequentialAgent:
+    return ConditionalSequentialAgent(
+        name="pipeline",
+        sub_agents=[_agent("collect", model, "data"), _agent("decide", model, "decision"), _agent("close", model)],
+        **kwargs,
+    )
+
+
+def _run(pipeline, messages, state=None):
+    async def drive():
+        runner = InMemoryRunner(agent=pipeline, app_name="test")
+        session = await runner.session_service.create_session(app_name="test", user_id="user", state=state or {})
+        events = []
+        for message in messages:
+            async for event in runner.run_async(
+                user_id="user", session_id=session.id, new_message=user_content(message)
+            ):
+                events.append(event)
+        session = await runner.session_service.get_session(app_name="test", user_id="user", session_id=session.id)
+        return events, session.state
+
+    return asyncio.run(drive())
+
+
+def test_unguarded_steps_all_run():
+    model = CountingLlm(model="stub", calls=[])
+    _, state = _run(_pipeline(model), ["hola"])
+    assert model.calls == ["collect", "decide", "close"]
+    assert state[STATE_KEY] == {"collect": "ran", "decide": "ran", "close": "ran"}
+
+
+def test_templated_step_writes_output_key_without_a_model_call():
+    model = CountingLlm(model="stub", calls=[])
+    pipeline = _pipeline(
+        model,
+        guards={
+            "collect": StepGuard(run_if=lambda state: "data" not in state),
+            "decide": StepGuard(run_if=lambda state: False, template=lambda state: f"NO for {state['data']}"),
+        },
+    )
+    events, state = _run(pipeline, ["hola"], state={"data": "bakery"})
+    assert model.calls == ["close"]
+    assert state["decision"] == "NO for bakery"
+    decide_events = [event for event in events if event.author == "decide"]
+    assert decide_events[0].content.parts[0].text == "NO for bakery"
+    assert state[STATE_KEY] == {"collect": "skipped", "decide": "templated", "close": "ran"}
+
+
+def test_skipped_steps_make_no_model_call():
+    model = CountingLlm(model="stub", calls=[])
+    pipeline = _pipeline(
+        model,
+        guards={name: StepGuard(run_if=lambda state: False) for name in ("collect", "decide", "close")},
+    )
+    events, state = _run(pipeline, ["hola"])
+    assert model.calls == []
+    assert not [event for event in events if event.content and event.content.parts]
+    assert set(state[STATE_KEY].values()) == {"skipped"}
+
+
+def test_reset_clears_keys_and_reruns_guarded_steps():
+    model = CountingLlm(model="stub", calls=[])
+    pipeline = _pipeline(
+        model,
+        guards={
+            "collect": StepGuard(run_if=lambda state: not state.get("data")),
+            "decide": StepGuard(run_if=lambda state: not state.get("decision")),
+        },
+        reset_if=lambda state, message: "again" in message,
+        reset_keys=("data", "decision"),
+    )
+    _, state = _run(pipeline, ["hola", "thanks"])
+    assert model.calls == ["collect", "decide", "close", "close"]
+
+    model.calls.clear()
+    _, state = _run(pipeline, ["start again"], state={"data": "old", "decision": "NO"})
+    assert model.calls == ["collect", "decide", "close"]
+    assert state["data"] == "ok" and state["decision"] == "ok"
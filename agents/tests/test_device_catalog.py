@@ -0,0 +1,59 @@
+import pytest
+
+from shared.device_catalog import Device, DeviceCatalog, find_efficient_device, normalize_device_type
+
+
+@pytest.mark.parametrize(
+    "name, device_type",
+    [
+        ("Refri", "refrigerator"),
+        ("lavadora", "washing_machine"),
+        ("Lavadora 1 ton", "lavadora_1_ton"),
+        ("AC 1.5 ton", "air_conditioner_1_5ton"),
+        ("minisplit 2 toneladas", "air_conditioner_2ton"),
+        ("aire acondicionado 2 ton", "air_conditioner_2ton"),
+        ("minisplit 12 ton", "minisplit_12_ton"),
+        ("Televisión", "television"),
+        ("water-heater", "water_heater"),
+    ],
+)
+def test_normalize_device_type(name, device_type):
+    assert normalize_device_type(name) == device_type
+
+
+def _catalog():
+    return DeviceCatalog(
+        [
+            Device("cheap", "refrigerator", "B", monthly_kwh=40, price_mxn=5_000),
+            Device("efficient", "refrigerator", "A+++", monthly_kwh=20, price_mxn=15_000),
+            Device("dominated", "refrigerator", "A", monthly_kwh=45, price_mxn=9_000),
+        ],
+        rate_mxn_per_kwh=1.0,
+    )
+
+
+def test_best_replacement_is_ranked_at_the_actual_consumption():
+    catalog = _catalog()
+    # At 48 kWh the cheap model pays back in 625 months, the efficient one in 536.
+    assert catalog.best_replacement("fridge", 48).model == "efficient"
+    # At 60 kWh the cheap model wins: 250 months against 375.
+    assert catalog.best_replacement("fridge", 60).model == "cheap"
+    assert catalog.best_replacement("fridge", 10).model == "efficient"
+
+
+def test_dominated_models_are_never_recommended():
+    catalog = _catalog()
+    assert all(catalog.best_replacement("fridge", kwh).model != "dominated" for kwh in range(0, 500, 5))
+
+
+def test_min_efficiency_class_limits_the_candidates():
+    assert _catalog().best_replacement("fridge", 60, "A").model == "efficient"
+
+
+def test_find_efficient_device_reports_savings_from_the_catalog():
+    result = find_efficient_device("refrigerador", 80)
+
+    assert result["status"] == "success"
+    assert result["monthly_savings_kwh"] == pytest.approx(80 - result["monthly_kwh"])
+    assert find_efficient_device("nave espacial", 80)["status"] == "not_found"
+    assert find_efficient_device("refri", 1)["status"] == "already_efficient"
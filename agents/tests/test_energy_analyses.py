@@ -0,0 +1,50 @@
+import pytest
+
+from shared.energy_analyses import SOLAR_POLICY, mentions_consumption, parse_consumption, solar_loan_precheck
+from shared.loan_scoring import APPROVE, REJECT
+from shared.solar_sizing import calculate_solar_sizing
+
+
+def test_parse_consumption_uses_canonical_keys():
+    data = parse_consumption('{"personas": "4", "consumo": "450 kWh", "city": "Monterrey", "m2": "20"}')
+    assert data == {"people": 4, "monthly_kwh": 450, "location": "Monterrey", "available_m2": 20}
+
+
+@pytest.mark.parametrize("monthly_kwh", [350, 450, 800])
+def test_households_above_the_basic_tier_are_approved(monthly_kwh):
+    result = solar_loan_precheck(monthly_kwh)
+    assert result["decision"] == APPROVE
+    assert result["term_months"] == SOLAR_POLICY.term_months
+
+
+def test_precheck_compares_the_payment_with_the_sizing_savings():
+    result = solar_loan_precheck(450)
+    scenario = calculate_solar_sizing(450, panel_counts=[result["panels"]])["scenarios"][0]
+    assert result["monthly_savings"] == scenario["monthly_savings_mxn"]
+    assert result["monthly_payment"] == pytest.approx(scenario["investment_mxn"] * SOLAR_POLICY.payment_factor(), abs=0.01)
+
+
+def test_subsidized_consumption_does_not_repay_the_panels():
+    result = solar_loan_precheck(200)
+    assert result["decision"] == REJECT
+    assert result["monthly_payment"] > result["monthly_savings"]
+
+
+def test_zero_space_fits_no_panel():
+    assert solar_loan_precheck(450, available_m2=0) == {
+        "decision": REJECT,
+        "reason": "no panel fits the available space",
+        "panels": 0,
+    }
+
+
+def test_space_caps_the_panels():
+    assert solar_loan_precheck(450, available_m2=5)["panels"] == 2
+
+
+@pytest.mark.parametrize(
+    "text, mentions",
+    [("ahora consumimos 600 kWh", True), ("tenemos 30 m2 en el techo", True), ("gracias", False), ("somos 4", False)],
+)
+def test_mentions_consumption(text, mentions):
+    assert mentions_consumption(text) is mentions
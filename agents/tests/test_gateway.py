@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+import pytest
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import gateway
+from gateway import Gateway, SharedModels, create_app
+
+
+# Model calls in progress, and the most there ever were at once.
+CALLS = {"active": 0, "peak": 0}
+
+
+class SlowLlm(BaseLlm):
+    """Answers with its model name after a pause."""
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        CALLS["active"] += 1
+        CALLS["peak"] = max(CALLS["peak"], CALLS["active"])
+        await asyncio.sleep(0.01)
+        CALLS["active"] -= 1
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"from {self.model}")]))
+
+
+@pytest.fixture
+def app(monkeypatch):
+    root = SequentialAgent(
+        name="pipeline",
+        sub_agents=[LlmAgent(name="first", model="first-model"), LlmAgent(name="second", model="second-model")],
+    )
+    monkeypatch.setattr(gateway.registry, "get", lambda name: root)
+    CALLS.update(active=0, peak=0)
+    models = SharedModels(lambda model_name: SlowLlm(model=model_name))
+    return create_app(Gateway(["pipeline"], session_service=InMemorySessionService(), models=models))
+
+
+def _send(app, requests):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await requests(client)
+
+    return asyncio.run(run())
+
+
+def test_unknown_session_ids_are_rejected(app):
+    response = _send(app, lambda client: client.post("/agents/pipeline/run", json={"message": "hola", "session_id": "made-up"}))
+    assert response.status_code == 404
+
+
+def test_buffered_run_joins_every_final_response(app):
+    response = _send(app, lambda client: client.post("/agents/pipeline/run", json={"message": "hola"}))
+    body = response.json()
+    assert body["response"] == "from first-model\n\nfrom second-model"
+    assert body["author"] == "second"
+
+
+def test_turns_on_one_session_run_one_at_a_time(app):
+    async def requests(client):
+        session_id = (await client.post("/agents/pipeline/sessions")).json()["session_id"]
+        turns = [
+            client.post("/agents/pipeline/run", json={"message": f"turno {i}", "session_id": session_id})
+            for i in range(3)
+        ]
+        return await asyncio.gather(*turns)
+
+    responses = _send(app, requests)
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert CALLS["peak"] == 1
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from adk_stubs import make_context
+from shared.guardrails import GuardrailEngine, guardrail, trie_pattern
+
+
+@pytest.mark.parametrize("terms", [["cat", "car", "cart"], ["lavado de dinero", "lavar dinero"], ["a", "ab", "abc"]])
+def test_trie_pattern_matches_exactly_the_terms(terms):
+    regex = re.compile(trie_pattern(terms))
+    assert all(regex.fullmatch(term) for term in terms)
+    assert not regex.fullmatch("ca") and not regex.fullmatch(terms[0] + "x")
+
+
+def test_terms_match_whole_words_case_and_accent_insensitively():
+    engine = GuardrailEngine(terms=["evasión fiscal", "jailbreak"])
+
+    assert engine.scan("Quiero hacer EVASION   fiscal").text == "evasion fiscal"
+    assert engine.scan("this is a jailbreak!").rule == "term"
+    assert engine.scan("jailbreaking") is None
+
+
+def test_substrings_match_inside_words():
+    engine = GuardrailEngine(substrings=["BLOCK"])
+
+    assert engine.scan("let's talk about blockchain").text == "block"
+    assert engine.scan("unblock me").rule == "substring"
+    assert engine.scan("bloque") is None
+
+
+def test_the_shipped_rules_keep_the_original_block_keyword_check():
+    assert guardrail.scan("please unblock my account") is not None
+    assert guardrail.scan("mi tarjeta es 4111 1111 1111 1111").rule == "card_number"
+    assert guardrail.scan("Tengo una panadería y ganamos 80 mil al mes") is None
+
+
+def test_patterns_use_their_own_message():
+    engine = GuardrailEngine(patterns=[{"name": "pin", "pattern": r"\bnip\W{0,3}\d{4}\b", "message": "No NIP: {match}"}])
+    match = engine.scan("mi NIP: 1234")
+    assert (match.rule, match.message) == ("pin", "No NIP: nip: 1234")
+
+
+def test_before_model_blocks_once_per_turn():
+    engine = GuardrailEngine(terms=["jailbreak"])
+    context = make_context(message="try a jailbreak")
+
+    response = engine.before_model(context, None)
+    engine.before_model(make_context(agent_name="other", message="try a jailbreak"), None)
+
+    assert "jailbreak" in response.content.parts[0].text
+    assert context.state["guardrail_block_keyword_triggered"]
+    assert engine.stats == {"scans": 1, "reused": 1, "blocked": 2}
+    assert engine.before_model(make_context(invocation_id="inv-2", message="hola"), None) is None
@@ -0,0 +1,110 @@
+import pytest
+
+from adk_stubs import make_context
+from shared.loan_scoring import (
+    APPROVE,
+    BORDERLINE,
+    REJECT,
+    infer_category,
+    make_prescore_callback,
+    parse_amount,
+    parse_business_info,
+    score_application,
+    score_business_info,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("50000", 50_000),
+        ("$50,000", 50_000),
+        ("1.200.000", 1_200_000),
+        ("$45,000.00", 45_000),
+        ("1,200.50", 1_200.5),
+        ("$12,500.5", 12_500.5),
+        ("1.250,5", 1_250.5),
+        ("1,250.5 kWh", 1_250.5),
+        ("1.5", 1.5),
+        ("2,5", 2.5),
+        ("80k", 80_000),
+        ("90 mil al mes", 90_000),
+        ("1.2 millones", 1_200_000),
+    ],
+)
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", ["1.2.3", "1,2.3", "1.234.5,6.7", "sin monto", "", None, ["80k"]])
+def test_parse_amount_returns_none_when_unparseable(value):
+    assert parse_amount(value) is None
+
+
+def test_parse_business_info_accepts_fenced_json():
+    raw = '```json\n{"earnings": "80k", "loan_amount": "150 mil"}\n```'
+    assert parse_business_info(raw) == {"earnings": "80k", "loan_amount": "150 mil"}
+    assert parse_business_info("no json here") == {}
+
+
+def test_score_application_decides_clear_cut_cases():
+    assert score_application(100_000, 50_000).decision == APPROVE
+    assert score_application(10_000, 500_000).decision == REJECT
+    assert score_application(None, 50_000).decision == BORDERLINE
+    assert score_application(100_000, 0).decision == REJECT
+
+
+def test_green_categories_carry_less_risk():
+    neutral = score_application(50_000, 300_000, "retail")
+    solar = score_application(50_000, 300_000, "solar")
+    assert solar.payment_to_income < neutral.payment_to_income
+
+
+def test_prescore_callback_answers_without_the_model():
+    context = make_context(state={"business_info": '{"earnings": "$100,000.00", "loan_amount": "50 mil"}'})
+
+    response = make_prescore_callback()(context, None)
+
+    assert response.content.parts[0].text == APPROVE
+    assert context.state["valid_loan"] == APPROVE
+
+
+def test_prescore_callback_leaves_borderline_cases_to_the_model():
+    context = make_context(state={"business_info": '{"earnings": "30k", "loan_amount": "400k"}'})
+
+    assert make_prescore_callback()(context, None) is None
+    assert "valid_loan" not in context.state
+    assert context.state["loan_score"]["decision"] == BORDERLINE
+
+
+@pytest.mark.parametrize(
+    "description, category",
+    [
+        ("una panadería en el centro", "restaurant"),
+        ("instalamos paneles solares", "solar"),
+        ("We run a recycling plant", "recycling"),
+        ("una granja de aguacate", "agriculture"),
+        ("tienda de abarrotes", "retail"),
+        ("taller mecánico", "services"),
+        ("farmacia", "retail"),
+        ("tienda de farmacia", "retail"),
+        ("window cleaning", "services"),
+        ("a wind farm", "renewable energy"),
+        ("granja eólica", "renewable energy"),
+        ("vendemos en la farmacia del rancho", "retail"),
+        ("algo diferente", None),
+        (None, None),
+    ],
+)
+def test_infer_category(description, category):
+    assert infer_category(description) == category
+
+
+def test_score_business_info_uses_the_inferred_category():
+    base = {"earnings": "50k", "loan_amount": "300k"}
+    neutral = score_business_info({**base, "business_description": "algo diferente"})
+    solar = score_business_info({**base, "business_description": "instalamos paneles solares"})
+    explicit = score_business_info({**base, "business_description": "paneles", "business_category": "retail"})
+
+    assert solar.payment_to_income < neutral.payment_to_income
+    assert explicit.payment_to_income == neutral.payment_to_income
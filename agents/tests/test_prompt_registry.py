@@ -0,0 +1,79 @@
+import asyncio
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from adk_stubs import make_context, user_content
+from shared.prompt_registry import REST_HEADER, LocalContextCache, PromptRegistry
+
+PERSONA = "You are SUSANA, a friendly advisor."
+
+
+def _registry(**kwargs) -> PromptRegistry:
+    registry = PromptRegistry(cache=LocalContextCache(), **kwargs)
+    registry.register("persona", PERSONA)
+    return registry
+
+
+def _request(instruction: str) -> LlmRequest:
+    return LlmRequest(
+        model="gemini-2.0-flash",
+        contents=[user_content("Hola")],
+        config=types.GenerateContentConfig(system_instruction=instruction),
+    )
+
+
+def _before(registry, request, agent_name="agent"):
+    return asyncio.run(registry.before_model(make_context(agent_name=agent_name), request))
+
+
+def test_default_min_tokens_skips_small_prefixes():
+    registry = _registry()
+    request = _request(registry.compose("persona"))
+    _before(registry, request)
+    assert request.config.cached_content is None
+    assert registry.stats()["agent"]["skipped"] == 1
+    assert registry.cache.entries == {}
+
+
+def test_prefix_alone_is_sent_from_the_cache():
+    registry = _registry(min_tokens=0)
+    for agent_name in ("intro", "evaluation"):
+        request = _request(registry.compose("persona"))
+        _before(registry, request, agent_name)
+        assert request.config.system_instruction is None
+        assert registry.cache.lookup(request.config.cached_content) == PERSONA
+    assert len(registry.cache.entries) == 1
+    assert registry.stats()["evaluation"]["hits"] == 1
+
+
+def test_dynamic_rest_follows_the_cached_prefix_as_a_leading_turn():
+    registry = _registry(min_tokens=0)
+    instruction = registry.compose("persona", "Evaluate {'earnings': 90000}.")
+    request = _request(instruction + "\n\nYou are an agent. Your internal name is \"agent\".")
+    _before(registry, request)
+    assert request.config.system_instruction is None
+    assert registry.cache.lookup(request.config.cached_content) == PERSONA
+    rest, message = request.contents
+    assert rest.role == "user" and rest.parts[0].text.startswith(REST_HEADER)
+    assert "Evaluate {'earnings': 90000}." in rest.parts[0].text
+    assert "Your internal name is" in rest.parts[0].text
+    assert message == user_content("Hola")
+    assert registry.stats()["agent"]["created"] == 1
+
+
+def test_small_prefixes_keep_the_whole_system_instruction():
+    registry = _registry()
+    instruction = registry.compose("persona", "Evaluate the loan.")
+    request = _request(instruction)
+    _before(registry, request)
+    assert request.config.system_instruction == instruction
+    assert request.contents == [user_content("Hola")]
+
+
+def test_longest_registered_prefix_wins():
+    registry = _registry(min_tokens=0)
+    registry.register("environment", registry.compose("persona", "## Environment\nBanorte Verde."))
+    request = _request(registry.compose("environment"))
+    _before(registry, request)
+    assert registry.cache.lookup(request.config.cached_content) == registry.prefix("environment")
@@ -0,0 +1,73 @@
+import logging
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from adk_stubs import make_context, user_content
+from shared.response_cache import ResponseCache
+
+
+def _request(text: str) -> LlmRequest:
+    return LlmRequest(
+        model="gemini-2.0-flash",
+        contents=[user_content(text)],
+        config=types.GenerateContentConfig(system_instruction="Be brief."),
+    )
+
+
+def _answer(text: str) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _ask(cache, context, text, answer="Hola"):
+    cached = cache.before_model(context, _request(text))
+    if cached is None:
+        cache.after_model(context, _answer(answer))
+    return cached
+
+
+def test_repeated_question_is_served_from_cache():
+    cache = ResponseCache()
+    context = make_context()
+    assert _ask(cache, context, "¿Qué tasa manejan?") is None
+
+    cached = _ask(cache, context, "  qué tasa manejan ")
+
+    assert cached.content.parts[0].text == "Hola"
+    assert cache.stats()["agent"]["hits"] == 1
+
+
+def test_entries_are_scoped_to_the_user_by_default():
+    cache = ResponseCache()
+    _ask(cache, make_context(user_id="ana"), "hola")
+
+    assert _ask(cache, make_context(user_id="luis"), "hola") is None
+    assert _ask(cache, make_context(user_id="ana", session_id="other"), "hola") is not None
+
+
+def test_session_scope_does_not_share_across_sessions():
+    cache = ResponseCache(scope="session")
+    _ask(cache, make_context(session_id="a"), "hola")
+
+    assert _ask(cache, make_context(session_id="b"), "hola") is None
+
+
+def test_function_calls_are_never_cached():
+    cache = ResponseCache()
+    context = make_context()
+    cache.before_model(context, _request("clima en Monterrey"))
+    call = types.Part(function_call=types.FunctionCall(name="get_weather", args={"city": "Monterrey"}))
+    cache.after_model(context, LlmResponse(content=types.Content(role="model", parts=[call])))
+
+    assert cache.before_model(context, _request("clima en Monterrey")) is None
+
+
+def test_stats_are_logged_periodically(caplog):
+    cache = ResponseCache(log_every=2)
+    with caplog.at_level(logging.INFO, logger="shared.response_cache"):
+        _ask(cache, make_context(), "hola")
+        _ask(cache, make_context(), "hola")
+
+    record = next(record for record in caplog.records if record.message == "response cache stats")
+    assert (record.agent_name, record.hits, record.misses) == ("agent", 1, 1)
@@ -0,0 +1,92 @@
+import asyncio
+import importlib
+
+from shared import search
+from shared.search import SearchCache, StubSearchBackend, normalize_query
+
+
+def test_normalize_query_ignores_case_accents_and_punctuation():
+    assert normalize_query("  ¿Refrigerador   EFICIENTE? ") == normalize_query("refrigerador eficiente")
+
+
+def test_repeated_queries_are_served_from_the_cache(tmp_path):
+    backend = StubSearchBackend({"refrigerador eficiente": "Modelo X"})
+    cache = SearchCache(backend, path=str(tmp_path / "cache.db"))
+
+    async def run():
+        return [await cache.get("Refrigerador eficiente"), await cache.get("refrigerador  eficiente!")]
+
+    assert asyncio.run(run()) == ["Modelo X", "Modelo X"]
+    assert backend.calls == 1
+    assert (cache.stats["hits"], cache.stats["misses"]) == (1, 1)
+
+
+def test_stale_entries_are_served_while_refreshing(tmp_path):
+    backend = StubSearchBackend({"q": "fresh"})
+    cache = SearchCache(backend, path=str(tmp_path / "cache.db"), ttl_seconds=0, stale_seconds=60)
+    cache._write("q", "old")
+
+    async def run():
+        result = await cache.get("q")
+        await asyncio.gather(*cache._background)
+        return result
+
+    assert asyncio.run(run()) == "old"
+    assert cache._read("q")[0] == "fresh"
+
+
+def test_import_does_not_create_a_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.delenv("SEARCH_CACHE_PATH", raising=False)
+    importlib.reload(search)
+
+    assert list(tmp_path.iterdir()) == []
+    assert search.default_cache_path() == str(tmp_path / "xdg" / "agents" / "search_cache.db")
+
+
+class GatedBackend:
+    """Blocks every search until `release` is set."""
+
+    def __init__(self, result="Modelo X"):
+        self.result = result
+        self.release = None
+        self.calls = 0
+
+    async def search(self, query):
+        self.calls += 1
+        await self.release.wait()
+        return self.result
+
+
+def test_cancelled_caller_does_not_strand_concurrent_waiters(tmp_path):
+    backend = GatedBackend()
+    cache = SearchCache(backend, path=str(tmp_path / "cache.db"))
+
+    async def run():
+        backend.release = asyncio.Event()
+        first = asyncio.ensure_future(cache.get("q"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.get("q"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        backend.release.set()
+        return first.cancelled(), await asyncio.wait_for(second, timeout=1)
+
+    assert asyncio.run(run()) == (True, "Modelo X")
+    assert backend.calls == 1
+    assert cache._inflight == {}
+    assert cache._read("q")[0] == "Modelo X"
+
+
+def test_empty_results_are_not_cached(tmp_path):
+    backend = StubSearchBackend({"q": ""})
+    cache = SearchCache(backend, path=str(tmp_path / "cache.db"))
+
+    async def run():
+        return [await cache.get("q"), await cache.get("q")]
+
+    assert asyncio.run(run()) == ["", ""]
+    assert backend.calls == 2
+    assert cache._read("q") is None
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from adk_stubs import make_context, user_content
+from shared.slot_filling import (
+    CONFIRM_KEY,
+    STATE_KEY,
+    extract_business_info,
+    is_confirmation,
+    is_restart,
+    make_slot_filling_callback,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("ganamos 80k al mes", {"earnings": 80_000}),
+        ("necesito 50 mil pesos", {"loan_amount": 50_000}),
+        ("We make $12,500.50 a month and need a $1.2M loan", {"earnings": 12_500.5, "loan_amount": 1_200_000}),
+        ("necesito 150 mil y ganamos 90 mil al mes", {"loan_amount": 150_000, "earnings": 90_000}),
+        (
+            "Tengo una panadería desde 2015 y ganamos 80k al mes",
+            {"business_description": "una panadería", "earnings": 80_000},
+        ),
+        ("tenemos 3 sucursales y vendemos 90 mil al mes", {"earnings": 90_000}),
+        ("vendemos 5 mil diarios", {"earnings": 150_000}),
+        ("ganamos como 1.5 millones al año", {"earnings": 125_000}),
+        ("We earn $240,000 per year", {"earnings": 20_000}),
+        ("facturamos 600 mil anuales y necesito 100 mil", {"earnings": 50_000, "loan_amount": 100_000}),
+        ("ganamos 1.5 millones", {}),
+        ("necesito 100 mil y ganamos 90 mil", {"loan_amount": 100_000}),
+        ("somos 12 empleados", {}),
+        ("Tengo una duda sobre el crédito", {}),
+        ("I have a question about loans", {}),
+        ("We run a small bakery downtown", {"business_description": "a small bakery downtown"}),
+        ("Nos dedicamos a la venta de café orgánico", {"business_description": "la venta de café orgánico"}),
+        ("tengo una tienda de abarrotes con 3 empleados", {"business_description": "una tienda de abarrotes"}),
+    ],
+)
+def test_extract_business_info(text, expected):
+    assert extract_business_info(text) == expected
+
+
+def test_a_bare_amount_fills_the_slot_that_was_asked_for():
+    assert extract_business_info("unos 200 mil", pending_slot="loan_amount") == {"loan_amount": 200_000}
+    assert extract_business_info("en 2015", pending_slot="earnings") == {}
+
+
+def test_earnings_without_a_period_count_as_monthly_only_when_asked_for():
+    assert extract_business_info("ganamos 80 mil", pending_slot="earnings") == {"earnings": 80_000}
+    assert extract_business_info("ganamos 80 mil", pending_slot="loan_amount") == {}
+    assert extract_business_info("unos 960 mil al año", pending_slot="earnings") == {"earnings": 80_000}
+
+
+@pytest.mark.parametrize(
+    "text, confirmed",
+    [("Sí, correcto", True), ("ok", True), ("yes, that's right", True), ("no, son 90 mil", False), ("¿cómo?", False)],
+)
+def test_is_confirmation(text, confirmed):
+    assert is_confirmation(text) is confirmed
+
+
+@pytest.mark.parametrize(
+    "text, restart",
+    [("Quiero empezar de nuevo", True), ("¿Podemos reiniciar?", True), ("let's start over", True), ("Sí, acepto", False)],
+)
+def test_is_restart(text, restart):
+    assert is_restart(text) is restart
+
+
+def _turn(callback, state, message, asked=""):
+    contents = [types.Content(role="model", parts=[types.Part(text=asked)])] if asked else []
+    request = LlmRequest(
+        contents=[*contents, user_content(message)],
+        config=types.GenerateContentConfig(system_instruction="Collect the data."),
+    )
+    response = callback(make_context(state=state, message=message), request)
+    return response, request.config.system_instruction
+
+
+def test_business_info_is_written_only_after_the_user_confirms():
+    callback = make_slot_filling_callback()
+    state = {}
+
+    response, instruction = _turn(callback, state, "Tengo una panadería y ganamos 80k al mes")
+    assert response is None
+    assert "Only ask for: loan_amount" in instruction
+
+    response, instruction = _turn(callback, state, "unos 150 mil", asked="¿Cuánto necesitas de préstamo?")
+    assert response is None and state[CONFIRM_KEY]
+    assert "confirm" in instruction and "business_info" not in state
+
+    # A correction while confirming replaces the value and asks again.
+    response, _ = _turn(callback, state, "no, ganamos 90 mil al mes")
+    assert response is None and state[STATE_KEY]["earnings"] == 90_000
+
+    response, _ = _turn(callback, state, "sí, correcto")
+    info = json.loads(state["business_info"])
+    assert info == {"earnings": 90_000, "loan_amount": 150_000, "business_description": "una panadería"}
+    assert json.loads(response.content.parts[0].text) == info
+    assert not state[CONFIRM_KEY]
+
+
+def test_confirmation_transfers_when_delegating():
+    callback = make_slot_filling_callback(transfer_to="evaluation_agent")
+    state = {
+        STATE_KEY: {"earnings": 80_000, "loan_amount": 150_000, "business_description": "una panadería"},
+        CONFIRM_KEY: True,
+    }
+
+    response, _ = _turn(callback, state, "Sí")
+
+    call = response.content.parts[1].function_call
+    assert (call.name, call.args) == ("transfer_to_agent", {"agent_name": "evaluation_agent"})
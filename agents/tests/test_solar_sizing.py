@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from shared.solar_sizing import (
+    CFE_RATES,
+    COST_PER_PANEL,
+    PANEL_MONTHLY_KWH,
+    calculate_solar_sizing,
+    cfe_rate,
+    required_panels,
+    size_arrays,
+)
+
+
+def test_cfe_rate_follows_the_consumption_tiers():
+    rates = cfe_rate([150, 300, 450, 900])
+    assert rates.tolist() == [CFE_RATES["basic"], CFE_RATES["basic"], CFE_RATES["intermediate"], CFE_RATES["high"]]
+
+
+def test_required_panels_cover_the_consumption():
+    panels = int(required_panels(350))
+    assert panels * PANEL_MONTHLY_KWH >= 350 > (panels - 1) * PANEL_MONTHLY_KWH
+
+
+def test_size_arrays_broadcasts_panels_against_tariffs():
+    figures = size_arrays(400, np.array([[2], [4]]), np.array([[1.0, 2.0]]))
+
+    assert figures["monthly_savings_mxn"].shape == (2, 2)
+    # Savings scale with the tariff for the same installation.
+    assert figures["monthly_savings_mxn"][0, 1] == pytest.approx(2 * figures["monthly_savings_mxn"][0, 0])
+    assert figures["investment_mxn"][1, 0] == 4 * COST_PER_PANEL
+
+
+def test_surplus_is_sold_below_the_tariff():
+    panels = int(required_panels(200)) + 2
+    figures = size_arrays(200, panels, 1.0)
+    surplus = panels * PANEL_MONTHLY_KWH - 200
+    assert float(figures["monthly_savings_mxn"]) == pytest.approx(200 + surplus * 0.5)
+
+
+def test_calculate_solar_sizing_recommends_and_compares_scenarios():
+    result = calculate_solar_sizing(500, available_m2=10, panel_counts=[3, 6], tariffs=["auto", "high"])
+
+    assert result["status"] == "success"
+    assert result["recommended_panels"] == int(required_panels(500))
+    assert result["max_panels_for_space"] == 4
+    assert [(s["panels"], s["tariff"], s["fits_available_space"]) for s in result["scenarios"]] == [
+        (3, "auto", True),
+        (3, "high", True),
+        (6, "auto", False),
+        (6, "high", False),
+    ]
+
+
+def test_no_space_means_no_panel_fits():
+    result = calculate_solar_sizing(300, available_m2=0)
+    assert result["max_panels_for_space"] == 0
+    assert not result["scenarios"][0]["fits_available_space"]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"monthly_kwh": 0}, {"monthly_kwh": 300, "tariffs": ["night"]}, {"monthly_kwh": 300, "panel_counts": list(range(1, 202))},
+     {"monthly_kwh": 300, "panel_counts": [4, 0]}, {"monthly_kwh": 300, "panel_counts": [-2]}],
+)
+def test_calculate_solar_sizing_reports_bad_input(kwargs):
+    assert calculate_solar_sizing(**kwargs)["status"] == "error"
+
+
+def test_size_arrays_rejects_non_positive_panel_counts():
+    with pytest.raises(ValueError):
+        size_arrays(400, np.array([3, 0]))
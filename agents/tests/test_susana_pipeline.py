@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from shared.loan_scoring import APPROVE
+from susana import agent as susana
+from susana.agent import REVISION_KEY
+
+# System instructions of the model calls made so far.
+INSTRUCTIONS = []
+
+APPROVED = {
+    "business_info": json.dumps({"earnings": 90_000, "loan_amount": 150_000, "business_description": "una panadería"}),
+    "valid_loan": APPROVE,
+}
+
+
+class EchoLlm(BaseLlm):
+    """Records the system instruction and answers with a fixed reply."""
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        INSTRUCTIONS.append(str(llm_request.config.system_instruction or ""))
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Claro.")]))
+
+
+@pytest.fixture
+def run_turns(monkeypatch):
+    stub = EchoLlm(model="stub")
+    for sub_agent in susana.root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent, "model", stub)
+    INSTRUCTIONS.clear()
+
+    def run(state, *messages):
+        async def turns():
+            runner = InMemoryRunner(agent=susana.root_agent, app_name="susana")
+            session = await runner.session_service.create_session(app_name="susana", user_id="user-1", state=state)
+            for message in messages:
+                async for _ in runner.run_async(
+                    user_id=session.user_id,
+                    session_id=session.id,
+                    new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+                ):
+                    pass
+            session = await runner.session_service.get_session(
+                app_name="susana", user_id=session.user_id, session_id=session.id
+            )
+            return session.state
+
+        return asyncio.run(turns())
+
+    return run
+
+
+def test_a_question_after_approval_does_not_reset(run_turns):
+    state = run_turns(dict(APPROVED), "¿Cuánto sería el pago mensual de 50 mil?")
+    assert state["valid_loan"] == APPROVE
+    assert state["business_info"] == APPROVED["business_info"]
+    assert not state.get(REVISION_KEY)
+
+
+def test_new_business_data_is_evaluated_again_once_confirmed(run_turns):
+    state = run_turns(dict(APPROVED), "Ahora vendemos 120 mil al mes")
+    assert state["valid_loan"] == APPROVE
+    assert state[REVISION_KEY]["earnings"] == 120_000
+    assert "evaluated again" in INSTRUCTIONS[-1]
+
+    state = run_turns(dict(APPROVED), "Ahora vendemos 120 mil al mes", "Sí, por favor")
+    assert json.loads(state["business_info"])["earnings"] == 120_000
+    assert state["loan_score"] is not None and not state.get(REVISION_KEY)
+
+
+def test_new_business_data_is_dropped_when_not_confirmed(run_turns):
+    state = run_turns(dict(APPROVED), "Ahora vendemos 120 mil al mes", "No, mejor así")
+    assert state["business_info"] == APPROVED["business_info"]
+    assert not state.get(REVISION_KEY)
@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from adk_stubs import make_context
+from shared.tool_policy import ToolPolicy
+
+RULES = {
+    "tools": {
+        "get_weather_stateful": {"deny": {"city": ["París"]}, "message": "No weather for '{value}'."},
+        "calculate_solar_sizing": {"allow": {"tariffs": ["basic", "high"]}},
+        "search_web": {"enabled": False},
+    }
+}
+
+
+@pytest.fixture
+def policy_path(tmp_path):
+    path = tmp_path / "policies.json"
+    path.write_text(json.dumps(RULES), encoding="utf-8")
+    return path
+
+
+def test_deny_allow_and_disabled_rules(policy_path):
+    policy = ToolPolicy(policy_path)
+
+    assert policy.evaluate("get_weather_stateful", {"city": "  PARIS "}) == "No weather for '  PARIS '."
+    assert policy.evaluate("get_weather_stateful", {"city": "Tokyo"}) is None
+    assert policy.evaluate("calculate_solar_sizing", {"tariffs": ["basic", "night"]}) is not None
+    assert policy.evaluate("calculate_solar_sizing", {"tariffs": ["high"], "monthly_kwh": 300}) is None
+    assert policy.evaluate("search_web", {"query": "x"}) is not None
+    assert policy.evaluate("find_efficient_device", {}) is None
+
+
+def test_decisions_and_hit_rates(policy_path):
+    policy = ToolPolicy(policy_path)
+    for city in ("paris", "tokyo", "tokyo", "london"):
+        policy.evaluate("get_weather_stateful", {"city": city})
+
+    assert policy.decisions[("get_weather_stateful", "deny:city")] == 1
+    assert policy.hit_rates() == {"get_weather_stateful": {"deny:city": 0.25, "allow": 0.75}}
+
+
+def test_stats_are_logged_periodically(policy_path, caplog):
+    policy = ToolPolicy(policy_path, log_every=2)
+    with caplog.at_level(logging.INFO, logger="shared.tool_policy"):
+        policy.evaluate("get_weather_stateful", {"city": "paris"})
+        policy.evaluate("get_weather_stateful", {"city": "tokyo"})
+
+    record = next(record for record in caplog.records if record.message == "tool policy stats")
+    assert record.tool == "get_weather_stateful"
+    assert record.hit_rates == {"deny:city": 0.5, "allow": 0.5}
+
+
+def test_policy_file_is_reloaded_and_a_broken_file_is_ignored(policy_path):
+    policy = ToolPolicy(policy_path, reload_interval=0)
+    policy_path.write_text(json.dumps({"tools": {}}), encoding="utf-8")
+    os.utime(policy_path, (1, 1))
+    assert policy.evaluate("search_web", {}) is None
+
+    policy_path.write_text("{broken", encoding="utf-8")
+    os.utime(policy_path, (2, 2))
+    assert policy.evaluate("search_web", {}) is None
+    assert policy.stats["reload_errors"] == 1
+
+
+def test_before_tool_returns_the_error_in_place_of_the_result(policy_path):
+    context = make_context()
+    result = ToolPolicy(policy_path).before_tool(SimpleNamespace(name="search_web"), {}, context)
+
+    assert result["status"] == "error"
+    assert context.state["guardrail_tool_block_triggered"]
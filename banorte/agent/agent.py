@@ -5,14 +5,21 @@ from __future__ import annotations
 from dotenv import load_dotenv
 load_dotenv()
 import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
 from enum import Enum
 from typing import Dict, List, Any, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 
 # ADK imports
 from google.adk.agents import LlmAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.sessions import InMemorySessionService, Session
 from google.adk.runners import Runner
@@ -22,6 +29,26 @@ from google.genai.types import Content, Part , FunctionDeclaration
 from google.adk.models import LlmResponse, LlmRequest
 from google.genai import types
 
+from history_compaction import make_compaction_callback
+from metrics import (
+    COUNT_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    model_timer,
+    registry,
+    timed,
+    tool_timer,
+)
+from session_locks import SessionLocks
+from session_ring import WorkerShard
+from session_store import SqliteSessionService
+from state_sync import StateVersionTracker
+from structured_logging import configure_logging
+
+configure_logging("banorte")
+logger = logging.getLogger("banorte.agent")
+
 
 class ProverbsState(BaseModel):
     """List of the proverbs being written."""
@@ -48,16 +75,132 @@ def set_proverbs(
     Returns:
         Dict indicating success status and message
     """
+    current = [str(proverb) for proverb in tool_context.state.get("proverbs") or []]
+    if not _fits_prompt(current):
+        # The model only sees the newest proverbs; a full rewrite would drop the rest.
+        return {
+            "status": "error",
+            "message": "The list is too long to be shown in full, so it cannot be rewritten at once. "
+            "Use add_proverb, remove_proverb or replace_proverb on the indices you can see.",
+        }
     try:
         # Put this into a state object just to confirm the shape
         new_state = { "proverbs": new_proverbs}
         tool_context.state["proverbs"] = new_state["proverbs"]
+        tool_context.state["proverbs_version"] = tool_context.state.get("proverbs_version", 0) + 1
         return {"status": "success", "message": "Proverbs updated successfully"}
 
     except Exception as e:
         return {"status": "error", "message": f"Error updating proverbs: {str(e)}"}
 
 
+def _edit_proverbs(tool_context: ToolContext, expected_version: int, edit) -> Dict[str, Any]:
+    """Apply one indexed edit to the proverbs list if `expected_version` is current.
+
+    The list is edited in place and assigned back so ADK records the delta.
+    A stale version or bad index is reported back to the model together with
+    the current version so it can re-read the list and retry.
+    """
+    current_version = tool_context.state.get("proverbs_version", 0)
+    if expected_version != current_version:
+        return {
+            "status": "error",
+            "message": f"Proverbs changed since version {expected_version}; the current version is {current_version}.",
+            "version": current_version,
+        }
+    proverbs = tool_context.state.get("proverbs") or []
+    try:
+        message = edit(proverbs)
+    except IndexError:
+        return {
+            "status": "error",
+            "message": f"Index out of range for a list of {len(proverbs)} proverbs.",
+            "version": current_version,
+        }
+    tool_context.state["proverbs"] = proverbs
+    tool_context.state["proverbs_version"] = current_version + 1
+    return {"status": "success", "message": message, "version": current_version + 1}
+
+
+def add_proverb(
+  tool_context: ToolContext,
+  proverb: str,
+  expected_version: int,
+  index: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Add one proverb to the list without resending the rest of it.
+
+    Args:
+        proverb: The proverb to add.
+        expected_version: The proverbs version shown in the system prompt.
+        index: 0-based position to insert at. Appends to the end when omitted.
+
+    Returns:
+        Dict with status, message and the new proverbs version
+    """
+    def edit(proverbs: list[str]) -> str:
+        if index is None:
+            proverbs.append(proverb)
+        elif 0 <= index <= len(proverbs):
+            proverbs.insert(index, proverb)
+        else:
+            raise IndexError(index)
+        return "Proverb added successfully"
+
+    return _edit_proverbs(tool_context, expected_version, edit)
+
+
+def remove_proverb(
+  tool_context: ToolContext,
+  index: int,
+  expected_version: int
+) -> Dict[str, Any]:
+    """
+    Remove the proverb at a 0-based index.
+
+    Args:
+        index: 0-based position of the proverb to remove.
+        expected_version: The proverbs version shown in the system prompt.
+
+    Returns:
+        Dict with status, message and the new proverbs version
+    """
+    def edit(proverbs: list[str]) -> str:
+        if index < 0:
+            raise IndexError(index)
+        removed = proverbs.pop(index)
+        return f"Removed proverb: {removed}"
+
+    return _edit_proverbs(tool_context, expected_version, edit)
+
+
+def replace_proverb(
+  tool_context: ToolContext,
+  index: int,
+  proverb: str,
+  expected_version: int
+) -> Dict[str, Any]:
+    """
+    Replace the proverb at a 0-based index with a new text.
+
+    Args:
+        index: 0-based position of the proverb to replace.
+        proverb: The new text of the proverb.
+        expected_version: The proverbs version shown in the system prompt.
+
+    Returns:
+        Dict with status, message and the new proverbs version
+    """
+    def edit(proverbs: list[str]) -> str:
+        if index < 0:
+            raise IndexError(index)
+        proverbs[index] = proverb
+        return "Proverb replaced successfully"
+
+    return _edit_proverbs(tool_context, expected_version, edit)
+
+
 
 def get_weather(tool_context: ToolContext, location: str) -> Dict[str, str]:
     """Get the weather for a given location. Ensure location is fully spelled out."""
@@ -74,6 +217,7 @@ def on_before_agent(callback_context: CallbackContext):
         # Initialize with default recipe
         default_proverbs =     []
         callback_context.state["proverbs"] = default_proverbs
+        callback_context.state["proverbs_version"] = 0
 
 
     return None
@@ -81,6 +225,86 @@ def on_before_agent(callback_context: CallbackContext):
 
 
 
+# Upper bound, in characters, for the proverbs state inlined into the prompt.
+PROMPT_STATE_BUDGET_CHARS = int(os.getenv("PROMPT_STATE_BUDGET_CHARS", "4000"))
+_PREFIX_CACHE_SIZE = 1024
+_prefix_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+
+def _proverb_lines(proverbs: list[str]) -> list[str]:
+    return [f"[{index}] {proverb}" for index, proverb in enumerate(proverbs)]
+
+
+def _fits_prompt(proverbs: list[str], budget: Optional[int] = None) -> bool:
+    """Whether the whole list is shown in the prompt, not just its newest part."""
+    budget = PROMPT_STATE_BUDGET_CHARS if budget is None else budget
+    lines = _proverb_lines(proverbs)
+    return sum(len(line) for line in lines) + max(len(lines) - 1, 0) <= budget
+
+
+def _render_proverbs(proverbs: list[str], budget: int) -> str:
+    """Numbered proverbs, newest first when the whole list exceeds `budget`."""
+    lines = _proverb_lines(proverbs)
+    if _fits_prompt(proverbs, budget):
+        return "\n".join(lines)
+
+    kept: list[str] = []
+    used = 0
+    for line in reversed(lines):
+        if used + len(line) + 1 > budget:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    kept.reverse()
+    omitted = len(lines) - len(kept)
+    return (
+        f"({len(lines)} proverbs in total; indices 0-{omitted - 1} are omitted to stay "
+        f"within the prompt budget, only the most recent ones are shown.)\n"
+        + "\n".join(kept)
+    )
+
+
+def _proverbs_prefix(session_id: str, state) -> str:
+    """Render the proverbs prefix once per session and proverbs version."""
+    proverbs = state.get("proverbs")
+    proverbs_version = state.get("proverbs_version")
+    if proverbs_version is None:
+        # Sessions written before versioning: fall back to a content hash.
+        try:
+            cache_key = (session_id, "hash", hash(tuple(proverbs or ())), PROMPT_STATE_BUDGET_CHARS)
+        except TypeError:
+            cache_key = None
+    else:
+        cache_key = (session_id, proverbs_version, PROMPT_STATE_BUDGET_CHARS)
+
+    if cache_key is not None and cache_key in _prefix_cache:
+        _prefix_cache.move_to_end(cache_key)
+        return _prefix_cache[cache_key]
+
+    rewrite_hint = "Only use set_proverbs to rewrite most of the list at once."
+    if not proverbs:
+        proverbs_text = "No proverbs yet"
+    else:
+        try:
+            proverbs = [str(p) for p in proverbs]
+            proverbs_text = _render_proverbs(proverbs, PROMPT_STATE_BUDGET_CHARS)
+            if not _fits_prompt(proverbs):
+                rewrite_hint = "Do not use set_proverbs: the list is not shown in full."
+        except Exception as e:
+            proverbs_text = f"Error serializing proverbs: {str(e)}"
+    proverbs_version = proverbs_version or 0
+    prefix = f"""You are a helpful assistant for maintaining a list of proverbs.
+        This is the current state of the list of proverbs (version {proverbs_version}, indices are 0-based):
+{proverbs_text}
+        When you modify the list of proverbs, use add_proverb, remove_proverb or replace_proverb with expected_version={proverbs_version}. {rewrite_hint}"""
+
+    if cache_key is not None:
+        _prefix_cache[cache_key] = prefix
+        if len(_prefix_cache) > _PREFIX_CACHE_SIZE:
+            _prefix_cache.popitem(last=False)
+    return prefix
+
+
 # --- Define the Callback Function ---
 #  modifying the agent's system prompt to incude the current state of the proverbs list
 def before_model_modifier(
@@ -89,18 +313,12 @@ def before_model_modifier(
     """Inspects/modifies the LLM request or skips the call."""
     agent_name = callback_context.agent_name
     if agent_name == "ProverbsAgent":
-        proverbs_json = "No proverbs yet"
-        if "proverbs" in callback_context.state and callback_context.state["proverbs"] is not None:
-            try:
-                proverbs_json = json.dumps(callback_context.state["proverbs"], indent=2)
-            except Exception as e:
-                proverbs_json = f"Error serializing proverbs: {str(e)}"
         # --- Modification Example ---
         # Add a prefix to the system instruction
         original_instruction = llm_request.config.system_instruction or types.Content(role="system", parts=[])
-        prefix = f"""You are a helpful assistant for maintaining a list of proverbs.
-        This is the current state of the list of proverbs: {proverbs_json}
-        When you modify the list of proverbs (wether to add, remove, or modify one or more proverbs), use the set_proverbs tool to update the list."""
+        prefix = _proverbs_prefix(
+            callback_context._invocation_context.session.id, callback_context.state
+        )
         # Ensure system_instruction is Content and parts list exists
         if not isinstance(original_instruction, types.Content):
             # Handle case where it might be a string (though config expects Content)
@@ -148,19 +366,21 @@ proverbs_agent = LlmAgent(
         name="ProverbsAgent",
         model="gemini-2.5-flash",
         instruction=f"""
-        When a user asks you to do anything regarding proverbs, you MUST use the set_proverbs tool.
-
-        IMPORTANT RULES ABOUT PROVERBS AND THE SET_PROVERBS TOOL:
-        1. Always use the set_proverbs tool for any proverbs-related requests
-        2. Always pass the COMPLETE LIST of proverbs to the set_proverbs tool. If the list had 5 proverbs and you removed one, you must pass the complete list of 4 remaining proverbs.
-        3. You can use existing proverbs if one is relevant to the user's request, but you can also create new proverbs as required.
-        4. Be creative and helpful in generating complete, practical proverbs
-        5. After using the tool, provide a brief summary of what you create, removed, or changed        7.
-
-        Examples of when to use the set_proverbs tool:
-        - "Add a proverb about soap" → Use tool with an array containing the existing list of proverbs with the new proverb about soap at the end.
-        - "Remove the first proverb" → Use tool with an array containing the all of the existing proverbs except the first one"
-        - "Change any proverbs about cats to mention that they have 18 lives" → If no proverbs mention cats, do not use the tool. If one or more proverbs do mention cats, change them to mention cats having 18 lives, and use the tool with an array of all of the proverbs, including ones that were changed and ones that did not require changes.
+        When a user asks you to do anything regarding proverbs, you MUST use the proverbs tools.
+
+        IMPORTANT RULES ABOUT PROVERBS AND THE PROVERBS TOOLS:
+        1. Always use the proverbs tools for any proverbs-related requests
+        2. Edit the list one proverb at a time with add_proverb, remove_proverb and replace_proverb. Never resend proverbs that did not change.
+        3. Always pass the current proverbs version as expected_version. After a successful call, use the version it returns for the next call. If a call fails because the version changed, re-read the list and retry.
+        4. Only use set_proverbs, with the COMPLETE LIST, when most of the list is being rewritten at once.
+        5. You can use existing proverbs if one is relevant to the user's request, but you can also create new proverbs as required.
+        6. Be creative and helpful in generating complete, practical proverbs
+        7. After using the tools, provide a brief summary of what you create, removed, or changed.
+
+        Examples of when to use the proverbs tools:
+        - "Add a proverb about soap" → Use add_proverb with the new proverb about soap.
+        - "Remove the first proverb" → Use remove_proverb with index 0.
+        - "Change any proverbs about cats to mention that they have 18 lives" → If no proverbs mention cats, do not use the tools. If one or more proverbs do mention cats, call replace_proverb once for each of them, passing the version returned by the previous call.
 
         Do your best to ensure proverbs plausibly make sense.
 
@@ -174,35 +394,92 @@ proverbs_agent = LlmAgent(
         - "Whats the weather right now" → Use the location "Everywhere ever in the whole wide world"
         - Is it raining in London? → Use the tool with the location "London"
         """,
-        tools=[set_proverbs, get_weather],
-        before_agent_callback=on_before_agent,
-        before_model_callback=before_model_modifier,
-        after_model_callback = simple_after_model_modifier
+        tools=[set_proverbs, add_proverb, remove_proverb, replace_proverb, get_weather],
+        before_agent_callback=timed("on_before_agent", on_before_agent),
+        # Compaction appends to the instruction, so it runs while it is still a string.
+        before_model_callback=[
+            timed("compact_history", make_compaction_callback(token_budget=6000, keep_turns=4)),
+            timed("before_model_modifier", before_model_modifier),
+            model_timer.start,
+        ],
+        after_model_callback=[model_timer.stop, timed("simple_after_model_modifier", simple_after_model_modifier)],
+        before_tool_callback=tool_timer.start,
+        after_tool_callback=tool_timer.stop,
     )
 
 # Initialize session service and runner
-session_service = InMemorySessionService()
-runner = Runner(app_name="proverbs_app", agent=proverbs_agent, session_service=session_service)
+APP_NAME = "proverbs_app"
+USER_ID = "ag_ui_user"
+
+# Set when this process is one of serve.py's workers.
+worker_shard = WorkerShard.from_env()
+session_service = SqliteSessionService(
+    os.getenv("SESSION_DB_PATH", "sessions.db"),
+    max_cached_sessions=int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+)
+runner = Runner(app_name=APP_NAME, agent=proverbs_agent, session_service=session_service)
+state_tracker = StateVersionTracker()
+session_locks = SessionLocks()
+
+TURN_SECONDS = registry.register(
+    Histogram("agent_turn_seconds", "Wall time of a user turn.", ("mode",))
+)
+TURN_EVENTS = registry.register(
+    Histogram("agent_turn_events", "Runner events produced per user turn.", ("mode",), COUNT_BUCKETS)
+)
+LOCK_WAIT_SECONDS = registry.register(
+    Histogram("agent_session_lock_wait_seconds", "Time a turn waited for an earlier turn of its session.")
+)
+SESSIONS_CREATED = registry.register(
+    Counter("agent_sessions_created_total", "Sessions created by the server.")
+)
+registry.register(
+    Gauge(
+        "agent_sessions_loaded",
+        "Sessions currently held in memory.",
+        lambda: sum(len(sessions) for sessions in session_service.sessions.get(APP_NAME, {}).values()),
+    )
+)
 
 # Request/Response models
 class ChatMessage(BaseModel):
     message: str
     session_id: Optional[str] = None
+    stream: bool = False
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
 
 class AgentRequest(BaseModel):
-    """Request model for ADK agent endpoint."""
-    session_id: str = "default_session"
+    """Request model for ADK agent endpoint.
+
+    The session is `session_id`, or the ag-ui `threadId`; when neither is
+    sent the server issues a new session and returns its id. A `session_id`
+    must have been issued by the server (404 otherwise), while a `threadId`
+    is chosen by the client, as the ag-ui protocol has it, and its session is
+    created with the first turn that carries a message.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    session_id: Optional[str] = None
+    thread_id: Optional[str] = Field(default=None, alias="threadId")
     messages: List[Dict[str, Any]] = []
     state: Optional[Dict[str, Any]] = None
+    state_version: Optional[int] = None
+    stream: bool = False
 
 class AgentResponse(BaseModel):
-    """Response model for ADK agent endpoint."""
+    """Response model for ADK agent endpoint.
+
+    `state` carries a full snapshot; when the client's `state_version` is
+    still known, `state_patch` carries JSON-patch operations instead.
+    """
+    session_id: Optional[str] = None
     messages: List[Dict[str, Any]] = []
     state: Optional[Dict[str, Any]] = None
+    state_version: Optional[int] = None
+    state_patch: Optional[List[Dict[str, Any]]] = None
 
 # Create FastAPI app
 app = FastAPI(title="ADK Proverbs Agent")
@@ -221,9 +498,10 @@ async def root():
     return {
         "message": "ADK Proverbs Agent API",
         "endpoints": {
-            "POST /": "Main agent endpoint (for @ag-ui/client)",
-            "POST /chat": "Send a message to the agent",
-            "GET /health": "Health check"
+            "POST /": "Main agent endpoint (for @ag-ui/client), SSE when stream=true",
+            "POST /chat": "Send a message to the agent, SSE when stream=true",
+            "GET /health": "Health check",
+            "GET /metrics": "Prometheus metrics"
         }
     }
 
@@ -231,56 +509,223 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of the latency histograms and counters."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _extract_text(event: Event) -> str:
+    """Concatenate the text parts carried by a single runner event."""
+    text = ""
+    if event.content and event.content.parts:
+        for part in event.content.parts:
+            if part.text:
+                text += part.text
+    return text
+
+
+async def _session_exists(session_id: str) -> bool:
+    session = await session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+    )
+    return session is not None
+
+
+async def _require_session(session_id: str) -> None:
+    if not await _session_exists(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown session_id '{session_id}'.")
+
+
+async def _run_turn(session_id: str, message: str, streaming: bool = False, create: bool = False):
+    """Run one user turn through the runner and yield every event it produces.
+
+    With `create` a missing session is created first (ag-ui threads); callers
+    hold the session's lock, so two first turns cannot both create it.
+    """
+    if create and not await _session_exists(session_id):
+        await session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        SESSIONS_CREATED.inc()
+
+    run_config = RunConfig(
+        streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE
+    )
+    mode = "stream" if streaming else "buffered"
+    start = time.perf_counter()
+    events = 0
+    try:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session_id,
+            new_message=Content(role="user", parts=[Part(text=message)]),
+            run_config=run_config,
+        ):
+            events += 1
+            yield event
+    finally:
+        TURN_SECONDS.observe(time.perf_counter() - start, mode)
+        TURN_EVENTS.observe(events, mode)
+
+
+async def _issue_session() -> str:
+    """Create a session with a server-generated id for a client that sent none.
+
+    Behind serve.py the id is one this worker owns, so the router sends the
+    session's later turns back here.
+    """
+    session = await session_service.create_session(
+        app_name=APP_NAME,
+        user_id=USER_ID,
+        session_id=worker_shard.new_session_id() if worker_shard else None,
+    )
+    SESSIONS_CREATED.inc()
+    return session.id
+
+
+async def _collect_response_text(session_id: str, message: str, create: bool = False) -> str:
+    """Buffer a whole turn and return the concatenated model text."""
+    response_text = ""
+    state_delta: Dict[str, Any] = {}
+    async for event in _run_turn(session_id, message, create=create):
+        if event.author != "user":
+            response_text += _extract_text(event)
+        if event.actions and event.actions.state_delta:
+            state_delta.update(event.actions.state_delta)
+    state_tracker.record(session_id, state_delta)
+
+    if not response_text:
+        response_text = "I received your message but couldn't generate a response."
+    return response_text
+
+
+async def _current_state(session_id: str) -> Dict[str, Any]:
+    session = await session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+    )
+    return session.state if session else {}
+
+
+async def _state_fields(session_id: str, client_version: Optional[int]) -> Dict[str, Any]:
+    """Patch since the client's version, or a full snapshot if it is unknown."""
+    patch = state_tracker.patch_since(session_id, client_version)
+    if patch is not None:
+        return {"state_patch": patch, "state_version": state_tracker.version(session_id)}
+    state = state_tracker.visible(await _current_state(session_id))
+    return {"state": state, "state_version": state_tracker.snapshot(session_id, state)}
+
+
+def _sse(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream_turn(
+    session_id: str, message: str, client_version: Optional[int] = None, create: bool = False
+):
+    """Forward text chunks and state changes as server-sent events.
+
+    Event names follow the @ag-ui protocol so the client can render tokens as
+    soon as the model emits them instead of waiting for the whole turn.
+    """
+    run_id = str(uuid.uuid4())
+    yield _sse({"type": "RUN_STARTED", "threadId": session_id, "runId": run_id})
+    async with session_locks.hold(session_id) as waited:
+        LOCK_WAIT_SECONDS.observe(waited)
+        async for chunk in _stream_locked_turn(session_id, message, client_version, run_id, create):
+            yield chunk
+
+
+async def _stream_locked_turn(
+    session_id: str, message: str, client_version: Optional[int], run_id: str, create: bool
+):
+    """Body of _stream_turn, run while holding the session's lock."""
+    message_id = str(uuid.uuid4())
+    state = await _state_fields(session_id, client_version)
+    if "state" in state:
+        yield _sse({"type": "STATE_SNAPSHOT", "snapshot": state["state"]})
+    elif state["state_patch"]:
+        yield _sse({"type": "STATE_DELTA", "delta": state["state_patch"]})
+    yield _sse({"type": "TEXT_MESSAGE_START", "messageId": message_id, "role": "assistant"})
+
+    # With SSE streaming ADK emits partial chunks followed by one aggregated
+    # event holding the full text; only forward the aggregate if no chunk did.
+    streamed_partial = False
+    try:
+        async for event in _run_turn(session_id, message, streaming=True, create=create):
+            if event.author == "user":
+                continue
+            text = _extract_text(event)
+            if event.partial:
+                streamed_partial = True
+            elif streamed_partial:
+                streamed_partial = False
+                text = ""
+            if text:
+                yield _sse({"type": "TEXT_MESSAGE_CONTENT", "messageId": message_id, "delta": text})
+            if event.actions and event.actions.state_delta:
+                _, ops = state_tracker.record(session_id, event.actions.state_delta)
+                if ops:
+                    yield _sse({"type": "STATE_DELTA", "delta": ops})
+    except Exception as e:
+        logger.exception("streamed turn failed", extra={"session_id": session_id})
+        yield _sse({"type": "RUN_ERROR", "message": f"Error processing message: {str(e)}"})
+        return
+
+    yield _sse({"type": "TEXT_MESSAGE_END", "messageId": message_id})
+    yield _sse({
+        "type": "RUN_FINISHED",
+        "threadId": session_id,
+        "runId": run_id,
+        "stateVersion": state_tracker.version(session_id),
+    })
+
+
+def _wants_stream(flag: bool, http_request: Request) -> bool:
+    return flag or "text/event-stream" in http_request.headers.get("accept", "")
+
+
+def _streaming_response(stream, session_id: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session_id},
+    )
+
+
 @app.post("/")
-async def agent_endpoint(request: AgentRequest):
+async def agent_endpoint(request: AgentRequest, http_request: Request):
     """Main endpoint for @ag-ui/client integration."""
     try:
-        session_id = request.session_id or "default_session"
-        
         # Get the last user message
         user_message = ""
         if request.messages and len(request.messages) > 0:
             last_message = request.messages[-1]
             if isinstance(last_message, dict) and "content" in last_message:
                 user_message = last_message["content"]
-        
+
+        if request.session_id:
+            await _require_session(request.session_id)
+
+        # Without a message there is no turn to run, so no session is created.
         if not user_message:
             return AgentResponse(
+                session_id=request.session_id or request.thread_id,
                 messages=[],
                 state=request.state or {}
             )
-        
-        # Create event
-        event = Event(
-            author="user",
-            actions=[EventActions.content(user_message)]
-        )
-        
-        # Run the agent
-        response_events = []
-        async for response_event in runner.run_async(
-            session_id=session_id,
-            event=event
-        ):
-            response_events.append(response_event)
-        
-        # Extract the response text
-        response_text = ""
-        for resp_event in response_events:
-            if resp_event.actions:
-                for action in resp_event.actions:
-                    if hasattr(action, 'content') and action.content:
-                        if hasattr(action.content, 'parts'):
-                            for part in action.content.parts:
-                                if hasattr(part, 'text') and part.text:
-                                    response_text += part.text
-        
-        if not response_text:
-            response_text = "I received your message but couldn't generate a response."
-        
-        # Get the current state from the session
-        session = session_service.get_session(session_id)
-        current_state = session.state if session else {}
+
+        session_id = request.session_id or request.thread_id or await _issue_session()
+        create = not request.session_id
+
+        if _wants_stream(request.stream, http_request):
+            return _streaming_response(
+                _stream_turn(session_id, user_message, request.state_version, create), session_id
+            )
+
+        async with session_locks.hold(session_id) as waited:
+            LOCK_WAIT_SECONDS.observe(waited)
+            response_text = await _collect_response_text(session_id, user_message, create)
+            state_fields = await _state_fields(session_id, request.state_version)
         
         # Format response
         response_messages = [
@@ -291,57 +736,43 @@ async def agent_endpoint(request: AgentRequest):
         ]
         
         return AgentResponse(
+            session_id=session_id,
             messages=response_messages,
-            state=current_state
+            **state_fields
         )
-    
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in agent endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("agent endpoint failed", extra={"session_id": request.session_id or request.thread_id})
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(chat_message: ChatMessage):
+async def chat(chat_message: ChatMessage, http_request: Request):
     """Send a message to the agent and get a response."""
     try:
-        # Get or create session
-        session_id = chat_message.session_id or "default_session"
-        
-        # Send message to agent
-        event = Event(
-            author="user",
-            actions=[EventActions.content(chat_message.message)]
-        )
-        
-        # Run the agent
-        response_events = []
-        async for response_event in runner.run_async(
-            session_id=session_id,
-            event=event
-        ):
-            response_events.append(response_event)
-        
-        # Extract the response text
-        response_text = ""
-        for resp_event in response_events:
-            if resp_event.actions:
-                for action in resp_event.actions:
-                    if hasattr(action, 'content') and action.content:
-                        if hasattr(action.content, 'parts'):
-                            for part in action.content.parts:
-                                if hasattr(part, 'text') and part.text:
-                                    response_text += part.text
-        
-        if not response_text:
-            response_text = "I received your message but couldn't generate a response."
+        if not chat_message.message.strip():
+            raise HTTPException(status_code=400, detail="message is empty.")
+        if chat_message.session_id:
+            await _require_session(chat_message.session_id)
+        session_id = chat_message.session_id or await _issue_session()
+
+        if _wants_stream(chat_message.stream, http_request):
+            return _streaming_response(_stream_turn(session_id, chat_message.message), session_id)
+
+        async with session_locks.hold(session_id) as waited:
+            LOCK_WAIT_SECONDS.observe(waited)
+            response_text = await _collect_response_text(session_id, chat_message.message)
         
         return ChatResponse(
             response=response_text,
             session_id=session_id
         )
-    
+
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("chat endpoint failed", extra={"session_id": chat_message.session_id})
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
 if __name__ == "__main__":
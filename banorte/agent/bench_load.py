@@ -0,0 +1,290 @@
+"""Offline load test of the agent server with a deterministic stub model.
+
+The FastAPI app is driven in-process through httpx's ASGI transport and
+Gemini is replaced by StubLlm, so no network or API quota is involved.
+Reports requests/s, latency percentiles, memory per session and event-loop
+lag. With --baseline, exits non-zero when throughput or p99 latency regress
+by more than --tolerance against a previous --json report.
+
+With --scale 1,2,4 it instead starts serve.py with each worker count, drives
+the router over local TCP and prints throughput, speedup and efficiency per
+worker count.
+
+Usage:
+    python bench_load.py [--sessions 2000] [--turns 3] [--concurrency 500]
+                         [--endpoint chat|agent] [--stream]
+                         [--model-latency-ms 50] [--tokens 40] [--tool-call-ratio 0.2]
+                         [--json report.json] [--baseline report.json]
+    python bench_load.py --scale 1,2,4 [--port 8100] ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import AsyncGenerator, Optional
+
+os.environ.setdefault("SESSION_DB_PATH", ":memory:")
+
+import httpx
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+import agent
+from serve import wait_healthy
+
+LAG_INTERVAL = 0.01
+
+
+class StubLlm(BaseLlm):
+    """Replies after `latency_ms` with `tokens` words, chunked when streaming.
+
+    A `tool_call_ratio` share of turns first calls get_weather, so tool
+    callbacks and the second model round trip are exercised too.
+    """
+
+    model: str = "stub"
+    latency_ms: float = 50.0
+    tokens: int = 40
+    tool_call_ratio: float = 0.0
+    seed: int = 7
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        answered_tool = last is not None and any(part.function_response for part in last.parts or [])
+        # Deterministic per request content, independent of scheduling order.
+        rng = random.Random(f"{self.seed}:{len(llm_request.contents)}:{last.parts[0].text if last and last.parts else ''}")
+        await asyncio.sleep(self.latency_ms / 1000)
+        if not answered_tool and rng.random() < self.tool_call_ratio:
+            call = types.FunctionCall(name="get_weather", args={"location": "Tokyo"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+            return
+
+        words = [f"word{i}" for i in range(self.tokens)]
+        if stream:
+            for i in range(0, len(words), 8):
+                chunk = " ".join(words[i:i + 8]) + " "
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=" ".join(words))]))
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is a high-water mark in KiB on Linux; good enough elsewhere.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _watch_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+
+async def _request(
+    client: httpx.AsyncClient, endpoint: str, session_id: Optional[str], turn: int, stream: bool
+) -> str:
+    """Send one turn and return the session id the server answered for."""
+    message = f"Add a proverb about turn {turn}"
+    if endpoint == "chat":
+        # /chat sessions are issued by the server on the first turn.
+        payload = {"message": message, "session_id": session_id, "stream": stream}
+        path = "/chat"
+    else:
+        payload = {"threadId": session_id, "messages": [{"role": "user", "content": message}], "stream": stream}
+        path = "/"
+    # The header lets serve.py route the turn without parsing the body.
+    headers = {"X-Session-Id": session_id} if session_id else {}
+    if stream:
+        async with client.stream("POST", path, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for _ in response.aiter_bytes():
+                pass
+            return response.headers["x-session-id"]
+    response = await client.post(path, json=payload, headers=headers)
+    response.raise_for_status()
+    return response.json()["session_id"]
+
+
+def create_stub_app():
+    """agent.app with StubLlm configured from BENCH_* variables, for serve.py workers."""
+    agent.proverbs_agent.model = StubLlm(
+        latency_ms=float(os.getenv("BENCH_MODEL_LATENCY_MS", "50")),
+        tokens=int(os.getenv("BENCH_TOKENS", "40")),
+        tool_call_ratio=float(os.getenv("BENCH_TOOL_CALL_RATIO", "0.2")),
+    )
+    return agent.app
+
+
+async def run(args: argparse.Namespace, base_url: Optional[str] = None) -> dict:
+    """Drive the app in-process, or the server at `base_url` when given."""
+    if base_url is None:
+        agent.proverbs_agent.model = StubLlm(
+            latency_ms=args.model_latency_ms, tokens=args.tokens, tool_call_ratio=args.tool_call_ratio
+        )
+        client_options = {"transport": httpx.ASGITransport(app=agent.app), "base_url": "http://bench"}
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        client_options = {"base_url": base_url, "limits": limits}
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def session_worker(client: httpx.AsyncClient, index: int) -> None:
+        nonlocal errors
+        # ag-ui threads are named by the client; /chat sessions by the server.
+        session_id = None if args.endpoint == "chat" else f"load-{index}"
+        for turn in range(args.turns):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    session_id = await _request(client, args.endpoint, session_id, turn, args.stream)
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+
+    gc.collect()
+    rss_before = _rss_bytes()
+    lags: list[float] = []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_loop_lag(lags, stop))
+    async with httpx.AsyncClient(timeout=None, **client_options) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(session_worker(client, i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+    stop.set()
+    await watcher
+    gc.collect()
+    rss_after = _rss_bytes()
+
+    requests = len(latencies)
+    return {
+        "sessions": args.sessions,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "memory_per_session_kib": round((rss_after - rss_before) / max(args.sessions, 1) / 1024, 1),
+        "loop_lag_p50_ms": round(_percentile(lags, 0.50) * 1000, 2),
+        "loop_lag_p99_ms": round(_percentile(lags, 0.99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+    }
+
+
+def _regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    if report["rps"] < baseline["rps"] * (1 - tolerance):
+        found.append(f"rps {report['rps']} < baseline {baseline['rps']}")
+    if report["p99_ms"] > baseline["p99_ms"] * (1 + tolerance):
+        found.append(f"p99 {report['p99_ms']} ms > baseline {baseline['p99_ms']} ms")
+    if report["errors"] > baseline.get("errors", 0):
+        found.append(f"errors {report['errors']} > baseline {baseline.get('errors', 0)}")
+    return found
+
+
+def scaling_report(args: argparse.Namespace) -> list[dict]:
+    """Run the load against serve.py with each worker count in --scale."""
+    rows = []
+    for workers in [int(count) for count in args.scale.split(",")]:
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ,
+                SESSION_DB_PATH=os.path.join(directory, "sessions.db"),
+                BENCH_MODEL_LATENCY_MS=str(args.model_latency_ms),
+                BENCH_TOKENS=str(args.tokens),
+                BENCH_TOOL_CALL_RATIO=str(args.tool_call_ratio),
+            )
+            server = subprocess.Popen(
+                [sys.executable, "serve.py", "--workers", str(workers), "--port", str(args.port),
+                 "--app", "bench_load:create_stub_app", "--factory"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env=env,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{args.port}"
+                wait_healthy([base_url], timeout=180.0)
+                report = asyncio.run(run(args, base_url))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+        rows.append({"workers": workers, **report})
+
+    baseline_rps = rows[0]["rps"] / rows[0]["workers"] if rows and rows[0]["rps"] else 0.0
+    print(f"cores available: {os.cpu_count()}")
+    print(f"{'workers':>7} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'speedup':>8} {'efficiency':>10}")
+    for row in rows:
+        speedup = row["rps"] / baseline_rps if baseline_rps else 0.0
+        print(
+            f"{row['workers']:>7} {row['rps']:>9.1f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+            f" {speedup:>7.2f}x {speedup / row['workers']:>9.0%}"
+        )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--concurrency", type=int, default=500, help="requests in flight")
+    parser.add_argument("--endpoint", choices=("chat", "agent"), default="chat")
+    parser.add_argument("--stream", action="store_true", help="request SSE responses")
+    parser.add_argument("--model-latency-ms", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=40, help="words per model reply")
+    parser.add_argument("--tool-call-ratio", type=float, default=0.2)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json report")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--scale", help="comma-separated worker counts for a scaling report, e.g. 1,2,4")
+    parser.add_argument("--port", type=int, default=8100, help="router port for --scale")
+    args = parser.parse_args()
+
+    if args.scale:
+        rows = scaling_report(args)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as handle:
+                json.dump(rows, handle, indent=2)
+        return 0 if all(row["errors"] == 0 for row in rows) else 1
+
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        print(f"{key:<24} {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = _regressions(report, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Cost of one proverb edit: set_proverbs (whole list) versus add_proverb.
+
+Model-side latency is estimated from the tool-call argument tokens, since
+those are generated by the model one token at a time.
+
+Usage: python bench_proverbs_tools.py [--decode-tokens-per-second 150]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("SESSION_DB_PATH", ":memory:")
+
+from agent import add_proverb, set_proverbs
+
+
+LIST_SIZES = (10, 100, 1000, 5000)
+REPEATS = 200
+
+
+class _ToolContext:
+    """Just enough of ToolContext for the proverbs tools."""
+
+    def __init__(self, proverbs: list[str]):
+        self.state = {"proverbs": proverbs, "proverbs_version": 0}
+
+
+def _estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text and JSON.
+    return max(1, len(text) // 4)
+
+
+def _measure(tool, make_args, proverbs: list[str]) -> tuple[int, float]:
+    """Tokens in the generated arguments and mean parse + execute time."""
+    raw = json.dumps(make_args(proverbs))
+    elapsed = 0.0
+    for _ in range(REPEATS):
+        context = _ToolContext(list(proverbs))
+        start = time.perf_counter()
+        tool(context, **json.loads(raw))
+        elapsed += time.perf_counter() - start
+    return _estimate_tokens(raw), elapsed / REPEATS
+
+
+def main(decode_tokens_per_second: float) -> None:
+    new_proverb = "A stitch in time saves nine."
+    print(
+        f"{'size':>6} | {'tool':<12} | {'arg tokens':>10} | "
+        f"{'est. decode ms':>14} | {'parse+run us':>12}"
+    )
+    for size in LIST_SIZES:
+        proverbs = [f"Proverb number {i}: patience is bitter, but its fruit is sweet." for i in range(size)]
+        cases = (
+            ("set_proverbs", set_proverbs, lambda p: {"new_proverbs": p + [new_proverb]}),
+            ("add_proverb", add_proverb, lambda p: {"proverb": new_proverb, "expected_version": 0}),
+        )
+        for name, tool, make_args in cases:
+            tokens, seconds = _measure(tool, make_args, proverbs)
+            print(
+                f"{size:>6} | {name:<12} | {tokens:>10} | "
+                f"{tokens / decode_tokens_per_second * 1000:>14.1f} | {seconds * 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--decode-tokens-per-second", type=float, default=150.0)
+    args = parser.parse_args()
+    main(args.decode_tokens_per_second)
@@ -0,0 +1,94 @@
+"""Per-turn overhead of SqliteSessionService versus InMemorySessionService.
+
+Usage: python bench_session_store.py [--turns 500] [--sessions 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+from session_store import SqliteSessionService
+
+
+APP_NAME = "bench_app"
+USER_ID = "bench_user"
+
+
+async def _turn(service, session, turn: int) -> None:
+    """One conversational turn: user message, model reply with a state delta."""
+    await service.append_event(
+        session,
+        Event(author="user", content=Content(role="user", parts=[Part(text=f"message {turn}")])),
+    )
+    proverbs = list(session.state.get("proverbs", [])) + [f"proverb {turn}"]
+    await service.append_event(
+        session,
+        Event(
+            author="ProverbsAgent",
+            content=Content(role="model", parts=[Part(text=f"reply {turn}")]),
+            actions=EventActions(state_delta={"proverbs": proverbs[-20:]}),
+        ),
+    )
+    await service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+
+
+async def _per_turn(service, turns: int) -> list[float]:
+    session = await service.create_session(app_name=APP_NAME, user_id=USER_ID)
+    timings = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        await _turn(service, session, turn)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(
+        f"{name:<28} mean {statistics.mean(timings) * 1e6:8.1f} us"
+        f"   p50 {statistics.median(timings) * 1e6:8.1f} us"
+        f"   p99 {p99 * 1e6:8.1f} us"
+    )
+
+
+async def main(turns: int, sessions: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sessions.db")
+
+        _report("InMemorySessionService", await _per_turn(InMemorySessionService(), turns))
+        durable = SqliteSessionService(db_path)
+        _report("SqliteSessionService", await _per_turn(durable, turns))
+
+        for _ in range(sessions):
+            session = await durable.create_session(app_name=APP_NAME, user_id=USER_ID)
+            for turn in range(10):
+                await _turn(durable, session, turn)
+        durable.close()
+
+        start = time.perf_counter()
+        restarted = SqliteSessionService(db_path)
+        elapsed = time.perf_counter() - start
+        print(f"restart with {sessions} stored sessions took {elapsed * 1000:.1f} ms")
+        start = time.perf_counter()
+        await restarted.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+        elapsed = time.perf_counter() - start
+        print(f"first get_session of a 10-turn session took {elapsed * 1000:.1f} ms")
+        restarted.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.sessions))
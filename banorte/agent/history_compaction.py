@@ -0,0 +1,195 @@
+# Copy of agents/shared/history_compaction.py, which is the canonical source: edit that
+# file and copy it here. banorte/agent is deployed on its own (own venv,
+# requirements.txt, run from this directory), so it cannot import the agents
+# project; tests/test_shared_copies.py fails when the copies drift apart.
+"""Rolling compaction of the conversation history sent to the model.
+
+ADK sends every earlier turn of the session in `llm_request.contents`, so
+each model call gets slower and more expensive as the conversation grows.
+The compaction callback keeps the most recent turns verbatim and replaces
+the older ones with a rolling summary in the system instruction:
+
+    before_model_callback=[make_compaction_callback(token_budget=3000), ...]
+
+The summary is extractive (one short line per message, built locally, no
+extra model call) and is stored in session state. Only the turns that left
+the verbatim window since the previous call are digested, and the state is
+written only when the window moves. While turns are compacted, the state
+keys in `preserve_keys` (business_info, valid_loan) are restated in the
+instruction, so facts collected in compacted turns are never lost.
+
+Budgets can be overridden per agent without code changes with
+HISTORY_TOKEN_BUDGETS, e.g. "introduction_agent=2000,ProverbsAgent=6000".
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Sequence
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+STATE_KEY = "history_summary"
+PRESERVED_KEYS = ("business_info", "valid_loan")
+# Rough Gemini ratio for mixed Spanish/English text; only used for budgeting.
+CHARS_PER_TOKEN = 4
+LINE_CHARS = 200
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = {}
+    for item in spec.split(","):
+        name, _, budget = item.partition("=")
+        if name.strip() and budget.strip().isdigit():
+            budgets[name.strip()] = int(budget)
+    return budgets
+
+
+def estimate_tokens(content: types.Content) -> int:
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response:
+            chars += len(part.function_response.name or "") + len(
+                json.dumps(part.function_response.response or {}, default=str)
+            )
+    # Role and part framing cost a few tokens even for empty contents.
+    return chars // CHARS_PER_TOKEN + 4
+
+
+def _starts_turn(content: types.Content) -> bool:
+    """A turn starts at each user message; tool results continue the turn."""
+    if content.role != "user" or not content.parts:
+        return False
+    return not any(part.function_response for part in content.parts)
+
+
+def split_turns(contents: Sequence[types.Content]) -> List[List[types.Content]]:
+    """Group contents into turns, so a function call is never separated from its response."""
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        if not turns or _starts_turn(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _shorten(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= LINE_CHARS else text[: LINE_CHARS - 3] + "..."
+
+
+def digest(content: types.Content) -> List[str]:
+    """One summary line per message or tool call in `content`."""
+    speaker = "User" if content.role == "user" else "Assistant"
+    lines = []
+    for part in content.parts or []:
+        if part.text and part.text.strip():
+            lines.append(f"{speaker}: {_shorten(part.text)}")
+        elif part.function_call:
+            args = json.dumps(part.function_call.args or {}, ensure_ascii=False, default=str)
+            lines.append(_shorten(f"Assistant called {part.function_call.name}({args})"))
+        elif part.function_response:
+            result = json.dumps(part.function_response.response or {}, ensure_ascii=False, default=str)
+            lines.append(_shorten(f"{part.function_response.name} returned {result}"))
+    return lines
+
+
+def _fit_lines(lines: List[str], budget_tokens: int) -> List[str]:
+    """The most recent lines that fit in `budget_tokens`."""
+    kept: List[str] = []
+    used = 0
+    for line in reversed(lines):
+        used += len(line) // CHARS_PER_TOKEN + 1
+        if used > budget_tokens:
+            break
+        kept.append(line)
+    kept.reverse()
+    return kept
+
+
+def make_compaction_callback(
+    token_budget: int = 4000,
+    keep_turns: int = 6,
+    summary_share: float = 0.25,
+    preserve_keys: Sequence[str] = PRESERVED_KEYS,
+):
+    """Build a before_model_callback that compacts older turns into a summary.
+
+    Args:
+        token_budget: Estimated tokens allowed for history plus summary.
+            HISTORY_TOKEN_BUDGETS overrides it per agent name.
+        keep_turns: Most recent turns always sent verbatim, budget permitting.
+            The current turn is never compacted.
+        summary_share: Fraction of the budget the summary may use; its oldest
+            lines are dropped past that.
+        preserve_keys: State keys restated in the instruction whenever turns
+            are compacted.
+    """
+    budgets = _parse_budgets(os.getenv("HISTORY_TOKEN_BUDGETS", ""))
+
+    def compact_history(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        agent_name = callback_context.agent_name
+        budget = budgets.get(agent_name, token_budget)
+        turns = split_turns(llm_request.contents or [])
+        summaries = callback_context.state.get(STATE_KEY) or {}
+        cached = summaries.get(agent_name) or {"turns": 0, "lines": []}
+        if cached["turns"] >= len(turns):
+            # The session history was rewound or replaced.
+            cached = {"turns": 0, "lines": []}
+
+        summary_budget = int(budget * summary_share)
+        summary_tokens = sum(len(line) // CHARS_PER_TOKEN + 1 for line in cached["lines"])
+        verbatim_budget = budget - min(summary_budget, summary_tokens)
+        # Walk back from the current turn while the window and budget allow.
+        start = len(turns) - 1
+        used = sum(estimate_tokens(content) for content in turns[start]) if turns else 0
+        while start > cached["turns"] and len(turns) - start < keep_turns:
+            cost = sum(estimate_tokens(content) for content in turns[start - 1])
+            if used + cost > verbatim_budget:
+                break
+            used += cost
+            start -= 1
+        start = max(start, cached["turns"], 0)
+
+        if start > cached["turns"]:
+            new_lines = [
+                line for turn in turns[cached["turns"]:start] for content in turn for line in digest(content)
+            ]
+            cached = {"turns": start, "lines": _fit_lines(cached["lines"] + new_lines, summary_budget)}
+            callback_context.state[STATE_KEY] = {**summaries, agent_name: cached}
+            logger.debug(
+                "history compacted",
+                extra={"agent_name": agent_name, "compacted_turns": start, "verbatim_turns": len(turns) - start},
+            )
+
+        if start:
+            llm_request.contents = [content for turn in turns[start:] for content in turn]
+        instructions = []
+        if start and cached["lines"]:
+            instructions.append(
+                f"Summary of the {start} earlier conversation turns (older messages are not shown):\n"
+                + "\n".join(cached["lines"])
+            )
+        known = [
+            f"{key}: {callback_context.state[key]}"
+            for key in preserve_keys
+            if callback_context.state.get(key) not in (None, "")
+        ]
+        if known and start:
+            instructions.append("Facts already established in this conversation:\n" + "\n".join(known))
+        if instructions:
+            llm_request.append_instructions(instructions)
+        return None
+
+    return compact_history
@@ -0,0 +1,173 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Histograms keep fixed buckets per label set, so an observation is a bisect
+and three additions, cheap enough to leave on in production. Stage timings
+cover ADK callbacks, model calls and tool calls:
+
+    before_agent_callback=timed("on_before_agent", on_before_agent)
+    before_model_callback=[timed("before_model", modifier), model_timer.start]
+    after_model_callback=[model_timer.stop, ...]
+    before_tool_callback=tool_timer.start, after_tool_callback=tool_timer.stop
+"""
+
+import bisect
+import functools
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Model and tool calls that never finish (errors, cancelled turns) are
+# dropped once this many are pending.
+_MAX_PENDING = 10_000
+
+
+def _escape(value) -> str:
+    """A label value as the text format requires: backslash, quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = _labels(self.label_names, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        values = self._values or ({(): 0} if not self.label_names else {})
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    """A value read from `read` at scrape time."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+STAGE_SECONDS = registry.register(
+    Histogram("agent_stage_seconds", "Time spent per ADK callback, model call and tool call.", ("stage",))
+)
+
+
+def timed(stage: str, callback: Callable) -> Callable:
+    """Wrap a synchronous ADK callback so its duration is recorded under `stage`."""
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+    return wrapper
+
+
+class _PendingTimer:
+    def __init__(self):
+        self._started: Dict[tuple, float] = {}
+
+    def _begin(self, key: tuple) -> None:
+        if len(self._started) >= _MAX_PENDING:
+            self._started.pop(next(iter(self._started)))
+        self._started[key] = time.perf_counter()
+
+    def _end(self, key: tuple, stage: str) -> None:
+        start = self._started.pop(key, None)
+        if start is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+
+class ModelTimer(_PendingTimer):
+    """Time from the last before_model callback to the first model response.
+
+    With streaming this is the time to the first chunk, since the after_model
+    callbacks run once per chunk and only the first one closes the span.
+    """
+
+    def start(self, callback_context, llm_request) -> None:
+        self._begin((callback_context.invocation_id, callback_context.agent_name))
+
+    def stop(self, callback_context, llm_response) -> None:
+        self._end((callback_context.invocation_id, callback_context.agent_name), "model")
+
+
+class ToolTimer(_PendingTimer):
+    def start(self, tool, args, tool_context) -> None:
+        self._begin((tool_context.function_call_id,))
+
+    def stop(self, tool, args, tool_context, tool_response) -> None:
+        self._end((tool_context.function_call_id,), f"tool:{tool.name}")
+
+
+model_timer = ModelTimer()
+tool_timer = ToolTimer()
@@ -0,0 +1,189 @@
+"""Multi-process serving: N agent workers behind a session-affinity router.
+
+Each worker is a separate `uvicorn agent:app` process on a private port, so
+callbacks, pydantic validation and JSON handling spread over N cores. The
+router, listening on the public port, sends every request for a session to
+the same worker. It picks the worker with a consistent-hash ring over the
+session id (session_ring.py), so each worker's in-memory sessions,
+per-session locks and state versions stay valid. Workers get the ring in
+AGENT_WORKER_URLS and AGENT_WORKER_INDEX and issue only ids they own; each
+loads a session from the shared SQLite store when it is first requested, so
+a worker only ever holds the sessions routed to it. Resizing the pool remaps
+only about 1/N of the sessions.
+
+The session is read from the X-Session-Id header or the session_id/threadId
+query parameter. Only when a request carries neither is its JSON body
+parsed for it, so clients that send the header are routed without the
+router touching the body. Requests without a session go to the workers in
+turn; the worker that issues the session owns it.
+
+The router is one process with one event loop: it proxies bytes and costs
+far less per request than a turn, but it does cap throughput at what one
+core can forward. Routing is a pure function of the worker list, so several
+routers can run behind an L4 load balancer when that cap is reached. The
+only measurements so far (bench_load.py --scale) come from a 1-core
+machine, where more workers cannot help; rerun them on the target host.
+
+Usage:
+    python serve.py [--workers 4] [--port 8000]
+
+Prometheus should scrape each worker's /metrics on ports port+1 ... port+N.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from session_ring import HashRing
+
+SESSION_ROUTES = ("/", "/chat")
+# Hop-by-hop headers are not forwarded.
+_SKIP_HEADERS = {"host", "content-length", "connection", "keep-alive", "transfer-encoding"}
+
+
+def _session_from_request(request: Request) -> Optional[str]:
+    """The session named in the header or query string, without reading the body."""
+    return (
+        request.headers.get("x-session-id")
+        or request.query_params.get("session_id")
+        or request.query_params.get("threadId")
+    )
+
+
+def _session_id(path: str, body: bytes) -> Optional[str]:
+    """The session named in a JSON request body, if any."""
+    if path not in SESSION_ROUTES or not body:
+        return None
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    session_id = payload.get("session_id") or payload.get("threadId")
+    return str(session_id) if session_id else None
+
+
+def create_router(worker_urls: List[str]) -> FastAPI:
+    ring = HashRing(worker_urls)
+    new_sessions = itertools.cycle(worker_urls)
+    client = httpx.AsyncClient(
+        timeout=None,
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=256),
+    )
+    router = FastAPI(title="ADK Proverbs Agent router", on_shutdown=[client.aclose])
+
+    @router.get("/workers")
+    async def workers():
+        return {"workers": worker_urls}
+
+    @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+    async def forward(path: str, request: Request):
+        body = await request.body()
+        session_id = _session_from_request(request) or _session_id(request.url.path, body)
+        if session_id:
+            worker = ring.node_for(session_id)
+        elif request.url.path in SESSION_ROUTES and request.method == "POST":
+            worker = next(new_sessions)
+        else:
+            # Requests outside a session (health, metadata).
+            worker = worker_urls[0]
+        upstream = client.build_request(
+            request.method,
+            worker + request.url.path,
+            params=request.query_params,
+            headers=[(k, v) for k, v in request.headers.items() if k.lower() not in _SKIP_HEADERS],
+            content=body,
+        )
+        try:
+            response = await client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            return JSONResponse({"detail": f"Worker unavailable: {e}"}, status_code=502)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS}
+        return StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            headers=headers,
+            background=BackgroundTask(response.aclose),
+        )
+
+    return router
+
+
+def start_workers(count: int, base_port: int, app: str = "agent:app", factory: bool = False) -> List[subprocess.Popen]:
+    """Start `count` uvicorn workers on base_port+1 ... base_port+count."""
+    processes = []
+    urls = ",".join(f"http://127.0.0.1:{base_port + 1 + index}" for index in range(count))
+    for index in range(count):
+        command = [
+            sys.executable, "-m", "uvicorn", app,
+            "--host", "127.0.0.1", "--port", str(base_port + 1 + index),
+            "--log-level", "warning", "--no-access-log",
+        ]
+        if factory:
+            command.append("--factory")
+        env = dict(os.environ, AGENT_WORKER_URLS=urls, AGENT_WORKER_INDEX=str(index))
+        processes.append(subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env))
+    return processes
+
+
+def wait_healthy(urls: List[str], timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    while pending:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Workers did not become healthy: {pending}")
+        try:
+            if httpx.get(pending[0] + "/health", timeout=1.0).status_code == 200:
+                pending.pop(0)
+                continue
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+
+
+def stop_workers(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("AGENT_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--app", default="agent:app", help="worker ASGI app, module:attribute")
+    parser.add_argument("--factory", action="store_true", help="--app is an app factory")
+    args = parser.parse_args()
+
+    # Exit through atexit on SIGTERM too, so workers never outlive the router.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    processes = start_workers(args.workers, args.port, args.app, args.factory)
+    atexit.register(stop_workers, processes)
+    urls = [f"http://127.0.0.1:{args.port + 1 + index}" for index in range(args.workers)]
+    wait_healthy(urls)
+    uvicorn.run(create_router(urls), host="0.0.0.0", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
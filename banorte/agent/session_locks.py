@@ -0,0 +1,43 @@
+# Copy of agents/shared/session_locks.py, which is the canonical source: edit that
+# file and copy it here. banorte/agent is deployed on its own (own venv,
+# requirements.txt, run from this directory), so it cannot import the agents
+# project; tests/test_shared_copies.py fails when the copies drift apart.
+"""Per-session locks that serialize turns within a session.
+
+Turns on the same session run one at a time, in arrival order (asyncio.Lock
+wakes waiters FIFO), so they never race on session.state. Turns on different
+sessions never wait for each other. A session's lock exists only while a turn
+holds or awaits it, so idle sessions cost nothing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+
+class SessionLocks:
+    def __init__(self):
+        # session_id -> [lock, turns holding or waiting for it]
+        self._locks: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[float]:
+        """Hold the session's lock; yields how long the turn waited for it."""
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        start = time.perf_counter()
+        try:
+            async with entry[0]:
+                yield time.perf_counter() - start
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
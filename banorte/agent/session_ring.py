@@ -0,0 +1,69 @@
+"""Consistent hashing of session ids onto the serve.py workers.
+
+The router uses the ring to pick the worker that owns a session; each
+worker uses the same ring, rebuilt from the environment serve.py starts it
+with, to issue only session ids it owns.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import uuid
+from typing import List, Optional
+
+VIRTUAL_NODES = 64
+# Tries before giving up on issuing an owned id; each one succeeds with
+# probability about 1/N, so this is never reached in practice.
+_MAX_ID_TRIES = 10_000
+
+
+class HashRing:
+    """Consistent hashing of session ids onto worker URLs."""
+
+    def __init__(self, nodes: List[str], virtual_nodes: int = VIRTUAL_NODES):
+        self.nodes = list(nodes)
+        points = sorted(
+            (self._hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(virtual_nodes)
+        )
+        self._keys = [key for key, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+
+class WorkerShard:
+    """The part of the ring one worker owns."""
+
+    def __init__(self, ring: HashRing, node: str):
+        self.ring = ring
+        self.node = node
+
+    @classmethod
+    def from_env(cls) -> Optional["WorkerShard"]:
+        """This worker's shard, or None when it is not running under serve.py."""
+        urls = [url for url in os.getenv("AGENT_WORKER_URLS", "").split(",") if url]
+        index = os.getenv("AGENT_WORKER_INDEX")
+        if len(urls) < 2 or index is None:
+            return None
+        return cls(HashRing(urls), urls[int(index)])
+
+    def owns(self, session_id: str) -> bool:
+        return self.ring.node_for(session_id) == self.node
+
+    def new_session_id(self) -> str:
+        """A fresh session id that the router will send back to this worker."""
+        for _ in range(_MAX_ID_TRIES):
+            session_id = str(uuid.uuid4())
+            if self.owns(session_id):
+                return session_id
+        raise RuntimeError(f"Could not issue a session id owned by {self.node}.")
@@ -0,0 +1,294 @@
+"""Disk-backed session service for the agent server."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.state import State
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE INDEX IF NOT EXISTS sessions_last_update ON sessions (last_update_time);
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+
+class SqliteSessionService(InMemorySessionService):
+    """InMemorySessionService with a write-through SQLite (WAL) backing store.
+
+    The inherited in-memory dicts are the hot cache, so reads on the request
+    path cost exactly what they cost with InMemorySessionService. Every
+    committed event is appended to an `events` table and the session's state
+    snapshot is updated in the same transaction.
+
+    Nothing is loaded at start-up: a session and its events are read from the
+    database the first time it is requested. At most `max_cached_sessions`
+    sessions are held in memory; past that the least recently used one is
+    dropped from the cache and reloaded if it is needed again.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "sessions.db",
+        max_cached_sessions: int = 10_000,
+    ):
+        super().__init__()
+        self._max_cached_sessions = max_cached_sessions
+        # (app_name, user_id, session_id) of the cached sessions, oldest use first.
+        self._recent: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable against process crashes in WAL mode; only an OS
+        # crash can lose the last few commits.
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._load_scoped_states()
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        if session_id:
+            self._ensure_loaded(app_name, user_id, session_id)
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        stored = self.sessions[app_name][user_id][session.id]
+        self._touch(app_name, user_id, session.id)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, ?)",
+                (
+                    app_name,
+                    user_id,
+                    stored.id,
+                    json.dumps(stored.state),
+                    stored.last_update_time,
+                ),
+            )
+            self._save_scoped_states(app_name, user_id)
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._ensure_loaded(app_name, user_id, session_id)
+        return await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        """Sessions without their events, read from the database.
+
+        Listing does not load the sessions into the cache.
+        """
+        where, params = "WHERE app_name = ?", (app_name,)
+        if user_id is not None:
+            where, params = where + " AND user_id = ?", (app_name, user_id)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT app_name, user_id, id, state, last_update_time FROM sessions {where}",
+                params,
+            ).fetchall()
+        sessions = []
+        for row_app_name, row_user_id, session_id, state, last_update_time in rows:
+            cached = self.sessions.get(row_app_name, {}).get(row_user_id, {}).get(session_id)
+            session = Session(
+                app_name=row_app_name,
+                user_id=row_user_id,
+                id=session_id,
+                state=dict(cached.state) if cached else json.loads(state),
+                last_update_time=cached.last_update_time if cached else last_update_time,
+            )
+            sessions.append(self._merge_state(row_app_name, row_user_id, session))
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        key = (app_name, user_id, session_id)
+        self._recent.pop(key, None)
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                key,
+            )
+            self._db.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        # The session may have been evicted since the turn fetched it.
+        self._ensure_loaded(session.app_name, session.user_id, session.id)
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+
+        stored = (
+            self.sessions.get(session.app_name, {})
+            .get(session.user_id, {})
+            .get(session.id)
+        )
+        # The parent only records the event when the session is known.
+        if stored is None or not stored.events or stored.events[-1] is not event:
+            return event
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?)",
+                (
+                    session.app_name,
+                    session.user_id,
+                    session.id,
+                    len(stored.events) - 1,
+                    event.model_dump_json(exclude_none=True),
+                ),
+            )
+            if event.actions and event.actions.state_delta:
+                self._db.execute(
+                    "UPDATE sessions SET state = ?, last_update_time = ? "
+                    "WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (
+                        json.dumps(stored.state),
+                        stored.last_update_time,
+                        session.app_name,
+                        session.user_id,
+                        session.id,
+                    ),
+                )
+                if any(
+                    key.startswith((State.APP_PREFIX, State.USER_PREFIX))
+                    for key in event.actions.state_delta
+                ):
+                    self._save_scoped_states(session.app_name, session.user_id)
+            else:
+                self._db.execute(
+                    "UPDATE sessions SET last_update_time = ? "
+                    "WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (
+                        stored.last_update_time,
+                        session.app_name,
+                        session.user_id,
+                        session.id,
+                    ),
+                )
+        return event
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _touch(self, app_name: str, user_id: str, session_id: str) -> None:
+        """Mark a cached session as just used and evict past the cache size."""
+        key = (app_name, user_id, session_id)
+        self._recent[key] = None
+        self._recent.move_to_end(key)
+        while len(self._recent) > self._max_cached_sessions:
+            (old_app, old_user, old_id), _ = self._recent.popitem(last=False)
+            user_sessions = self.sessions.get(old_app, {}).get(old_user, {})
+            user_sessions.pop(old_id, None)
+            if not user_sessions:
+                self.sessions.get(old_app, {}).pop(old_user, None)
+
+    def _ensure_loaded(self, app_name: str, user_id: str, session_id: str) -> None:
+        if session_id in self.sessions.get(app_name, {}).get(user_id, {}):
+            self._touch(app_name, user_id, session_id)
+            return
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state, last_update_time FROM sessions "
+                "WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return
+            events = [
+                Event.model_validate_json(raw)
+                for (raw,) in self._db.execute(
+                    "SELECT event FROM events "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ? "
+                    "ORDER BY seq",
+                    (app_name, user_id, session_id),
+                )
+            ]
+        state, last_update_time = row
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=json.loads(state),
+            events=events,
+            last_update_time=last_update_time,
+        )
+        self._touch(app_name, user_id, session_id)
+
+    def _load_scoped_states(self) -> None:
+        for app_name, state in self._db.execute("SELECT app_name, state FROM app_states"):
+            self.app_state[app_name] = json.loads(state)
+        for app_name, user_id, state in self._db.execute(
+            "SELECT app_name, user_id, state FROM user_states"
+        ):
+            self.user_state.setdefault(app_name, {})[user_id] = json.loads(state)
+
+    def _save_scoped_states(self, app_name: str, user_id: str) -> None:
+        if app_name in self.app_state:
+            self._db.execute(
+                "INSERT OR REPLACE INTO app_states VALUES (?, ?)",
+                (app_name, json.dumps(self.app_state[app_name])),
+            )
+        if user_id in self.user_state.get(app_name, {}):
+            self._db.execute(
+                "INSERT OR REPLACE INTO user_states VALUES (?, ?, ?)",
+                (app_name, user_id, json.dumps(self.user_state[app_name][user_id])),
+            )
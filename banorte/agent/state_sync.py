@@ -0,0 +1,145 @@
+"""Versioned session state with JSON-patch deltas for the @ag-ui client."""
+
+from __future__ import annotations
+
+import copy
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bookkeeping written by the server-side callbacks; the client never sees it.
+INTERNAL_KEYS = ("proverbs_version", "history_summary")
+
+
+def _pointer(*tokens: Any) -> str:
+    return "".join(
+        "/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens
+    )
+
+
+def diff_value(key: str, old: Any, new: Any, existed: bool) -> List[Dict[str, Any]]:
+    """JSON-patch (RFC 6902) operations turning `old` into `new` for one key.
+
+    Lists that only grew or shrank at the end, the usual shape of a proverbs
+    edit, are expressed element-wise so the patch size follows the change.
+    """
+    if not existed:
+        return [{"op": "add", "path": _pointer(key), "value": new}]
+    if old == new:
+        return []
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        if old[:common] == new[:common]:
+            if len(new) > len(old):
+                return [
+                    {"op": "add", "path": _pointer(key, "-"), "value": item}
+                    for item in new[common:]
+                ]
+            return [
+                {"op": "remove", "path": _pointer(key, index)}
+                for index in range(len(old) - 1, common - 1, -1)
+            ]
+    return [{"op": "replace", "path": _pointer(key), "value": new}]
+
+
+class _SessionVersions:
+    def __init__(self, max_history: int):
+        # Start from a clock value so versions handed out by a previous
+        # process can never be mistaken for versions of this one.
+        self.version = time.time_ns() // 1000
+        self.shadow: Dict[str, Any] = {}
+        self.history: deque[Tuple[int, List[Dict[str, Any]]]] = deque(maxlen=max_history)
+
+
+class StateVersionTracker:
+    """Tracks a state version per session and the patches between versions.
+
+    Only keys that appear in a turn's state deltas are diffed and copied, so
+    the work per turn follows the size of the change rather than the size of
+    the whole state. `internal_keys` are left out of snapshots and patches.
+
+    At most `max_sessions` sessions are tracked; the least recently used one
+    is dropped past that, and its client simply gets a full snapshot next.
+    """
+
+    def __init__(
+        self,
+        max_history: int = 64,
+        max_sessions: int = 10_000,
+        internal_keys: Iterable[str] = INTERNAL_KEYS,
+    ):
+        self._max_history = max_history
+        self._max_sessions = max_sessions
+        self._internal_keys = frozenset(internal_keys)
+        self._sessions: "OrderedDict[str, _SessionVersions]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _get(self, session_id: str) -> _SessionVersions:
+        versions = self._sessions.get(session_id)
+        if versions is None:
+            versions = self._sessions[session_id] = _SessionVersions(self._max_history)
+            if len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return versions
+
+    def visible(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """`state` without the internal keys, as the client should see it."""
+        return {key: value for key, value in state.items() if key not in self._internal_keys}
+
+    def version(self, session_id: str) -> int:
+        return self._get(session_id).version
+
+    def record(
+        self, session_id: str, state_delta: Dict[str, Any]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Apply a state delta and return the resulting version and its patch."""
+        versions = self._get(session_id)
+        ops: List[Dict[str, Any]] = []
+        for key, value in state_delta.items():
+            if key in self._internal_keys:
+                continue
+            ops.extend(
+                diff_value(key, versions.shadow.get(key), value, key in versions.shadow)
+            )
+            versions.shadow[key] = copy.deepcopy(value)
+        if ops:
+            versions.version += 1
+            versions.history.append((versions.version, ops))
+        return versions.version, ops
+
+    def patch_since(
+        self, session_id: str, client_version: Optional[int]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Patch from `client_version` to the current version.
+
+        Returns None when the client has to be sent a full snapshot instead:
+        no version, a version from another process, or one older than the
+        retained history.
+        """
+        if client_version is None:
+            return None
+        versions = self._get(session_id)
+        if client_version == versions.version:
+            return []
+        if not versions.history or not (
+            versions.history[0][0] - 1 <= client_version < versions.version
+        ):
+            return None
+        ops: List[Dict[str, Any]] = []
+        for version, version_ops in versions.history:
+            if version > client_version:
+                ops.extend(version_ops)
+        return ops
+
+    def snapshot(self, session_id: str, state: Dict[str, Any]) -> int:
+        """Reset the shadow copy to a full state that is sent to the client."""
+        versions = self._get(session_id)
+        versions.shadow = copy.deepcopy(self.visible(state))
+        return versions.version
+
+    def forget(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
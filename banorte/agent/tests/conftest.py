@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The agent modules are run from banorte/agent and import each other flatly.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the server's session store in memory for the tests.
+os.environ.setdefault("SESSION_DB_PATH", ":memory:")
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import pytest
+
+import agent
+from bench_load import StubLlm
+
+
+@pytest.fixture(autouse=True)
+def stub_model(monkeypatch):
+    monkeypatch.setattr(agent.proverbs_agent, "model", StubLlm(latency_ms=0, tokens=5, tool_call_ratio=0))
+
+
+def _post(path, payload):
+    async def send():
+        transport = httpx.ASGITransport(app=agent.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=payload)
+
+    return asyncio.run(send())
+
+
+def _session_count():
+    return sum(len(sessions) for sessions in agent.session_service.sessions.get(agent.APP_NAME, {}).values())
+
+
+def test_unknown_session_ids_are_rejected():
+    before = _session_count()
+    message = [{"role": "user", "content": "hola"}]
+
+    assert _post("/", {"session_id": "made-up", "messages": message}).status_code == 404
+    assert _post("/chat", {"session_id": "made-up", "message": "hola"}).status_code == 404
+    assert _session_count() == before
+
+
+def test_an_empty_message_creates_no_session():
+    before = _session_count()
+
+    response = _post("/", {"messages": []})
+
+    assert response.status_code == 200 and response.json()["messages"] == []
+    assert _post("/", {"threadId": "thread-empty", "messages": []}).status_code == 200
+    assert _post("/chat", {"message": "  "}).status_code == 400
+    assert _session_count() == before
+
+
+def test_sessions_are_created_with_the_first_turn():
+    chat = _post("/chat", {"message": "hola"})
+    session_id = chat.json()["session_id"]
+    assert _post("/chat", {"session_id": session_id, "message": "otra vez"}).status_code == 200
+
+    thread = _post("/", {"threadId": "thread-1", "messages": [{"role": "user", "content": "hola"}]})
+    assert thread.status_code == 200 and thread.json()["session_id"] == "thread-1"
+    assert _post("/", {"session_id": "thread-1", "messages": [{"role": "user", "content": "y?"}]}).status_code == 200
@@ -0,0 +1,36 @@
+from metrics import Counter, Histogram, MetricsRegistry, timed
+
+
+def test_label_values_are_escaped():
+    counter = Counter("tool_calls_total", "Tool calls.", ("tool",))
+    counter.inc('say "hi"\\now\nplease')
+
+    assert counter.render()[-1] == 'tool_calls_total{tool="say \\"hi\\"\\\\now\\nplease"} 1'
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("stage_seconds", "Stage time.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "model")
+
+    lines = histogram.render()
+    assert 'stage_seconds_bucket{stage="model",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="model",le="1.0"} 2' in lines
+    assert 'stage_seconds_bucket{stage="model",le="+Inf"} 3' in lines
+    assert 'stage_seconds_count{stage="model"} 3' in lines
+
+
+def test_registry_renders_every_metric():
+    registry = MetricsRegistry()
+    registry.register(Counter("turns_total", "Turns."))
+
+    assert registry.render() == "# HELP turns_total Turns.\n# TYPE turns_total counter\nturns_total 0\n"
+
+
+def test_timed_records_the_wrapped_callback():
+    from metrics import STAGE_SECONDS
+
+    wrapped = timed("test_stage", lambda value: value * 2)
+
+    assert wrapped(21) == 42
+    assert any(line.startswith('agent_stage_seconds_count{stage="test_stage"}') for line in STAGE_SECONDS.render())
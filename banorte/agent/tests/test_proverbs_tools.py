@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+import agent
+
+
+def _context(proverbs):
+    return SimpleNamespace(state={"proverbs": list(proverbs), "proverbs_version": 3})
+
+
+def test_set_proverbs_rewrites_a_list_shown_in_full():
+    context = _context(["uno", "dos"])
+    result = agent.set_proverbs(context, ["tres"])
+    assert result["status"] == "success"
+    assert context.state["proverbs"] == ["tres"]
+
+
+def test_set_proverbs_is_refused_while_the_list_is_truncated(monkeypatch):
+    monkeypatch.setattr(agent, "PROMPT_STATE_BUDGET_CHARS", 40)
+    proverbs = [f"proverb number {index}" for index in range(10)]
+    context = _context(proverbs)
+
+    prefix = agent._proverbs_prefix("session-truncated", context.state)
+    assert "indices 0-" in prefix and "Do not use set_proverbs" in prefix
+
+    result = agent.set_proverbs(context, proverbs[-2:])
+    assert result["status"] == "error"
+    assert context.state["proverbs"] == proverbs
+    assert context.state["proverbs_version"] == 3
+
+    # Indexed edits still work on what the model can see.
+    result = agent.replace_proverb(context, 9, "nuevo", expected_version=3)
+    assert result["status"] == "success" and context.state["proverbs"][9] == "nuevo"
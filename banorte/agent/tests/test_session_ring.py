@@ -0,0 +1,30 @@
+from session_ring import HashRing, WorkerShard
+
+WORKERS = ["http://127.0.0.1:8001", "http://127.0.0.1:8002", "http://127.0.0.1:8003"]
+
+
+def test_ring_is_stable_and_spreads_sessions():
+    ring = HashRing(WORKERS)
+    owners = [ring.node_for(f"session-{index}") for index in range(300)]
+    assert owners == [HashRing(WORKERS).node_for(f"session-{index}") for index in range(300)]
+    assert set(owners) == set(WORKERS)
+
+
+def test_worker_shard_from_env(monkeypatch):
+    monkeypatch.setenv("AGENT_WORKER_URLS", ",".join(WORKERS))
+    monkeypatch.setenv("AGENT_WORKER_INDEX", "1")
+    shard = WorkerShard.from_env()
+    assert shard.node == WORKERS[1]
+
+    monkeypatch.setenv("AGENT_WORKER_URLS", WORKERS[0])
+    monkeypatch.setenv("AGENT_WORKER_INDEX", "0")
+    assert WorkerShard.from_env() is None
+
+
+def test_issued_ids_route_back_to_the_issuing_worker():
+    ring = HashRing(WORKERS)
+    for node in WORKERS:
+        shard = WorkerShard(ring, node)
+        for _ in range(20):
+            assert ring.node_for(shard.new_session_id()) == node
+
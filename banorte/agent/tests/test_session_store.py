@@ -0,0 +1,76 @@
+import asyncio
+
+from google.adk.events import Event, EventActions
+
+from session_store import SqliteSessionService
+
+
+def _turn(service, session_id, text):
+    async def run():
+        session = await service.get_session(app_name="app", user_id="user", session_id=session_id)
+        event = Event(author="user", actions=EventActions(state_delta={"last": text}))
+        await service.append_event(session, event)
+
+    asyncio.run(run())
+
+
+def _cached(service):
+    return set(service.sessions.get("app", {}).get("user", {}))
+
+
+def _create(service, session_id):
+    return asyncio.run(service.create_session(app_name="app", user_id="user", session_id=session_id))
+
+
+def test_sessions_are_loaded_lazily_after_a_restart(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    writer = SqliteSessionService(db_path)
+    for session_id in ("a", "b"):
+        _create(writer, session_id)
+        _turn(writer, session_id, f"hola {session_id}")
+    writer.close()
+
+    restarted = SqliteSessionService(db_path)
+    assert _cached(restarted) == set()
+    session = asyncio.run(restarted.get_session(app_name="app", user_id="user", session_id="a"))
+    assert session.state["last"] == "hola a" and len(session.events) == 1
+    assert _cached(restarted) == {"a"}
+
+
+def test_least_recently_used_session_is_evicted(tmp_path):
+    service = SqliteSessionService(str(tmp_path / "sessions.db"), max_cached_sessions=2)
+    for session_id in ("a", "b"):
+        _create(service, session_id)
+    _turn(service, "a", "uno")
+    _create(service, "c")
+    assert _cached(service) == {"a", "c"}
+
+    # An evicted session is reloaded with everything it had.
+    _turn(service, "b", "dos")
+    session = asyncio.run(service.get_session(app_name="app", user_id="user", session_id="b"))
+    assert session.state["last"] == "dos"
+    assert len(_cached(service)) == 2
+
+
+def test_event_for_an_evicted_session_is_still_persisted(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    service = SqliteSessionService(db_path, max_cached_sessions=1)
+    session = _create(service, "a")
+    _create(service, "b")
+    assert _cached(service) == {"b"}
+
+    asyncio.run(service.append_event(session, Event(author="user", actions=EventActions(state_delta={"k": 1}))))
+    reopened = SqliteSessionService(db_path)
+    stored = asyncio.run(reopened.get_session(app_name="app", user_id="user", session_id="a"))
+    assert stored.state["k"] == 1 and len(stored.events) == 1
+
+
+def test_list_sessions_does_not_fill_the_cache(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    writer = SqliteSessionService(db_path)
+    for session_id in ("a", "b", "c"):
+        _create(writer, session_id)
+    reader = SqliteSessionService(db_path)
+    listed = asyncio.run(reader.list_sessions(app_name="app", user_id="user"))
+    assert sorted(session.id for session in listed.sessions) == ["a", "b", "c"]
+    assert _cached(reader) == set()
@@ -0,0 +1,25 @@
+"""The modules banorte/agent copies from agents/shared must not drift apart."""
+
+from pathlib import Path
+
+import pytest
+
+AGENT_DIR = Path(__file__).resolve().parents[1]
+SHARED_DIR = AGENT_DIR.parents[1] / "agents" / "shared"
+
+
+def _without_header(text: str) -> str:
+    lines = text.splitlines(keepends=True)
+    while lines and lines[0].startswith("#"):
+        lines.pop(0)
+    return "".join(lines)
+
+
+@pytest.mark.parametrize("name", ["structured_logging.py", "history_compaction.py", "session_locks.py"])
+def test_copy_matches_the_canonical_module(name):
+    canonical = SHARED_DIR / name
+    if not canonical.exists():
+        pytest.skip("agents/shared is not checked out next to banorte/agent")
+    copy = (AGENT_DIR / name).read_text(encoding="utf-8")
+    assert copy.startswith(f"# Copy of agents/shared/{name}")
+    assert _without_header(copy) == canonical.read_text(encoding="utf-8")
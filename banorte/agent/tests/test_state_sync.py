@@ -0,0 +1,46 @@
+from state_sync import StateVersionTracker, diff_value
+
+
+def test_patch_since_replays_changes_after_the_client_version():
+    tracker = StateVersionTracker()
+    base = tracker.snapshot("s1", {"proverbs": ["a"]})
+    tracker.record("s1", {"proverbs": ["a", "b"]})
+    tracker.record("s1", {"mood": "happy"})
+
+    assert tracker.patch_since("s1", base) == [
+        {"op": "add", "path": "/proverbs/-", "value": "b"},
+        {"op": "add", "path": "/mood", "value": "happy"},
+    ]
+    assert tracker.patch_since("s1", tracker.version("s1")) == []
+
+
+def test_internal_keys_are_never_sent_to_the_client():
+    tracker = StateVersionTracker()
+    state = {"proverbs": ["a"], "proverbs_version": 3, "history_summary": {"ProverbsAgent": {}}}
+    base = tracker.snapshot("s1", state)
+
+    assert tracker.visible(state) == {"proverbs": ["a"]}
+    assert tracker.record("s1", {"proverbs_version": 4, "history_summary": {}}) == (base, [])
+    tracker.record("s1", {"proverbs": ["a", "b"], "proverbs_version": 5})
+    assert tracker.patch_since("s1", base) == [{"op": "add", "path": "/proverbs/-", "value": "b"}]
+
+
+def test_least_recently_used_sessions_are_dropped():
+    tracker = StateVersionTracker(max_sessions=2)
+    s1 = tracker.snapshot("s1", {})
+    s2 = tracker.snapshot("s2", {})
+    tracker.record("s1", {"x": 1})
+    tracker.snapshot("s3", {})
+
+    assert len(tracker) == 2
+    assert tracker.patch_since("s1", s1) == [{"op": "add", "path": "/x", "value": 1}]
+    # s2 was forgotten, so its client gets a full snapshot instead of a patch.
+    assert tracker.patch_since("s2", s2) is None
+
+
+def test_diff_value_expresses_list_growth_element_wise():
+    assert diff_value("proverbs", ["a"], ["a", "b", "c"], True) == [
+        {"op": "add", "path": "/proverbs/-", "value": "b"},
+        {"op": "add", "path": "/proverbs/-", "value": "c"},
+    ]
+    assert diff_value("mood", "sad", "sad", True) == []
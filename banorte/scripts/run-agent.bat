@@ -5,5 +5,10 @@ cd /d %~dp0\..\agent
 REM Activate the virtual environment
 call .venv\Scripts\activate.bat
 
-REM Run the agent
-.venv\Scripts\python.exe agent.py 
\ No newline at end of file
+REM Run the agent; AGENT_WORKERS > 1 starts that many workers behind the router
+if "%AGENT_WORKERS%"=="" set AGENT_WORKERS=1
+if %AGENT_WORKERS% GTR 1 (
+    .venv\Scripts\python.exe serve.py --workers %AGENT_WORKERS%
+) else (
+    .venv\Scripts\python.exe agent.py
+)
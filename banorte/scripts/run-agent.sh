@@ -6,5 +6,9 @@ cd "$(dirname "$0")/../agent" || exit 1
 # Activate the virtual environment
 source .venv/bin/activate
 
-# Run the agent
-.venv/bin/python agent.py
+# Run the agent; AGENT_WORKERS > 1 starts that many workers behind the router
+if [ "${AGENT_WORKERS:-1}" -gt 1 ]; then
+    .venv/bin/python serve.py --workers "$AGENT_WORKERS"
+else
+    .venv/bin/python agent.py
+fi